@@ -0,0 +1,71 @@
+"""Report cost of the broadcast path per engine step.
+    AI players play against each other while spectator sockets receive every
+    update rendered by the real templates, like browsers watching the game.
+    Usage: python -m benchmarks.broadcast_bench [games] [spectators]
+"""
+import sys
+import time
+import tracemalloc
+
+from mock import Mock
+from tornado.httputil import HTTPServerRequest
+import tornado.web
+
+import pypokergui.server.poker as P
+import pypokergui.server.game_manager as GM
+import pypokergui.server.message_manager as MM
+import pypokergui.server.pacing as Pacing
+
+AI_SCRIPT = "tests/pypokergui/server/sample_ai_setup_script.py"
+
+class SpectatorSocket(object):
+
+    def __init__(self, uuid):
+        self.uuid = uuid
+        self.message_num = 0
+
+    def write_message(self, message):
+        self.message_num += 1
+
+def gen_handler():
+    request = HTTPServerRequest(method="GET", uri="/", connection=Mock())
+    return tornado.web.RequestHandler(P.Application(), request)
+
+def play_games(handler, game_num, spectator_num, player_num=6):
+    sockets = [SpectatorSocket("spectator-%d" % idx) for idx in range(spectator_num)]
+    game_manager = GM.GameManager()
+    game_manager.define_rule(10, 100, 5, 0, None)
+    game_manager.pacing = Pacing.PacingPolicy("dev")
+    for idx in range(player_num):
+        game_manager.join_ai_player("ai-%d" % idx, AI_SCRIPT)
+    step_num, elapsed, peak = 0, 0.0, 0
+    for _ in range(game_num):
+        game_manager.start_next_game()
+        MM.broadcast_start_game(handler, game_manager, [])
+        while True:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            start = time.time()
+            MM.broadcast_update_game(handler, game_manager, sockets)
+            elapsed += time.time() - start
+            peak += tracemalloc.get_traced_memory()[1] - baseline
+            step_num += 1
+            if not game_manager.is_playing_poker: break
+            action, amount = game_manager.ask_action_to_ai_player(game_manager.next_player_uuid)
+            game_manager.update_game(action, amount)
+    return step_num, elapsed, peak
+
+def main():
+    game_num = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    spectator_num = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    handler = gen_handler()
+    play_games(handler, 1, spectator_num)  # compile templates
+    tracemalloc.start()
+    step_num, elapsed, peak = play_games(handler, game_num, spectator_num)
+    tracemalloc.stop()
+    print("steps                  : %d (%d games, %d spectators)" % (step_num, game_num, spectator_num))
+    print("broadcast time per step: %.3f ms" % (1000 * elapsed / step_num))
+    print("peak allocation per step: %.1f KiB" % (peak / step_num / 1024.0))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Report time to bucket a situation with card_buckets tables, next to the
+    hand strength the solver computes without them.
+    Usage: python -m benchmarks.card_buckets_bench <table dir> [lookups]
+"""
+import sys
+import time
+
+import numpy as np
+
+import pypokergui.solver as Solver
+import pypokergui.utils.card_buckets as CB
+
+def main():
+    tables = CB.BucketTables(sys.argv[1])
+    lookup_num = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    rng = np.random.default_rng(0)
+    print("%-8s %-18s %-22s %s" % ("street", "bucket()", "buckets_of() per deal", "solver hand_strength()"))
+    for street in tables.streets:
+        size = CB.BOARD_SIZES[CB.STREETS.index(street)]
+        cards = np.argsort(rng.random((lookup_num, 52)), axis=1)[:, :2 + size]
+        deals = cards.tolist()
+        start = time.time()
+        for deal in deals:
+            tables.bucket(deal[:2], deal[2:])
+        lookup_us = 1e6 * (time.time() - start) / lookup_num
+        start = time.time()
+        tables.buckets_of(cards[:, :2], cards[:, 2:])
+        batch_us = 1e6 * (time.time() - start) / lookup_num
+        strength_us = float("nan")
+        if size > 0:
+            start = time.time()
+            for deal in deals[:100]:
+                Solver.hand_strength(deal[:2], deal[2:])
+            strength_us = 1e6 * (time.time() - start) / 100
+        print("%-8s %8.2f us        %8.2f us              %8.1f us" % (street, lookup_us, batch_us, strength_us))
+
+if __name__ == "__main__":
+    main()
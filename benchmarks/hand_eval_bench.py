@@ -0,0 +1,47 @@
+"""Report how many hands per second are classified by hand_eval.
+    Usage: python -m benchmarks.hand_eval_bench [repeat]
+"""
+import sys
+import time
+
+import numpy as np
+
+import pypokergui.utils.hand_dataset as HD
+import pypokergui.utils.hand_eval as HE
+
+from pypokerengine.engine.hand_evaluator import HandEvaluator
+from pypokerengine.utils.card_utils import gen_cards
+
+def bench_classify(hands, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        HD.classify(hands)
+    return len(hands) * repeat / (time.time() - start)
+
+def bench_seven_cards(hand_num):
+    rng = np.random.RandomState(0)
+    hands = np.argsort(rng.rand(hand_num, 52), axis=1)[:, :7]
+    start = time.time()
+    HE.evaluate(hands)
+    return hand_num / (time.time() - start)
+
+def bench_pypokerengine(hands, hand_num):
+    cards = [gen_cards([HE.card_str(c) for c in hand]) for hand in hands[:hand_num]]
+    start = time.time()
+    for hand in cards:
+        HandEvaluator.eval_hand(hand[:2], hand[2:])
+    return hand_num / (time.time() - start)
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    start = time.time()
+    hands, classes = HD.load_dataset()
+    print("load            : %d rows in %.3f sec" % (len(hands), time.time() - start))
+    mismatch = np.count_nonzero(HD.classify(hands) != classes)
+    print("validation      : %d mismatches" % mismatch)
+    print("classify 5-card : %.0f hands/sec" % bench_classify(hands, repeat))
+    print("evaluate 7-card : %.0f hands/sec" % bench_seven_cards(200000))
+    print("pypokerengine   : %.0f hands/sec" % bench_pypokerengine(hands, 5000))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Report memory of an AI player history over a long session.
+    Decisions of real games (hole cards and round_state of declare_action) are
+    recorded again and again, into DecisionHistory of nobot and into growing
+    lists like nobot kept before, and RSS is printed as the hands go.
+    round_state is copied for the lists as the engine gives a new dict every time.
+    Usage: python -m benchmarks.history_soak_bench [hands] [hands with lists]
+"""
+import copy
+import random
+import resource
+import sys
+import time
+
+from pypokerengine.api.game import setup_config, start_poker
+from pypokerengine.players import BasePokerPlayer
+
+import pypokergui.utils.decision_history as DH
+
+class RecordingPlayer(BasePokerPlayer):
+
+    def __init__(self, hands):
+        super().__init__()
+        self.hands = hands
+
+    def declare_action(self, valid_actions, hole_card, round_state):
+        self.hands[-1].append((hole_card, copy.deepcopy(round_state)))
+        action = random.choice(valid_actions[:2])
+        return action["action"], action["amount"]
+
+    def receive_game_start_message(self, game_info): pass
+    def receive_round_start_message(self, round_count, hole_card, seats): self.hands.append([])
+    def receive_street_start_message(self, street, round_state): pass
+    def receive_game_update_message(self, action, round_state): pass
+    def receive_round_result_message(self, winners, hand_info, round_state): pass
+
+def collect_hands(game_num=5):
+    hands = []
+    for _ in range(game_num):
+        config = setup_config(max_round=20, initial_stack=1000, small_blind_amount=5)
+        for idx in range(6):
+            config.register_player("p%d" % idx, RecordingPlayer(hands))
+        start_poker(config, verbose=0)
+    return [hand for hand in hands if hand]
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"): return int(line.split()[1]) / 1024.0
+    except IOError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # peak, where /proc is missing
+
+def soak(hands, hand_num, record, report_every):
+    start, decision_num = time.time(), 0
+    for count in range(1, hand_num + 1):
+        for hole_card, round_state in hands[count % len(hands)]:
+            record(hole_card, round_state)
+            decision_num += 1
+        if count % report_every == 0:
+            print("  %9d hands %10d decisions  RSS %8.1f MB  (%.1fs)" % (
+                count, decision_num, rss_mb(), time.time() - start))
+
+def main():
+    hand_num = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    list_hand_num = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    hands = collect_hands()
+    print("%d hands of real games collected, RSS %.1f MB" % (len(hands), rss_mb()))
+    print("DecisionHistory(%d):" % DH.DEFAULT_CAPACITY)
+    history = DH.DecisionHistory()
+    soak(hands, hand_num, lambda hole, state: history.record(hole, state, "call", 10, "uuid"),
+            max(1, hand_num // 10))
+    print("lists of hole cards, round_state and actions:")
+    lists = ([], [], [])
+    def record_in_lists(hole_card, round_state):
+        lists[0].append(hole_card)
+        lists[1].append(copy.deepcopy(round_state))
+        lists[2].append(("call", 10))
+    soak(hands, list_hand_num, record_in_lists, max(1, list_hand_num // 5))
+
+if __name__ == "__main__":
+    main()
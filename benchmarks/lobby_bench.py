@@ -0,0 +1,48 @@
+"""Report time to answer a lobby page while tables keep changing.
+    Every request follows a status update of a random table, like a busy
+    lobby. "rebuild" sorts and serializes the page from all tables per
+    request, as a handler without the index would.
+    Usage: python -m benchmarks.lobby_bench [requests]
+"""
+import json
+import random
+import sys
+import time
+
+import pypokergui.server.lobby as Lobby
+
+def gen_status(table_id, hand_count=0):
+    return { "table_id": table_id, "port": 8000 + table_id, "players": ["ai-%d" % idx for idx in range(6)],
+            "small_blind": 5, "ante": 0, "max_round": 100, "status": "playing",
+            "hand_count": hand_count, "game_count": 1 }
+
+def bench_index(table_num, request_num, limit=Lobby.DEFAULT_PAGE_SIZE):
+    lobby = Lobby.LobbyIndex()
+    for table_id in range(table_num):
+        lobby.update_table(gen_status(table_id))
+    start = time.time()
+    for hand_count in range(request_num):
+        lobby.update_table(gen_status(random.randrange(table_num), hand_count))
+        lobby.get_page(limit * random.randrange(max(1, table_num // limit)), limit)
+    return (time.time() - start) / request_num
+
+def bench_rebuild(table_num, request_num, limit=Lobby.DEFAULT_PAGE_SIZE):
+    tables = { table_id: gen_status(table_id) for table_id in range(table_num) }
+    start = time.time()
+    for hand_count in range(request_num):
+        table_id = random.randrange(table_num)
+        tables[table_id] = gen_status(table_id, hand_count)
+        offset = limit * random.randrange(max(1, table_num // limit))
+        page = [tables[key] for key in sorted(tables)][offset:offset + limit]
+        json.dumps({ "tables": page, "total": len(tables), "offset": offset, "limit": limit })
+    return (time.time() - start) / request_num
+
+def main():
+    request_num = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print("%8s %14s %14s" % ("tables", "index (us)", "rebuild (us)"))
+    for table_num in [10, 100, 1000, 10000]:
+        print("%8d %14.1f %14.1f" % (table_num, 1e6 * bench_index(table_num, request_num),
+            1e6 * bench_rebuild(table_num, request_num)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Report time of range_equity by street, next to the Monte Carlo estimate
+    of pypokerengine nobot used before (hand against a random hand).
+    Usage: python -m benchmarks.range_equity_bench [processes]
+"""
+import sys
+import time
+
+from pypokerengine.utils.card_utils import gen_cards, estimate_hole_card_win_rate
+
+import pypokergui.utils.range_equity as RE
+
+HOLE = ["HA", "HK"]
+BOARDS = [("preflop", []), ("flop", ["S2", "D7", "CT"]), ("turn", ["S2", "D7", "CT", "H9"]),
+        ("river", ["S2", "D7", "CT", "H9", "S4"])]
+HERO_RANGE, VILLAIN_RANGE = "TT+,AQs+,AK", "22+,A2s+,K9s+,QTs+,JTs,ATo+,KJo+"
+
+def timed(func):
+    start = time.time()
+    result = func()
+    return result, 1000 * (time.time() - start)
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    hero, villain = RE.parse_range(HERO_RANGE), RE.parse_range(VILLAIN_RANGE)
+    print("%-8s %-24s %-28s %-28s %s" % ("street", "pypokerengine 1000 sims", "estimate_equity",
+        "hand vs random range", "range vs range"))
+    for street, board in BOARDS:
+        estimate, engine_ms = timed(lambda: estimate_hole_card_win_rate(1000, 2, gen_cards(HOLE), gen_cards(board)))
+        (adaptive, exact), adaptive_ms = timed(lambda: RE.estimate_equity(HOLE, board))
+        equity, hand_ms = timed(lambda: RE.equity(RE.hand_range(HOLE), RE.random_range(), board, processes=processes))
+        _, cached_ms = timed(lambda: RE.equity(RE.hand_range(HOLE), RE.random_range(), board, processes=processes))
+        range_equity, range_ms = timed(lambda: RE.equity(hero, villain, board, processes=processes))
+        print("%-8s %.3f in %7.1f ms      %.3f in %7.1f ms %-7s %.3f in %7.1f ms (%6.1f)  %.3f in %7.1f ms" % (
+            street, estimate, engine_ms, adaptive, adaptive_ms, "exact" if exact else "sampled",
+            equity, hand_ms, cached_ms, range_equity, range_ms))
+    print("(in parentheses: same query again, complete boards are cached)")
+
+if __name__ == "__main__":
+    main()
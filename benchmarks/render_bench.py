@@ -0,0 +1,63 @@
+"""Report time to render game updates for browsers, by message type.
+    Updates are recorded from games between AI players and then rendered
+    repeatedly with the real templates and a handler of the application.
+    Usage: python -m benchmarks.render_bench [games] [repeat]
+"""
+import sys
+import time
+
+import pypokergui.server.game_manager as GM
+import pypokergui.server.message_manager as MM
+
+from benchmarks.broadcast_bench import AI_SCRIPT, gen_handler
+
+class HoleCardHolder(object):
+
+    def __init__(self, hole_cards):
+        self.hole_cards = hole_cards
+
+def record_updates(game_num, player_num=6):
+    """Return list of (game_update, hole cards known when it was sent)"""
+    game_manager = GM.GameManager()
+    game_manager.define_rule(10, 100, 5, 0, None)
+    for idx in range(player_num):
+        game_manager.join_ai_player("ai-%d" % idx, AI_SCRIPT)
+    records, hole_cards = [], {}
+    for _ in range(game_num):
+        game_manager.start_next_game()
+        while True:
+            for game_update in game_manager.latest_updates:
+                if game_update.hole_card is not None:
+                    hole_cards[str(game_update.destination)] = game_update.hole_card
+                records.append((game_update, dict(hole_cards)))
+                if 'round_result_message' == game_update.message_type: hole_cards = {}
+            if not game_manager.is_playing_poker: break
+            action, amount = game_manager.ask_action_to_ai_player(game_manager.next_player_uuid)
+            game_manager.update_game(action, amount)
+    return records
+
+def bench_render(handler, records, repeat):
+    elapsed = {}
+    for _ in range(repeat):
+        for game_update, hole_cards in records:
+            start = time.time()
+            MM._gen_game_update_message(handler, game_update, HoleCardHolder(hole_cards))
+            message_type = game_update.message_type
+            elapsed.setdefault(message_type, []).append(time.time() - start)
+    return elapsed
+
+def main():
+    game_num = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    handler = gen_handler()
+    records = record_updates(game_num)
+    bench_render(handler, records, 1)  # compile templates
+    elapsed = bench_render(handler, records, repeat)
+    total = sum([sum(times) for times in elapsed.values()])
+    count = sum([len(times) for times in elapsed.values()])
+    for message_type, times in sorted(elapsed.items()):
+        print("%-22s: %8.1f us (%d renders)" % (message_type, 1e6 * sum(times) / len(times), len(times)))
+    print("%-22s: %8.1f us (%d renders)" % ("all", 1e6 * total / count, count))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Report startup time of the CLI commands.
+    Every command line runs in a new python process, like a user would start
+    it, and the median wall time of the runs is printed with the heavy modules
+    (tornado, numpy, pypokerengine) the command imported. "import" lines show
+    the modules a command imports when it runs, and "load_config" the parse
+    of the config which serve does once.
+    Usage: python -m benchmarks.startup_bench [runs] [config path]
+"""
+import os
+import subprocess
+import sys
+import time
+
+import pypokergui.config_builder as Config
+
+HEAVY_MODULES = ["tornado", "numpy", "pypokerengine"]
+
+COMMANDS = [
+        ("python", []),
+        ("--help", ["-m", "pypokergui", "--help"]),
+        ("build_config", ["-m", "pypokergui", "build_config"]),
+        ("import server", ["-c", "import pypokergui.server.poker"]),
+        ("import cluster", ["-c", "import pypokergui.server.cluster"]),
+        ("import ranking", ["-c", "import pypokergui.ranking"]),
+        ("import solver", ["-c", "import pypokergui.solver"]),
+        ]
+
+def run_time(args, run_num):
+    times = []
+    for _ in range(run_num):
+        start = time.time()
+        subprocess.run([sys.executable] + (args or ["-c", "pass"]), stdout=subprocess.DEVNULL, check=True)
+        times.append(time.time() - start)
+    return sorted(times)[len(times) // 2]
+
+def heavy_imports(args):
+    if not args: return []
+    # -X importtime lists every imported module on stderr
+    result = subprocess.run([sys.executable, "-X", "importtime"] + args,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    names = set(line.split("|")[-1].strip().split(".")[0] for line in result.stderr.splitlines())
+    return [name for name in HEAVY_MODULES if name in names]
+
+def main():
+    run_num = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    config_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.path.dirname(__file__), "..", "poker_conf.yaml")
+    print("%-16s %10s  %s" % ("command", "median", "heavy imports"))
+    for name, args in COMMANDS:
+        print("%-16s %8.0fms  %s" % (name, run_time(args, run_num) * 1000, ", ".join(heavy_imports(args)) or "-"))
+    start = time.time()
+    for _ in range(run_num):
+        Config.load_config(config_path)
+    print("%-16s %8.1fms" % ("load_config", (time.time() - start) / run_num * 1000))
+
+if __name__ == "__main__":
+    main()
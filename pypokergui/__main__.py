@@ -3,8 +3,7 @@
 import os
 import sys
 import argparse
-import webbrowser
-import yaml
+import contextlib
 
 # Path setup
 root = os.path.join(os.path.dirname(__file__), "..")
@@ -12,22 +11,104 @@ src = os.path.join(root, "pypokergui")
 sys.path.append(root)
 sys.path.append(src)
 
-from pypokergui.server.poker import start_server
-from pypokergui.config_builder import build_config
+import pypokergui.config_builder as Config
 
-def serve(config_path, port, speed):
+# Commands import their modules when they run (tornado, numpy, pypokerengine
+# take most of the startup), so "--help" and build_config start at once.
+
+def serve(config_path, port, speed, reload_interval, tables=1, open_browser=True):
     host = "localhost"
+    # compiled once here, the server and the forked tables share it
+    config = Config.check_ai_players(Config.load_config(config_path))
+    for player in config.ai_players:
+        if player.error is not None:
+            print("AI player [ %s ] cannot play till [ %s ] is fixed (%s)" % (player.name, player.path, player.error))
+
+    if open_browser:
+        import webbrowser
+        webbrowser.open(f"http://{host}:{port}")
+
+    if tables > 1:
+        from pypokergui.server.cluster import start_cluster
+        start_cluster(config, port, speed, tables, reload_interval)
+    else:
+        from pypokergui.server.poker import start_server
+        start_server(config, port, speed, reload_interval)
+
+def rank(config_path, delta, min_hands, max_hands, processes):
+    import pypokergui.ranking as Ranking
+    # pairings are played in the pool, so the scripts are checked in parallel too
+    config = Config.check_ai_players(Config.load_config(config_path), processes)
+    healthy_bots = Config.healthy_bots(config)
+    if len(healthy_bots) < 2:
+        print("At least 2 healthy AI players are needed to rank")
+        return
+
+    leaderboard, pairings = Ranking.rank_bots(healthy_bots, config.rules, delta_bb100=delta,
+            min_hands=min_hands, max_hands=max_hands, processes=processes)
+    for pairing in pairings:
+        print("%s vs %s : %s after %d hands (%.2f +/- %.2f bb/100)" % (
+            pairing["players"][0], pairing["players"][1], pairing["verdict"],
+            pairing["hands"], pairing["bb100"], pairing["ci95"]))
+    print(Ranking.format_leaderboard(leaderboard))
 
-    # Open browser
-    webbrowser.open(f"http://{host}:{port}")
+def ladder(config_path, games, max_hands, output):
+    import pypokergui.ladder as Ladder
+    # stdout only carries the results, messages and prints of the bots go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        config = Config.check_ai_players(Config.load_config(config_path))
+    healthy_bots = Config.healthy_bots(config, log=lambda message: print(message, file=sys.stderr))
+    if len(healthy_bots) < 2:
+        print("At least 2 healthy AI players are needed for a ladder", file=sys.stderr)
+        return
+    events = Ladder.iter_ladder(healthy_bots, config.rules, games, max_hands)
+    if output == "-":
+        out = sys.stdout
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                Ladder.write_jsonl(events, out)
+        except BrokenPipeError:
+            # reader of the pipe is gone (ex. head), stop quietly
+            sys.stdout = None
+    else:
+        with open(output, "w") as f:
+            Ladder.write_jsonl(events, f)
 
-    # Load YAML config
-    with open(config_path, "r", encoding="utf-8", errors="ignore") as f:
-        raw_data = f.read()
-        clean_data = raw_data.replace("\x00", "")  # null characters in string form
-        config = yaml.safe_load(clean_data)
+def tournament(config_path, entrants, table_size, hands_per_session, max_hands, processes, top):
+    import pypokergui.engine_wrapper as Engine
+    import pypokergui.tournament as Tournament
+    # tables are played in the pool, so the scripts are checked in parallel too
+    config = Config.check_ai_players(Config.load_config(config_path), processes)
+    bots = Config.healthy_bots(config)
+    if not bots:
+        print("At least 1 healthy AI player is needed for a tournament")
+        return
+    entrants = entrants or len(bots)
+    # fill the entrants by cycling the AI players of the config
+    players = [("%s#%d" % (bots[i % len(bots)][0], i // len(bots) + 1), bots[i % len(bots)][1])
+            for i in range(entrants)]
+    rules = config.rules
+    game = Tournament.Tournament(players, rules.initial_stack, rules.small_blind, rules.ante,
+            Engine.gen_rule_info(rules)['blind_structure'], table_size, hands_per_session, max_hands)
+    standings = game.play(processes)
+    print("%-6s %-24s %8s %10s" % ("place", "name", "stack", "out_hand"))
+    for entrant in standings[:top]:
+        eliminated_hand = entrant["eliminated_hand"] if entrant["eliminated_hand"] is not None else "-"
+        print("%-6d %-24s %8d %10s" % (entrant["place"], entrant["name"], entrant["stack"], eliminated_hand))
 
-    start_server(config_path, port, speed)
+def solve(config_path, players, iterations, buckets, limit, max_raises, processes, checkpoint_dir, bot_path,
+        card_buckets=None):
+    import pypokergui.solver as Solver
+    config = Config.load_config(config_path)
+    buckets = buckets or Solver.BUCKET_NUM
+    if Solver.has_checkpoint(checkpoint_dir):
+        print("Resume training of [ %s ] (abstraction of the checkpoint is kept)" % checkpoint_dir)
+    else:
+        Solver.create_checkpoint(checkpoint_dir, config.rules, players, buckets, limit=limit, max_raises=max_raises,
+                card_buckets=card_buckets)
+    meta = Solver.train(checkpoint_dir, iterations, processes, log=print)
+    Solver.write_bot(checkpoint_dir, bot_path)
+    print("%d iterations in [ %s ], setup_ai script written to [ %s ]" % (meta["iterations"], checkpoint_dir, bot_path))
 
 def main():
     parser = argparse.ArgumentParser(description="PyPokerGUI CLI (no click)")
@@ -38,6 +119,9 @@ def main():
     serve_parser.add_argument("config", help="Path to config YAML file")
     serve_parser.add_argument("--port", type=int, default=8000, help="Port to run server on")
     serve_parser.add_argument("--speed", choices=["dev", "slow", "moderate", "fast"], default="moderate", help="Game speed")
+    serve_parser.add_argument("--reload_interval", type=float, default=1.0, help="Seconds between checks of modified AI scripts (0 to disable)")
+    serve_parser.add_argument("--tables", type=int, default=1, help="Number of tables, served by one process each (lobby on --port, tables on the next ports)")
+    serve_parser.add_argument("--no-browser", action="store_true", help="Do not open a browser tab (ex. remote or headless servers)")
 
     # Build config command
     build_parser = subparsers.add_parser("build_config", help="Build a new poker config YAML")
@@ -46,12 +130,61 @@ def main():
     build_parser.add_argument("-b", "--small_blind", type=int, default=5, help="Small blind amount")
     build_parser.add_argument("-a", "--ante", type=int, default=0, help="Ante amount")
 
+    # Rank command
+    rank_parser = subparsers.add_parser("rank", help="Rank AI players by head-up matches")
+    rank_parser.add_argument("config", help="Path to config YAML file")
+    rank_parser.add_argument("--delta", type=float, default=10, help="Win-rate difference (bb/100) the sequential test should detect")
+    rank_parser.add_argument("--min_hands", type=int, default=100, help="Minimum hands played per pairing")
+    rank_parser.add_argument("--max_hands", type=int, default=5000, help="Maximum hands played per pairing")
+    rank_parser.add_argument("-p", "--processes", type=int, default=1, help="Number of pairings played in parallel")
+
+    # Ladder command
+    ladder_parser = subparsers.add_parser("ladder", help="Play every pairing of AI players and stream results as JSON lines")
+    ladder_parser.add_argument("config", help="Path to config YAML file")
+    ladder_parser.add_argument("-g", "--games", type=int, default=10, help="Games per pairing, seats swapped every game")
+    ladder_parser.add_argument("--max_hands", type=int, default=None, help="Stop after this many hands in total")
+    ladder_parser.add_argument("-o", "--output", default="-", help="Path of the JSONL file (default stdout)")
+
+    # Tournament command
+    tournament_parser = subparsers.add_parser("tournament", help="Run a multi-table tournament between AI players")
+    tournament_parser.add_argument("config", help="Path to config YAML file")
+    tournament_parser.add_argument("-e", "--entrants", type=int, default=None, help="Number of entrants (AI players of config are repeated)")
+    tournament_parser.add_argument("-t", "--table_size", type=int, default=9, help="Maximum players per table")
+    tournament_parser.add_argument("--hands_per_session", type=int, default=10, help="Hands played between table balancing")
+    tournament_parser.add_argument("--max_hands", type=int, default=1000, help="Hands after which remaining players are ranked by stack")
+    tournament_parser.add_argument("-p", "--processes", type=int, default=1, help="Number of tables played in parallel")
+    tournament_parser.add_argument("--top", type=int, default=20, help="Number of places to print")
+
+    # Solve command
+    solve_parser = subparsers.add_parser("solve", help="Train a CFR bot on an abstraction of the config rules")
+    solve_parser.add_argument("config", help="Path to config YAML file")
+    solve_parser.add_argument("--players", type=int, default=2, help="Number of players of the abstract game")
+    solve_parser.add_argument("--iterations", type=int, default=20000, help="Training iterations to run")
+    solve_parser.add_argument("--buckets", type=int, default=None, help="Hand strength buckets per street (default of pypokergui.solver)")
+    solve_parser.add_argument("--limit", action="store_true", help="Bet fixed sizes instead of pot fractions and all-in")
+    solve_parser.add_argument("--max_raises", type=int, default=None, help="Raises per street (default 2, 3 with --limit)")
+    solve_parser.add_argument("--card_buckets", default=None,
+            help="Directory of pypokergui.utils.card_buckets tables used instead of --buckets")
+    solve_parser.add_argument("-p", "--processes", type=int, default=1, help="Number of processes traversing the tree")
+    solve_parser.add_argument("--checkpoint", default="solver_checkpoint", help="Directory of the tables, resumed if it exists")
+    solve_parser.add_argument("--bot", default="submission/cfr_bot.py", help="Path of the generated setup_ai script")
+
     args = parser.parse_args()
 
     if args.command == "serve":
-        serve(args.config, args.port, args.speed)
+        serve(args.config, args.port, args.speed, args.reload_interval, args.tables, not args.no_browser)
     elif args.command == "build_config":
-        build_config(args.maxround, args.stack, args.small_blind, args.ante, None)
+        Config.build_config(args.maxround, args.stack, args.small_blind, args.ante, None)
+    elif args.command == "rank":
+        rank(args.config, args.delta, args.min_hands, args.max_hands, args.processes)
+    elif args.command == "ladder":
+        ladder(args.config, args.games, args.max_hands, args.output)
+    elif args.command == "tournament":
+        tournament(args.config, args.entrants, args.table_size, args.hands_per_session,
+                args.max_hands, args.processes, args.top)
+    elif args.command == "solve":
+        solve(args.config, args.players, args.iterations, args.buckets, args.limit, args.max_raises,
+                args.processes, args.checkpoint, args.bot, args.card_buckets)
     else:
         parser.print_help()
 
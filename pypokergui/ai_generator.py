@@ -1,42 +1,127 @@
 import os
 import sys
-import importlib
+import importlib.util
 
 from pypokerengine.players import BasePokerPlayer
 
 """Assert passed script satisfies requirements for PyPokerGUI
     ai-generator script must implement "setup_ai()" method which
     returns child instance of pypokerengine.players.BasePokerPlayer.
+    Scripts are imported and checked once per (resolved path, mtime), so
+    building many seats from the same script only calls its "setup_ai".
+    Every import of a script gets its own module name, so a modified script
+    is re-imported without touching the players built from older versions.
 """
 def healthcheck(script_path, quiet=False):
-    status = True
+    error = find_script_error(script_path)
+    if not quiet:
+        print(error if error else "health check succeeded for script of [ %s ]" % script_path)
+    return error is None
 
+def find_script_error(script_path):
+    """Return why the script is not a valid ai-generator script, None if it is"""
+    return _load_script(script_path)[1]
+
+def load_setup_method(script_path, pinned=False):
+    """Return validated "setup_ai" method of the script.
+        Pinned scripts keep the version which was loaded first with pinned=True.
+    """
+    path = os.path.realpath(script_path)
+    if pinned and path in _pinned_scripts:
+        return _pinned_scripts[path]
+    setup_method, error = _load_script(script_path)
+    if error:
+        raise Exception("Failed to setup ai from [ %s ] (%s)" % (script_path, error))
+    if pinned:
+        _pinned_scripts[path] = setup_method
+        _pinned_modules.add(_script_modules[path])
+    return setup_method
+
+def find_modified_scripts(script_paths):
+    """Return loaded scripts whose file was modified after their last import"""
+    modified = []
+    for script_path in script_paths:
+        path = os.path.realpath(script_path)
+        if path not in _loaded_scripts or script_path in modified: continue
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        if mtime != _loaded_scripts[path][0]: modified.append(script_path)
+    return modified
+
+def clear_cache():
+    for module_name in _script_modules.values():
+        sys.modules.pop(module_name, None)
+    for module_name in _pinned_modules:
+        sys.modules.pop(module_name, None)
+    _loaded_scripts.clear()
+    _pinned_scripts.clear()
+    _script_modules.clear()
+    _pinned_modules.clear()
+
+# { resolved path: (mtime, setup_method, error) }
+_loaded_scripts = {}
+# { resolved path: setup_method }
+_pinned_scripts = {}
+# { resolved path: module name of its latest import }
+_script_modules = {}
+# module names of pinned versions, kept in sys.modules while the server runs
+_pinned_modules = set()
+_import_count = [0]
+
+def _load_script(script_path):
+    path = os.path.realpath(script_path)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError as e:
+        _loaded_scripts[path] = (None, None, None)  # watched till the script comes back
+        return None, '"setup_ai" method was not found in [ %s ].(Exception=%s)' % (script_path, e)
+    cached = _loaded_scripts.get(path)
+    if cached is None or cached[0] != mtime:
+        setup_method, error = _validate(path)
+        _loaded_scripts[path] = (mtime, setup_method, error)
+    return _loaded_scripts[path][1:]
+
+def _validate(script_path):
     # Assertion-1. check if setup_ai method is implemented
     try:
         setup_method = _import_setup_method(script_path)
     except Exception as e:
-        if not quiet: print('"setup_ai" method was not found in [ %s ].(Exception=%s)' % (script_path, e.message))
-        status = False
+        return None, '"setup_ai" method was not found in [ %s ].(Exception=%s)' % (script_path, e)
 
     # Assertion-2. check if "setup_ai" method works
     try:
-        if status: player = setup_method()
+        player = setup_method()
     except Exception as e:
-        if not quiet: print('Exception [ %s ] was raised when your "setup_ai" method invoked' % e.message)
-        status = False
+        return None, 'Exception [ %s ] was raised when your "setup_ai" method invoked' % e
 
     # Assertion-3. check if generated player is instance of BasePokerPlayer
-    if status and not isinstance(player, BasePokerPlayer):
-        if not quiet: print("Generated player is not instance of [ BasePokerPlayer ] but of [ %s ]" % type(player).__name__)
-        status = False
+    if not isinstance(player, BasePokerPlayer):
+        return None, "Generated player is not instance of [ BasePokerPlayer ] but of [ %s ]" % type(player).__name__
 
-    if status and not quiet: print("health check succeeded for script of [ %s ]" % script_path)
-    return status
+    return setup_method, None
 
 def _import_setup_method(script_path):
     dirname = os.path.dirname(script_path)
     filename = os.path.basename(script_path)
-    sys.path.append(dirname)
-    m = importlib.import_module(os.path.splitext(filename)[0])
-    return m.setup_ai
-
+    # scripts may import modules placed next to them
+    if dirname not in sys.path: sys.path.append(dirname)
+    _import_count[0] += 1
+    module_name = "_pypokergui_ai_%s_%d" % (os.path.splitext(filename)[0], _import_count[0])
+    spec = importlib.util.spec_from_file_location(module_name, script_path)
+    m = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = m
+    try:
+        spec.loader.exec_module(m)
+        setup_ai = m.setup_ai
+    except Exception:
+        # a broken edit leaves the previous version in place
+        sys.modules.pop(module_name, None)
+        raise
+    # the previous version is not loaded again, players built from it keep its globals alive by themselves
+    superseded = _script_modules.get(script_path)
+    if superseded and superseded not in _pinned_modules:
+        sys.modules.pop(superseded, None)
+    _script_modules[script_path] = module_name
+    return setup_ai
@@ -1,5 +1,23 @@
+import multiprocessing
+import os
+from collections import namedtuple
+
 import yaml
 
+"""Build and load the config of the server and the CLI commands.
+    load_config() checks the whole file at once and compiles it into an
+    immutable GameConfig. Its "rules" is the GameRules of engine_wrapper,
+    blind levels included, which every table and game of the config shares.
+    check_ai_players() runs the healthchecks of the AI scripts, in parallel
+    when asked, and records why a script is not ready.
+"""
+
+RULE_KEYS = ["max_round", "initial_stack", "small_blind", "ante", "blind_structure"]
+
+GameConfig = namedtuple("GameConfig", ["rules", "ai_players", "auto_rematch", "fast_forward", "seat_hold_timeout"])
+# "error" is None while the script exists and its healthcheck has not run or has succeeded
+AIPlayer = namedtuple("AIPlayer", ["name", "path", "pin", "error"])
+
 def build_config(max_round=None, initial_stack=None, small_blind=None, ante=None, blind_structure=None):
     config = {
             "max_round": max_round,
@@ -13,3 +31,81 @@ def build_config(max_round=None, initial_stack=None, small_blind=None, ante=None
             }
     print(yaml.dump(config, default_flow_style=False))
 
+def load_config(config_path):
+    """Parse the config file once and compile it, the commands and servers share the result.
+        Read as bytes, so yaml detects utf-16 files (like the poker_conf.yaml of the repo) by their BOM.
+    """
+    with open(config_path, "rb") as f:
+        config = yaml.load(f, Loader=yaml.SafeLoader)
+    return compile_config(config, config_path)
+
+def compile_config(config, config_path="config"):
+    """Check every key of the parsed config and return a GameConfig.
+        All the problems found are raised together in one Exception.
+    """
+    # the engine imports pypokerengine, which commands like build_config do not need
+    import pypokergui.engine_wrapper as Engine
+    if not isinstance(config, dict):
+        raise Exception("Config [ %s ] is not a mapping of keys" % config_path)
+    errors = []
+    missing = [key for key in RULE_KEYS + ["ai_players"] if key not in config]
+    if missing:
+        errors.append("misses keys %s" % missing)
+    else:
+        errors += Engine.find_rule_errors(*[config[key] for key in RULE_KEYS])
+    for key in ["auto_rematch", "fast_forward"]:
+        if not isinstance(config.get(key, False), bool):
+            errors.append("%s must be true or false but was %r" % (key, config[key]))
+    seat_hold_timeout = config.get("seat_hold_timeout", 60)
+    if isinstance(seat_hold_timeout, bool) or not isinstance(seat_hold_timeout, (int, float)) or seat_hold_timeout < 0:
+        errors.append("seat_hold_timeout must be seconds >= 0 but was %r" % (seat_hold_timeout,))
+    ai_players, player_errors = _compile_ai_players(config.get("ai_players"))
+    errors += player_errors
+    if errors:
+        raise Exception("Invalid config [ %s ] :\n  %s" % (config_path, "\n  ".join(errors)))
+    rules = Engine.gen_game_config(*[config[key] for key in RULE_KEYS])
+    return GameConfig(rules, ai_players, config.get("auto_rematch", False), config.get("fast_forward", False),
+            seat_hold_timeout)
+
+def _compile_ai_players(players):
+    if players is None: return (), []
+    if not isinstance(players, list):
+        return (), ["ai_players must be a list of name and path but was %r" % (players,)]
+    ai_players, errors = [], []
+    for player in players:
+        if not isinstance(player, dict) or not isinstance(player.get("name"), str) \
+                or not isinstance(player.get("path"), str):
+            errors.append("AI player [ %r ] needs a name and a path" % (player,))
+        elif not isinstance(player.get("pin", False), bool):
+            errors.append("pin of AI player [ %s ] must be true or false" % player["name"])
+        else:
+            # not fatal, the server waits for scripts which are written later (like submission/mybot.py)
+            error = None if os.path.isfile(player["path"]) else "script [ %s ] does not exist" % player["path"]
+            ai_players.append(AIPlayer(player["name"], player["path"], player.get("pin", False), error))
+    return tuple(ai_players), errors
+
+def check_ai_players(config, processes=1):
+    """Return the config with the healthcheck error of every AI player.
+        Each script is checked once. With processes > 1 they are imported in a pool,
+        otherwise here, so this process (and tables forked from it) keeps them loaded.
+    """
+    # imported here for the same reason as the engine
+    import pypokergui.ai_generator as AG
+    paths = sorted(set(player.path for player in config.ai_players if os.path.isfile(player.path)))
+    if processes > 1 and len(paths) > 1:
+        pool = multiprocessing.Pool(min(processes, len(paths)))
+        try:
+            errors = dict(zip(paths, pool.map(AG.find_script_error, paths)))
+        finally:
+            pool.close()
+    else:
+        errors = { path: AG.find_script_error(path) for path in paths }
+    return config._replace(ai_players=tuple(player._replace(error=errors.get(player.path, player.error))
+        for player in config.ai_players))
+
+def healthy_bots(config, log=print):
+    """Return (name, path) of the AI players whose healthcheck succeeded, logging the others"""
+    for player in config.ai_players:
+        if player.error is not None:
+            log("Skip [ %s ] because health check of [ %s ] failed (%s)" % (player.name, player.path, player.error))
+    return [(player.name, player.path) for player in config.ai_players if player.error is None]
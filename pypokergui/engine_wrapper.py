@@ -1,4 +1,4 @@
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 
 from pypokerengine.engine.table import Table
 from pypokerengine.engine.player import Player
@@ -6,38 +6,69 @@ from pypokerengine.engine.round_manager import RoundManager
 from pypokerengine.engine.message_builder import MessageBuilder
 from pypokerengine.engine.poker_constants import PokerConstants as Const
 
+RULE_FIELDS = ["max_round", "initial_stack", "small_blind", "ante", "blind_structure"]
+
+class GameRules(namedtuple("GameRules", RULE_FIELDS + ["blind_levels"])):
+    """Immutable rule of a game, built by gen_game_config().
+        "blind_structure" is a tuple of (round_count, small_blind, ante) sorted by
+        round count, gen_rule_info() turns it back into the dict players receive.
+        "blind_levels" is the (small_blind, ante) of each round count, compiled
+        once, so a rule is shared by any number of games and tables.
+        Fields are also read like keys of a dict (rule["max_round"], rule.get("ante")).
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if not isinstance(key, str): return tuple.__getitem__(self, key)
+        if key not in self._fields: raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+
 class EngineWrapper(object):
 
-    def start_game(self, players_info, game_config):
+    def __init__(self):
+        # counts decision points over games, so an action declared for an old one is detected
+        self.step = 0
+        # valid actions of the ask message of the current step (None after the game finished)
+        self.legal_actions = None
+
+    def start_game(self, players_info, game_config, initial_stacks=None):
         self.config = game_config
+        self.blind_levels = game_config.blind_levels
+        if not initial_stacks: initial_stacks = {}
         # setup table
         table = Table()
         for uuid, name in players_info.items():
-            player = Player(uuid, game_config['initial_stack'], name)
+            player = Player(uuid, initial_stacks.get(uuid, game_config['initial_stack']), name)
             table.seats.sitdown(player)
         # start the first round
-        state, msgs = self._start_new_round(1, game_config['blind_structure'], table)
-        self.current_state = state
-        return _parse_broadcast_destination(msgs, self.current_state['table'])
+        state, msgs = self._start_new_round(1, table)
+        return self._set_step(state, msgs)
 
     def update_game(self, action, bet_amount):
         state, msgs = RoundManager.apply_action(self.current_state, action, bet_amount)
         if state['street'] == Const.Street.FINISHED:
-            state, new_msgs = self._start_next_round(
-                    state['round_count']+1, self.config['blind_structure'], state['table'])
+            state, new_msgs = self._start_next_round(state['round_count']+1, state['table'])
             msgs += new_msgs
+        return self._set_step(state, msgs)
+
+    def _set_step(self, state, msgs):
         self.current_state = state
+        self.step += 1
+        self.legal_actions = _fetch_legal_actions(msgs)
         return _parse_broadcast_destination(msgs, self.current_state['table'])
 
-    def _start_new_round(self, round_count, blind_structure, table):
+    def _start_new_round(self, round_count, table):
         # adjust btn position to put btn of player-0 after table.shift_dealer_btn()
         # which will be called in self._start_next_round(...)
         table.dealer_btn = len(table.seats.players)-1
-        return self._start_next_round(round_count, blind_structure, table)
+        return self._start_next_round(round_count, table)
 
-    def _start_next_round(self, round_count, blind_structure, table):
+    def _start_next_round(self, round_count, table):
         table.shift_dealer_btn()
-        small_blind, ante = _get_forced_bet_amount(round_count, blind_structure)
+        small_blind, ante = self.blind_levels[min(round_count, len(self.blind_levels)-1)]
         table = _exclude_short_of_money_players(table, ante, small_blind)
         if self._has_game_finished(round_count, table, self.config['max_round']):
             finished_state = { 'table': table }
@@ -53,34 +84,91 @@ class EngineWrapper(object):
         return is_final_round or is_winner_decided
 
 
+def correct_action(legal_actions, action, amount):
+    """Return (action, amount) to apply. Raise out of the legal range and unknown action become fold"""
+    if action == "call":
+        return "call", legal_actions[1]["amount"]
+    if action == "raise":
+        legal = legal_actions[2]["amount"]
+        if legal["min"] != -1 and legal["min"] <= amount <= legal["max"]:
+            return "raise", amount
+    return "fold", 0
+
+def _fetch_legal_actions(msgs):
+    # the engine asks the next player at the end of the step with legal actions
+    _uuid, last_message = msgs[-1]
+    if last_message['type'] == 'ask':
+        return last_message['message']['valid_actions']
+
 def gen_players_info(uuid_list, name_list):
     assert len(uuid_list) == len(name_list)
     return OrderedDict(zip(uuid_list, name_list))
 
 def gen_game_config(max_round, initial_stack, small_blind, ante, blind_structure=None):
-    assert max_round > 0
-    assert initial_stack > 0
-    assert small_blind > 0
-    assert ante >= 0
-    if not blind_structure:
-        blind_structure = { 1 : { 'small_blind': small_blind, 'ante': ante } }
-    if not 1 in blind_structure:
-        blind_structure[1] = { 'small_blind': small_blind, 'ante': ante }
+    """Check the rule and compile it into GameRules, so a bad rule fails here and not in the middle of a game"""
+    errors = find_rule_errors(max_round, initial_stack, small_blind, ante, blind_structure)
+    if errors:
+        raise Exception("Invalid rule (%s)" % ", ".join(errors))
+    # copied, the structure of the caller is left as it is
+    structure = { 1 : { 'small_blind': small_blind, 'ante': ante } }
+    for round_count, level in (blind_structure or {}).items():
+        structure[round_count] = { 'small_blind': level['small_blind'], 'ante': level['ante'] }
+    blind_levels = tuple(compile_blind_structure(structure, max_round))
+    levels = tuple((round_count, structure[round_count]['small_blind'], structure[round_count]['ante'])
+            for round_count in sorted(structure))
+    return GameRules(max_round, initial_stack, small_blind, ante, levels, blind_levels)
+
+def find_rule_errors(max_round, initial_stack, small_blind, ante, blind_structure=None):
+    """Return messages of every invalid value of the rule (empty when it is valid)"""
+    errors = []
+    for name, value, minimum in [("max_round", max_round, 1), ("initial_stack", initial_stack, 1),
+            ("small_blind", small_blind, 1), ("ante", ante, 0)]:
+        if not _is_int_at_least(value, minimum):
+            errors.append("%s must be an integer >= %d but was %r" % (name, minimum, value))
+    if blind_structure is None: return errors
+    if not isinstance(blind_structure, dict):
+        return errors + ["blind_structure must map round counts to levels but was %r" % (blind_structure,)]
+    for round_count, level in sorted(blind_structure.items(), key=lambda item: str(item[0])):
+        if not _is_int_at_least(round_count, 1):
+            errors.append("round count of blind_structure must be an integer >= 1 but was %r" % (round_count,))
+        if not isinstance(level, dict):
+            errors.append("level of round %r must have small_blind and ante but was %r" % (round_count, level))
+            continue
+        for name, minimum in [("small_blind", 1), ("ante", 0)]:
+            if not _is_int_at_least(level.get(name), minimum):
+                errors.append("%s of round %r must be an integer >= %d but was %r" % (
+                    name, round_count, minimum, level.get(name)))
+    return errors
+
+def _is_int_at_least(value, minimum):
+    # bool is an int for python, but "true" is not an amount
+    return isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+
+def gen_rule_info(rule):
+    """Return the rule like pypokerengine gives it to players, with a blind structure dict of its own"""
     return {
-            'max_round': max_round,
-            'initial_stack': initial_stack,
-            'small_blind': small_blind,
-            'ante': ante,
-            'blind_structure': blind_structure
+            'initial_stack': rule['initial_stack'],
+            'max_round': rule['max_round'],
+            'small_blind_amount': rule['small_blind'],  # fill an interface gap
+            'ante': rule['ante'],
+            'blind_structure': { round_count: { 'small_blind': small_blind, 'ante': ante }
+                for round_count, small_blind, ante in rule['blind_structure'] }
             }
 
-def _get_forced_bet_amount(round_count, blind_structure):
+def compile_blind_structure(blind_structure, max_round):
+    """Expand blind structure into list of (small_blind, ante) indexed by round count
+        so that forced bet amount of each round is looked up in constant time.
+    """
     level_thresholds = sorted(blind_structure.keys())
-    current_level_pos = [r <= round_count for r in level_thresholds].count(True)-1
-    assert current_level_pos >= 0
-    current_level_key = level_thresholds[current_level_pos]
-    current_structure = blind_structure[current_level_key]
-    return current_structure['small_blind'], current_structure['ante']
+    assert level_thresholds[0] <= 1
+    levels = []
+    current_level_pos = 0
+    for round_count in range(max_round+1):
+        while current_level_pos+1 < len(level_thresholds) and level_thresholds[current_level_pos+1] <= round_count:
+            current_level_pos += 1
+        current_structure = blind_structure[level_thresholds[current_level_pos]]
+        levels.append((current_structure['small_blind'], current_structure['ante']))
+    return levels
 
 def _exclude_short_of_money_players(table, ante, sb_amount):
     sb_pos, bb_pos = _steal_money_from_poor_player(table, ante, sb_amount)
@@ -134,14 +222,7 @@ def _parse_broadcast_destination(messages, table):
     return parsed_msgs
 
 def _gen_game_result_message(table, config):
-    compat_config = {
-            'initial_stack': config['initial_stack'],
-            'max_round': config['max_round'],
-            'small_blind_amount': config['small_blind'],  # fill an interface gap
-            'ante': config['ante'],
-            'blind_structure': config['blind_structure']
-            }
-    msg = MessageBuilder.build_game_result_message(compat_config, table.seats)
+    msg = MessageBuilder.build_game_result_message(gen_rule_info(config), table.seats)
     destination = -1
     return (destination, msg)
 
@@ -0,0 +1,76 @@
+import collections
+import itertools
+import json
+
+import pypokergui.simulator as Sim
+
+"""Headless ladder of AI players streaming results as JSON lines.
+    Every pairing of the bots plays head-up games, seats swapped every game.
+    iter_ladder() yields an event per finished hand and per finished game as
+    they happen, keyed by bot names ("Name#n" when a name is seated more than
+    once, like the entrants of a tournament), and keeps nothing else, so a ladder of
+    millions of hands runs in constant memory and can be piped into other
+    tools while it runs. Bots are built once per pairing and seat.
+"""
+
+def iter_ladder(bots, rule, games_per_pairing, max_hands=None):
+    """Yield "hand" and "game" events of the (name, path) bots, then a "pairing" event per pairing.
+        Stops after "max_hands" hands in total when given.
+    """
+    bots = _gen_unique_names(bots)
+    hand_num = 0
+    for pairing, (bot_a, bot_b) in enumerate(itertools.combinations(bots, 2)):
+        game_managers = [Sim.setup_game_manager(rule, [bot_a, bot_b]), Sim.setup_game_manager(rule, [bot_b, bot_a])]
+        totals = { "type": "pairing", "pairing": pairing, "players": [bot_a[0], bot_b[0]],
+                "games": 0, "hands": 0, "wins": { bot_a[0]: 0, bot_b[0]: 0 } }
+        for game in range(games_per_pairing):
+            if max_hands is not None and hand_num >= max_hands: break
+            game_manager = game_managers[game % 2]
+            names = { member["uuid"]: member["name"] for member in game_manager.members_info }
+            for event in Sim.play_game(game_manager):
+                yield _gen_event(event, names, pairing, game)
+                if event["type"] == "game":
+                    totals["games"] += 1
+                    totals["wins"][names[event["winner"]]] += 1
+                    continue
+                totals["hands"] += 1
+                hand_num += 1
+                if max_hands is not None and hand_num >= max_hands: break
+        yield totals
+        if max_hands is not None and hand_num >= max_hands: return
+
+def write_jsonl(events, f):
+    """Write events one per line as they come, return the number of lines"""
+    line_num = 0
+    for event in events:
+        f.write(json.dumps(event, sort_keys=True) + "\n")
+        f.flush()  # readers of a pipe see every hand as soon as it is played
+        line_num += 1
+    return line_num
+
+def _gen_unique_names(bots):
+    # wins and stacks of the same script seated twice must not be merged
+    counts = collections.Counter([name for name, _path in bots])
+    seen = collections.Counter()
+    unique = []
+    for name, path in bots:
+        if counts[name] > 1:
+            seen[name] += 1
+            name = "%s#%d" % (name, seen[name])
+        unique.append((name, path))
+    return unique
+
+def _gen_event(event, names, pairing, game):
+    named = {
+            "type": "hand" if event["type"] == "round" else "game",
+            "pairing": pairing,
+            "game": game,
+            "stacks": { names[uuid]: stack for uuid, stack in event["stacks"].items() },
+            "elapsed": round(event["elapsed"], 6)
+            }
+    if event["type"] == "round":
+        named["hand"] = event["round_count"]
+        named["winners"] = [names[uuid] for uuid in event["winners"]]
+    else:
+        named["winner"] = names[event["winner"]]
+    return named
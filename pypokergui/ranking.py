@@ -0,0 +1,173 @@
+import math
+import multiprocessing
+
+import pypokergui.simulator as Sim
+
+"""Rank AI setup scripts against each other by head-up matches.
+    Each pairing is played game after game until a sequential probability
+    ratio test (SPRT) on the win-rate decides which bot is stronger, so close
+    matchups get more hands than lopsided ones.
+    Win-rate is measured in big blinds per 100 hands (bb/100).
+"""
+
+ACCEPT_H1 = "H1"  # first bot of the pairing is stronger
+ACCEPT_H0 = "H0"  # second bot of the pairing is stronger
+INCONCLUSIVE = "inconclusive"
+
+DEFAULT_ELO = 1500
+Z_95 = 1.96
+
+class RunningStats(object):
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, value):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        if other.n == 0: return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def confidence_interval(self, z=Z_95):
+        return z * math.sqrt(self.variance() / self.n) if self.n > 1 else float("inf")
+
+class SPRT(object):
+    """Sequential test on the mean of per-hand winnings (in big blinds).
+        H0: mean = -delta, H1: mean = +delta.
+        The variance is estimated from the sample itself (generalized SPRT).
+    """
+
+    def __init__(self, delta, alpha=0.05, beta=0.05, min_hands=100):
+        assert delta > 0
+        self.delta = delta
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.min_hands = min_hands
+
+    def llr(self, stats):
+        variance = stats.variance()
+        if variance == 0: return 0.0
+        return 2 * self.delta * stats.n * stats.mean / variance
+
+    def status(self, stats):
+        if stats.n < self.min_hands: return None
+        llr = self.llr(stats)
+        if llr >= self.upper: return ACCEPT_H1
+        if llr <= self.lower: return ACCEPT_H0
+        return None
+
+def play_pairing(bot_a, bot_b, rule, sprt, max_hands):
+    """Play head-up games between two (name, path) bots till SPRT decides.
+        Seats are swapped every game to cancel the positional advantage.
+        Returns winnings of bot_a per hand in big blinds as RunningStats,
+        each hand measured in the big blind of its blind level.
+    """
+    stats = RunningStats()
+    verdict = None
+    game_count = 0
+    game_managers = [Sim.setup_game_manager(rule, [bot_a, bot_b]), Sim.setup_game_manager(rule, [bot_b, bot_a])]
+    blind_levels = game_managers[0].rule.blind_levels
+    while verdict is None and stats.n < max_hands:
+        a_uuid = str(game_count % 2)
+        game_manager = game_managers[game_count % 2]
+        prev_stack = rule['initial_stack']
+        for event in Sim.play_game(game_manager):
+            if event['type'] != 'round': continue
+            stack = event['stacks'][a_uuid]
+            big_blind = blind_levels[event['round_count']][0] * 2
+            stats.push((stack - prev_stack) / big_blind)
+            prev_stack = stack
+            verdict = sprt.status(stats)
+            if verdict or stats.n >= max_hands: break
+        game_count += 1
+    return stats, verdict or INCONCLUSIVE
+
+def _play_pairing_job(args):
+    (idx_a, bot_a), (idx_b, bot_b), rule, sprt, max_hands = args
+    stats, verdict = play_pairing(bot_a, bot_b, rule, sprt, max_hands)
+    return idx_a, idx_b, stats, verdict
+
+def expected_score(rating_a, rating_b):
+    return 1.0 / (1 + 10 ** ((rating_b - rating_a) / 400.0))
+
+def update_elo(rating_a, rating_b, score_a, k_factor=32):
+    gain = k_factor * (score_a - expected_score(rating_a, rating_b))
+    return rating_a + gain, rating_b - gain
+
+def rank_bots(bots, rule, delta_bb100=10, alpha=0.05, beta=0.05,
+        min_hands=100, max_hands=5000, k_factor=32, processes=1):
+    """Play every pairing of the (name, path) bots and build a leaderboard.
+        A pairing decided by SPRT counts as a win, an undecided one as a draw.
+    """
+    sprt = SPRT(delta_bb100 / 100.0, alpha, beta, min_hands)
+    indexed = list(enumerate(bots))
+    jobs = [(a, b, rule, sprt, max_hands)
+            for i, a in enumerate(indexed) for b in indexed[i+1:]]
+    if processes > 1:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_play_pairing_job, jobs)
+        finally:
+            pool.close()
+    else:
+        results = [_play_pairing_job(job) for job in jobs]
+
+    ratings = [DEFAULT_ELO] * len(bots)
+    totals = [RunningStats() for _ in bots]
+    pairings = []
+    for idx_a, idx_b, stats, verdict in results:
+        score_a = { ACCEPT_H1: 1.0, ACCEPT_H0: 0.0 }.get(verdict, 0.5)
+        ratings[idx_a], ratings[idx_b] = update_elo(ratings[idx_a], ratings[idx_b], score_a, k_factor)
+        totals[idx_a].merge(stats)
+        totals[idx_b].merge(_negate(stats))
+        pairings.append(_gen_pairing_result(bots[idx_a], bots[idx_b], stats, verdict))
+
+    leaderboard = [_gen_leaderboard_entry(bot, rating, total)
+            for bot, rating, total in zip(bots, ratings, totals)]
+    leaderboard.sort(key=lambda entry: entry["elo"], reverse=True)
+    return leaderboard, pairings
+
+def format_leaderboard(leaderboard):
+    lines = ["%-4s %-20s %7s %8s %10s %9s" % ("rank", "name", "elo", "hands", "bb/100", "95%CI")]
+    for rank, entry in enumerate(leaderboard, 1):
+        lines.append("%-4d %-20s %7.1f %8d %10.2f %9.2f" % (
+            rank, entry["name"], entry["elo"], entry["hands"], entry["bb100"], entry["ci95"]))
+    return "\n".join(lines)
+
+def _negate(stats):
+    negated = RunningStats()
+    negated.n, negated.mean, negated.m2 = stats.n, -stats.mean, stats.m2
+    return negated
+
+def _gen_pairing_result(bot_a, bot_b, stats, verdict):
+    return {
+            "players": [bot_a[0], bot_b[0]],
+            "verdict": verdict,
+            "hands": stats.n,
+            "bb100": stats.mean * 100,
+            "ci95": stats.confidence_interval() * 100
+            }
+
+def _gen_leaderboard_entry(bot, rating, stats):
+    return {
+            "name": bot[0],
+            "path": bot[1],
+            "elo": rating,
+            "hands": stats.n,
+            "bb100": stats.mean * 100,
+            "ci95": stats.confidence_interval() * 100
+            }
+
@@ -0,0 +1,58 @@
+"""Card images and hand strength labels shared by the server and the templates.
+    Urls of the 52 card images are resolved by static_url() once per
+    application and kept already escaped, so templates only look them up.
+    (static_url() hashes the image on every call while debug mode is on.)
+    Functions taking "handler" are registered as ui_methods of the application.
+"""
+import tornado.escape
+
+SUITS = [("S", "spade"), ("D", "diamond"), ("H", "heart"), ("C", "club")]
+RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "T", "J", "Q", "K", "A"]
+SUIT_FOLDERS = dict(SUITS)
+CARDS = [suit + rank for suit, _ in SUITS for rank in RANKS]
+POT_IMAGE = "images/poker_pot.png"
+
+RANK_NAMES = dict(zip(RANKS, ["Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine",
+    "Ten", "Jack", "Queen", "King", "Ace"]))
+CARD_NAMES = { suit + rank: "%s of %ss" % (RANK_NAMES[rank], folder.capitalize())
+        for suit, folder in SUITS for rank in RANKS }
+
+# hand strength names of pypokerengine -> label displayed on the round result
+STRENGTH_LABELS = {
+        "HIGHCARD": "HIGH CARD",
+        "ONEPAIR": "PAIR",
+        "TWOPAIR": "TWO PAIR",
+        "THREECARD": "THREE OF A KIND",
+        "STRAIGHT": "STRAIGHT",
+        "FLASH": "FLUSH",
+        "FULLHOUSE": "FULL HOUSE",
+        "FOURCARD": "FOUR OF A KIND",
+        "STRAIGHTFLASH": "STRAIGHT FLUSH"
+        }
+
+def image_path(card):
+    return "images/%s/%s.png" % (SUIT_FOLDERS[card[0]], card[1:])
+
+def gen_card_urls(static_url):
+    urls = { card: static_url(image_path(card)) for card in CARDS }
+    urls["pot"] = static_url(POT_IMAGE)
+    return { key: tornado.escape.xhtml_escape(url) for key, url in urls.items() }
+
+def card_url(handler, card):
+    """Escaped url of the card image (ex. "SA") or of the pot image ("pot")"""
+    application = handler.application
+    if getattr(application, "card_urls", None) is None:
+        application.card_urls = gen_card_urls(handler.static_url)
+    return application.card_urls[card]
+
+def card_name(handler, card):
+    return CARD_NAMES[card]
+
+def strength_label(handler, strength):
+    return STRENGTH_LABELS.get(strength, strength)
+
+UI_METHODS = {
+        "card_url": card_url,
+        "card_name": card_name,
+        "strength_label": strength_label
+        }
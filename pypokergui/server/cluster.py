@@ -0,0 +1,160 @@
+"""Serve several tables from several processes on one machine.
+    One process owns one table (its own GameManager and IOLoop) and listens
+    on its own port, so the page of a table and its websocket always reach
+    the process which owns the table. Another process serves the lobby on
+    the base port and links to the tables.
+    Tables report their status to the lobby through a Unix socket (one json
+    per line), sent when members join/leave, a round starts or a game ends.
+    A table whose connection closes (its process died) leaves the lobby till
+    it reports again.
+"""
+import json
+import os
+import socket
+import tempfile
+
+import tornado.ioloop
+import tornado.iostream
+import tornado.netutil
+import tornado.process
+import tornado.tcpserver
+import tornado.web
+
+import pypokergui.server.game_manager as GM
+import pypokergui.server.lobby as Lobby
+import pypokergui.server.poker as P
+
+RECONNECT_DELAY = 1.0  # seconds before a table connects again to a restarted lobby
+
+
+class TableBroker(tornado.tcpserver.TCPServer):
+    """Receive status of tables and put them into the lobby index"""
+
+    def __init__(self, lobby):
+        super(TableBroker, self).__init__()
+        self.lobby = lobby
+        self.streams = {}  # table id -> stream of its latest connection
+
+    async def handle_stream(self, stream, address):
+        table_id = None
+        try:
+            while True:
+                line = await stream.read_until(b"\n")
+                status = json.loads(line)
+                table_id = status["table_id"]
+                self.streams[table_id] = stream
+                self.lobby.update_table(status)
+        except tornado.iostream.StreamClosedError:
+            # a new connection of the table may have reported already
+            if table_id is not None and self.streams.get(table_id) is stream:
+                del self.streams[table_id]
+                self.lobby.remove_table(table_id)
+
+
+class BrokerClient(object):
+    """Send status of the table to the broker. Only the latest status
+        matters, so it is dropped while the broker can not be reached and
+        sent again on the next publish. A lost connection (ex. the lobby
+        process was restarted) is made again after RECONNECT_DELAY.
+    """
+
+    def __init__(self, broker_path, table_id, port):
+        self.broker_path = broker_path
+        self.table_id = table_id
+        self.port = port
+        self.stream = None
+        self.latest = None
+
+    def publish(self, game_manager):
+        status = GM.gen_table_status(game_manager)
+        status.update(table_id=self.table_id, port=self.port)
+        self.latest = status
+        if self.stream is None:
+            self._connect()
+        elif not self.stream.closed():
+            self._write(status)
+
+    def _connect(self):
+        self.stream = tornado.iostream.IOStream(socket.socket(socket.AF_UNIX, socket.SOCK_STREAM))
+        tornado.ioloop.IOLoop.current().add_future(self.stream.connect(self.broker_path), self._on_connect)
+
+    def _on_connect(self, future):
+        if future.exception() is not None:
+            self.stream = None  # retried on next publish
+            return
+        stream = self.stream
+        stream.set_close_callback(lambda: self._on_close(stream))
+        self._write(self.latest)
+
+    def _on_close(self, stream):
+        if self.stream is not stream: return
+        self.stream = None
+        tornado.ioloop.IOLoop.current().call_later(RECONNECT_DELAY, self._reconnect)
+
+    def _reconnect(self):
+        if self.stream is None: self._connect()
+
+    def _write(self, status):
+        try:
+            self.stream.write(self._encode(status))
+        except tornado.iostream.StreamClosedError:
+            pass  # the close callback connects again
+
+    def _encode(self, status):
+        return (json.dumps(status) + "\n").encode("utf-8")
+
+
+class LobbyApplication(tornado.web.Application):
+
+    def __init__(self, lobby):
+        self.lobby = lobby
+        handlers = [
+            (r"/", Lobby.LobbyHandler),
+            (r"/api/tables", Lobby.LobbyApiHandler),
+        ]
+        settings = dict(
+            template_path=os.path.join(os.path.dirname(__file__), "templates"),
+            static_path=os.path.join(os.path.dirname(__file__), "static"),
+        )
+        super(LobbyApplication, self).__init__(handlers, **settings)
+
+
+def gen_broker_path():
+    return os.path.join(tempfile.gettempdir(), "pypokergui-%d.sock" % os.getpid())
+
+
+def start_cluster(config, port, speed, table_num, reload_interval=1.0):
+    """Fork a lobby process on "port" and tables on port+1 ... port+table_num.
+        The parent process only restarts processes which die.
+        "config" is parsed once here, the forked tables share it.
+    """
+    broker_path = gen_broker_path()
+    # bound before fork, so tables can connect as soon as they start
+    broker_socket = tornado.netutil.bind_unix_socket(broker_path)
+    try:
+        task_id = tornado.process.fork_processes(table_num + 1)
+    finally:
+        # the parent leaves fork_processes only when the cluster shuts down (exit or Ctrl+C)
+        if tornado.process.task_id() is None and os.path.exists(broker_path):
+            os.remove(broker_path)
+    if task_id == 0:
+        start_lobby(port, broker_socket)
+    else:
+        broker_socket.close()
+        start_table(config, port + task_id, speed, reload_interval, task_id, broker_path)
+
+
+def start_lobby(port, broker_socket):
+    lobby = Lobby.LobbyIndex()
+    broker = TableBroker(lobby)
+    broker.add_socket(broker_socket)
+    LobbyApplication(lobby).listen(port)
+    tornado.ioloop.IOLoop.current().start()
+
+
+def start_table(config, port, speed, reload_interval, table_id, broker_path):
+    client = BrokerClient(broker_path, table_id, port)
+    P.global_game_manager.status_listeners.append(client.publish)
+    P.listen_table(config, port, speed, reload_interval, table_id)
+    client.publish(P.global_game_manager)
+    tornado.ioloop.IOLoop.current().start()
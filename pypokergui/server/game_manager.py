@@ -1,5 +1,7 @@
 import pypokergui.engine_wrapper as Engine
 import pypokergui.ai_generator as AG
+import pypokergui.server.game_update as GU
+import pypokergui.server.pacing as Pacing
 
 class GameManager(object):
 
@@ -8,21 +10,44 @@ class GameManager(object):
         self.members_info = []
         self.engine = None
         self.ai_players = {}
+        self.ai_setup_methods = {}
+        self.auto_rematch = False
+        self.fast_forward = False
+        self.seat_hold_timeout = 60
+        self.pacing = Pacing.PacingPolicy()
+        self.game_count = 0
         self.is_playing_poker = False
         self.latest_messages = []
+        self.latest_updates = []
         self.next_player_uuid = None
+        # updates of the current round, replayed to browsers which reconnect
+        self.round_updates = []
+        self.update_seq = 0
+        self.game_first_seq = 1
+        # humans whose socket is closed: "held" seats wait for them to come back,
+        # "away" seats are played by check/fold till the game ends
+        self.held_players = set()
+        self.away_players = set()
+        # called with this game manager when members join/leave, a round starts or the game ends
+        self.status_listeners = []
 
         self.hole_cards = {}
 
     def define_rule(self, max_round, initial_stack, small_blind, ante, blind_structure):
         self.rule = Engine.gen_game_config(max_round, initial_stack, small_blind, ante, blind_structure)
 
-    def join_ai_player(self, name, setup_script_path):
+    def set_rule(self, rule):
+        """Use a GameRules compiled before, tables of the same config share it"""
+        self.rule = rule
+
+    def join_ai_player(self, name, setup_script_path, pinned=False):
         ai_uuid = str(len(self.members_info))
-        self.members_info.append(gen_ai_player_info(name, ai_uuid, setup_script_path))
+        self.members_info.append(gen_ai_player_info(name, ai_uuid, setup_script_path, pinned))
+        self.notify_status()
 
     def join_human_player(self, name, uuid):
         self.members_info.append(gen_human_player_info(name, uuid))
+        self.notify_status()
 
     def get_human_player_info(self, uuid):
         for info in self.members_info:
@@ -33,28 +58,113 @@ class GameManager(object):
         member_info = self.get_human_player_info(uuid)
         assert member_info
         self.members_info.remove(member_info)
-
-    def start_game(self):
+        self.notify_status()
+
+    def notify_status(self):
+        for listener in self.status_listeners:
+            listener(self)
+
+    def hold_human_player(self, uuid):
+        self.held_players.add(uuid)
+
+    def return_human_player(self, uuid):
+        self.held_players.discard(uuid)
+        self.away_players.discard(uuid)
+
+    def release_human_player(self, uuid):
+        """Seat hold expired. The seat is left now, or at the end of the running game"""
+        self.held_players.discard(uuid)
+        if self.is_playing_poker and uuid in self._seated_uuids():
+            self.away_players.add(uuid)
+        elif self.get_human_player_info(uuid):
+            self.remove_human_player_info(uuid)
+
+    def _seated_uuids(self):
+        return [player.uuid for player in self.engine.current_state["table"].seats.players]
+
+    def start_game(self, initial_stacks=None):
+        for uuid in self.away_players:
+            self.remove_human_player_info(uuid)
+        self.away_players = set()
         assert self.rule and len(self.members_info) >= 2 and not self.is_playing_poker
         uuid_list = [member["uuid"] for member in self.members_info]
         name_list = [member["name"] for member in self.members_info]
         players_info = Engine.gen_players_info(uuid_list, name_list)
-        self.ai_players = build_ai_players(self.members_info)
-        self.engine = Engine.EngineWrapper()
-        self.latest_messages = self.engine.start_game(players_info, self.rule)
+        self.ai_players = self._prepare_ai_players()
+        if self.engine is None: self.engine = Engine.EngineWrapper()
+        self.latest_messages = self.engine.start_game(players_info, self.rule, initial_stacks)
+        self.game_first_seq = self.update_seq + 1
+        self.round_updates = []
+        self._set_latest_updates()
         self.is_playing_poker = True
+        self.game_count += 1
         self.next_player_uuid = fetch_next_player_uuid(self.latest_messages)
+        self.notify_status()
 
     def update_game(self, action, amount):
         assert len(self.latest_messages) != 0  # check that start_game has already called
         self.latest_messages = self.engine.update_game(action, amount)
+        self._set_latest_updates()
         self.next_player_uuid = fetch_next_player_uuid(self.latest_messages)
+        if has_game_finished(self.latest_messages):
+            self.is_playing_poker = False
+            self.notify_status()
+        elif any(['round_start_message' == update.message_type for update in self.latest_updates]):
+            self.notify_status()
+
+    def _set_latest_updates(self):
+        self.latest_updates = GU.gen_game_updates(self.latest_messages)
+        for game_update in self.latest_updates:
+            self.update_seq += 1
+            game_update.seq = self.update_seq
+            game_update.step = self.engine.step
+            # round start messages (one per player) begin the log of the next round
+            if 'round_start_message' == game_update.message_type and len(self.round_updates) != 0 \
+                    and 'round_start_message' != self.round_updates[-1].message_type:
+                self.round_updates = []
+            self.round_updates.append(game_update)
+
+    def has_human_in_hand(self):
+        players = self.engine.current_state["table"].seats.players
+        return any([len(player.uuid) > 2 and player.uuid not in self.away_players
+            and player.is_active() for player in players])
+
+    def reset_game(self):
+        """Forget the state of the last game, which can be still running.
+            Engine and AI players are kept to be reused by the next game.
+        """
+        self.is_playing_poker = False
+        self.latest_messages = []
+        self.latest_updates = []
+        self.next_player_uuid = None
+        self.reset_hole_record()
+
+    def start_next_game(self, initial_stacks=None):
+        self.reset_game()
+        self.start_game(initial_stacks)
+
+    def _prepare_ai_players(self):
+        # reuse AI players whose script was not reloaded since they were built
+        ai_players, setup_methods = {}, {}
+        for member in self.members_info:
+            if member["type"] == "human": continue
+            uuid = member["uuid"]
+            setup_method = AG.load_setup_method(member["setup_script_path"], member["pinned"])
+            if uuid in self.ai_players and self.ai_setup_methods.get(uuid) is setup_method:
+                ai_players[uuid] = self.ai_players[uuid]
+            else:
+                ai_players[uuid] = setup_method()
+            setup_methods[uuid] = setup_method
+        self.ai_setup_methods = setup_methods
+        return ai_players
 
     def ask_action_to_ai_player(self, uuid):
-        assert uuid in self.ai_players
-        ai_player = self.ai_players[uuid]
         ask_uuid, ask_message = self.latest_messages[-1]
         assert ask_message['type'] == 'ask' and uuid == ask_uuid
+        if uuid in self.away_players:
+            return gen_away_action(ask_message['message']['valid_actions'])
+        assert uuid in self.ai_players
+        ai_player = self.ai_players[uuid]
         try:
             return ai_player.declare_action(
                     ask_message['message']['valid_actions'],
@@ -80,26 +190,33 @@ def fetch_next_player_uuid(new_messages):
         assert ask_message['type'] == 'ask'
         return ask_uuid
 
+def gen_table_status(game_manager):
+    """Summary of the table listed in the lobby"""
+    rule = game_manager.rule or {}
+    state = game_manager.engine.current_state if game_manager.engine else None
+    return {
+            "players": [member["name"] for member in game_manager.members_info],
+            "small_blind": rule.get("small_blind"),
+            "ante": rule.get("ante"),
+            "max_round": rule.get("max_round"),
+            "status": "playing" if game_manager.is_playing_poker else "waiting",
+            "hand_count": state["round_count"] if state and game_manager.is_playing_poker else 0,
+            "game_count": game_manager.game_count
+            }
+
+def gen_away_action(valid_actions):
+    # check when it is free, fold otherwise
+    call_amount = valid_actions[1]['amount']
+    return ['call', 0] if call_amount == 0 else ['fold', 0]
+
 def has_game_finished(new_messages):
     _uuid, last_message = new_messages[-1]
     return "game_result_message" == last_message['message']['message_type']
 
-def build_ai_players(members_info):
-    holder = {}
-    for member in members_info:
-        if member["type"] == "human": continue
-        holder[member["uuid"]] = _build_ai_player(member["setup_script_path"])
-    return holder
-
-def _build_ai_player(setup_script_path):
-    if not AG.healthcheck(setup_script_path, quiet=True):
-        raise Exception("Failed to setup ai from [ %s ]" % setup_script_path)
-    setup_method = AG._import_setup_method(setup_script_path)
-    return setup_method()
-
-def gen_ai_player_info(name, uuid, setup_script_path):
+def gen_ai_player_info(name, uuid, setup_script_path, pinned=False):
     info = _gen_base_player_info("ai", name, uuid)
     info["setup_script_path"] = setup_script_path
+    info["pinned"] = pinned
     return info
 
 def gen_human_player_info(name, uuid):
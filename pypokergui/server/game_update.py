@@ -0,0 +1,57 @@
+"""Engine messages unpacked once per engine step.
+    The engine builds every message as nested dicts, and the broadcast path
+    used to walk them again for every receiver. GameUpdate holds the fields it
+    needs in slots, built once when GameManager steps the engine. Dicts of the
+    engine (round_state, seats, ...) are kept by reference and handed as they
+    are to the callbacks of BasePokerPlayer, so nothing is copied.
+"""
+
+class GameUpdate(object):
+
+    __slots__ = ["destination", "update", "message", "message_type", "hole_card", "rendered", "seq", "step"]
+
+    def __init__(self, destination, update):
+        self.destination = destination
+        self.update = update
+        self.message = update['message']
+        self.message_type = self.message['message_type']
+        self.hole_card = self.message.get('hole_card')
+        # message for browsers, rendered once and shared by all sockets
+        self.rendered = None
+        # number given by GameManager, browsers report the last one they received on reconnect
+        self.seq = None
+        # engine step the update was made by
+        self.step = None
+
+    def is_broadcast(self):
+        return self.destination == -1
+
+def gen_game_updates(messages):
+    return [GameUpdate(destination, update) for destination, update in messages]
+
+def dispatch_to_ai(ai_player, game_update):
+    if game_update.message_type not in AI_RECEIVERS:
+        raise Exception("Unexpected message received : %r" % game_update.update)
+    receiver = AI_RECEIVERS[game_update.message_type]
+    if receiver: receiver(ai_player, game_update.message)
+
+def _receive_round_start(ai_player, message):
+    ai_player.receive_round_start_message(message['round_count'], message['hole_card'], message['seats'])
+
+def _receive_street_start(ai_player, message):
+    ai_player.receive_street_start_message(message['street'], message['round_state'])
+
+def _receive_game_update(ai_player, message):
+    ai_player.receive_game_update_message(message['action'], message['round_state'])
+
+def _receive_round_result(ai_player, message):
+    ai_player.receive_round_result_message(message['winners'], message['hand_info'], message['round_state'])
+
+AI_RECEIVERS = {
+        'round_start_message': _receive_round_start,
+        'street_start_message': _receive_street_start,
+        'game_update_message': _receive_game_update,
+        'round_result_message': _receive_round_result,
+        'game_result_message': None,  # ai does not handle game result
+        'ask_message': None  # ask message handling is done in GameManager.ask_action_to_ai_player
+        }
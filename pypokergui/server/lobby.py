@@ -0,0 +1,98 @@
+"""Index of tables listed in the lobby.
+    Status of a table is put into the index when the table reports a change
+    (see GameManager.status_listeners), so requests only slice the index.
+    Pages are serialized once and kept with their ETag till a table on the
+    page changes or tables are added/removed. Cost of a request depends on
+    the page size, not on the number of tables.
+"""
+import bisect
+import json
+
+import tornado.web
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_CACHED_PAGES = 1000
+
+class LobbyIndex(object):
+
+    def __init__(self):
+        self.tables = {}  # table id -> status
+        self.table_ids = []  # sorted
+        self.updated_at = {}  # table id -> version when its status changed
+        self.version = 0
+        self.order_version = 0  # version when tables were added or removed
+        self.pages = {}  # (offset, limit) -> (etag, body)
+
+    def update_table(self, status):
+        table_id = status["table_id"]
+        if self.tables.get(table_id) == status: return
+        self.version += 1
+        if table_id not in self.tables:
+            bisect.insort(self.table_ids, table_id)
+            self.order_version = self.version
+        self.tables[table_id] = status
+        self.updated_at[table_id] = self.version
+
+    def remove_table(self, table_id):
+        if table_id not in self.tables: return
+        self.version += 1
+        self.table_ids.remove(table_id)
+        del self.tables[table_id]
+        del self.updated_at[table_id]
+        self.order_version = self.version
+
+    def get_tables(self, offset, limit):
+        return [self.tables[table_id] for table_id in self.table_ids[offset:offset + limit]]
+
+    def get_page(self, offset, limit):
+        """Return (etag, json body) of the page"""
+        page_ids = self.table_ids[offset:offset + limit]
+        page_version = max([self.order_version] + [self.updated_at[table_id] for table_id in page_ids])
+        etag = '"%d-%d-%d"' % (page_version, offset, limit)
+        cached = self.pages.get((offset, limit))
+        if cached is not None and cached[0] == etag:
+            return cached
+        body = json.dumps({
+            "tables": [self.tables[table_id] for table_id in page_ids],
+            "total": len(self.table_ids),
+            "offset": offset,
+            "limit": limit
+            })
+        if len(self.pages) >= MAX_CACHED_PAGES: self.pages = {}
+        self.pages[(offset, limit)] = (etag, body)
+        return etag, body
+
+
+def parse_page_arguments(handler):
+    try:
+        offset = max(0, int(handler.get_argument("offset", 0)))
+        limit = int(handler.get_argument("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise tornado.web.HTTPError(400, "offset and limit must be integers")
+    return offset, min(max(1, limit), MAX_PAGE_SIZE)
+
+
+class LobbyApiHandler(tornado.web.RequestHandler):
+    """GET /api/tables?offset=0&limit=50, answers 304 to If-None-Match of a page not changed"""
+
+    def get(self):
+        offset, limit = parse_page_arguments(self)
+        etag, body = self.application.lobby.get_page(offset, limit)
+        self.set_header("Etag", etag)
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+        self.set_header("Content-Type", "application/json; charset=UTF-8")
+        self.write(body)
+
+    def compute_etag(self):
+        return None  # set by get() from the index, the body is not hashed
+
+
+class LobbyHandler(tornado.web.RequestHandler):
+
+    def get(self):
+        offset, limit = parse_page_arguments(self)
+        tables = self.application.lobby.get_tables(offset, limit)
+        self.render("lobby.html", tables=tables, host=self.request.host_name)
@@ -1,8 +1,10 @@
-import time
 import logging
 
 import tornado.escape
 
+import pypokergui.engine_wrapper as Engine
+import pypokergui.server.game_update as GU
+
 
 def alert_server_restart(handler, uuid, sockets):
     soc = _find_socket_by_uuid(sockets, uuid)
@@ -10,7 +12,7 @@ def alert_server_restart(handler, uuid, sockets):
 
 
 def _gen_alert_server_restart_message(handler):
-    message = "Server has already run. Please restart the server to play the game again."
+    message = "Game is in progress. Please wait till it finishes to play the game again."
     return {
         'message_type': 'alert_restart_server',
         'message': message
@@ -53,17 +55,14 @@ def broadcast_start_game(handler, game_manager, sockets):
 
 
 def _gen_game_info(game_manager):
-    seats = game_manager.latest_messages[0][1]["message"]["seats"]
-    copy_seats = [{k: v for k, v in player.items()} for player in seats]
-    for player in copy_seats:
-        player["stack"] = game_manager.rule["initial_stack"]
+    seats = game_manager.latest_updates[0].message["seats"]
+    initial_stack = game_manager.rule["initial_stack"]
+    copy_seats = [dict(player, stack=initial_stack) for player in seats]
     player_num = len(seats)
-    rule = {k: v for k, v in game_manager.rule.items()}
-    rule["small_blind_amount"] = rule.pop("small_blind")
     return {
         "seats": copy_seats,
         "player_num": player_num,
-        "rule": rule,
+        "rule": Engine.gen_rule_info(game_manager.rule),
     }
 
 
@@ -79,30 +78,160 @@ def _gen_start_game_message(handler, game_manager, uuid):
     }
 
 
-def broadcast_update_game(handler, game_manager, sockets, mode="moderate"):
-    for destination, update in game_manager.latest_messages:
-        for uuid in _parse_destination(destination, game_manager, sockets):
-            if ('hole_card' in update['message'].keys()):
-                game_manager.record_hole_card(str(uuid), update['message']['hole_card'])
+def broadcast_game_state(game_manager, sockets):
+    pacing = game_manager.pacing
+    message = {
+        'message_type': 'game_state_update',
+        'is_paused': pacing.is_paused(),
+        'speed': pacing.mode
+    }
+    for soc in sockets:
+        try:
+            soc.write_message(message)
+        except:
+            logging.error("Error sending message", exc_info=True)
+
+
+def broadcast_update_game(handler, game_manager, sockets, game_updates=None, to_ai=True):
+    sockets_by_uuid = {soc.uuid: soc for soc in sockets}
+    if game_updates is None: game_updates = game_manager.latest_updates
+    for game_update in game_updates:
+        if game_update.hole_card is not None:
+            game_manager.record_hole_card(str(game_update.destination), game_update.hole_card)
+        for uuid in _parse_destination(game_update.destination, game_manager, sockets):
             if len(str(uuid)) <= 2:
+                if not to_ai: continue
                 # AI players
 
                 ai_player = game_manager.ai_players[uuid]
-                _broadcast_message_to_ai(ai_player, update)
+                _broadcast_message_to_ai(ai_player, game_update)
             else:
                 # Human player
-                socket = _find_socket_by_uuid(sockets, uuid)
-                message = _gen_game_update_message(handler, update, game_manager)
+                socket = sockets_by_uuid.get(uuid)
+                if socket is None and uuid not in game_manager.held_players: continue
+                message = _render_game_update(handler, game_update, game_manager)
+                if socket is None: continue  # disconnected, sent by resync when it comes back
+                if 'display_at' not in message:
+                    # browsers show the update at the time scheduled by pacing policy of the table
+                    message.update(game_manager.pacing.gen_timing(game_update.message_type))
                 try:
                     socket.write_message(message)
                 except:
                     logging.error("Error sending message", exc_info=True)
-                time.sleep(_calc_wait_interval(mode, update))
+        if 'round_result_message' == game_update.message_type:
+            # rendered now for resync, as hole cards are forgotten
+            _render_game_update(handler, game_update, game_manager)
+            game_manager.reset_hole_record()
+
+
+def _render_game_update(handler, game_update, game_manager):
+    if game_update.rendered is None:
+        game_update.rendered = _gen_game_update_message(handler, game_update, game_manager)
+        game_update.rendered['seq'] = game_update.seq
+    return game_update.rendered
+
+
+def send_resync(handler, game_manager, soc, last_seq):
+    """Bring a browser which (re)connected up to date.
+        It gets the game page only if it does not have the current one (last_seq
+        is None after the page is loaded), then one message with the table now
+        and the events of the round it missed. Messages are rendered already
+        except for updates nobody received, so no table is rebuilt per event.
+    """
+    playing = game_manager.is_playing_poker
+    if playing and (last_seq is None or last_seq < game_manager.game_first_seq):
+        soc.write_message(_gen_start_game_message(handler, game_manager, soc.uuid))
+        last_seq = 0
+    elif last_seq is None:
+        if game_manager.get_human_player_info(soc.uuid):
+            soc.write_message(_gen_config_update_message(handler, game_manager, soc.uuid))
+        return
+    broadcast_game_state(game_manager, [soc])
+    missed = [update for update in game_manager.round_updates if update.seq > last_seq
+            and (update.is_broadcast() or update.destination == soc.uuid)]
+    if len(missed) != 0:
+        soc.write_message(_gen_resync_message(handler, game_manager, soc.uuid, missed))
+
+
+# events kept in the resync message, others are replaced by the latest one
+RESYNC_EVENTS = ['round_start_message', 'round_result_message', 'game_result_message']
+
+def _gen_resync_message(handler, game_manager, uuid, game_updates):
+    contents = [_render_game_update(handler, update, game_manager)['content'] for update in game_updates]
+    event_htmls = [content['event_html'] for update, content in zip(game_updates, contents)
+            if update.message_type in RESYNC_EVENTS]
+    if game_updates[-1].message_type not in RESYNC_EVENTS:
+        event_htmls.append(contents[-1]['event_html'])
+    table_htmls = [content['table_html'] for content in contents if 'table_html' in content]
+    last = game_updates[-1]
+    return {
+        'message_type': 'resync',
+        'seq': last.seq,
+        'table_html': table_htmls[-1] if len(table_htmls) != 0 else None,
+        'event_htmls': event_htmls,
+        'ask': 'ask_message' == last.message_type and uuid == last.destination \
+                and uuid == game_manager.next_player_uuid,
+        'step': contents[-1].get('step')
+    }
+
+
+def broadcast_update_to_ai(game_manager, game_updates):
+    """Send updates only to AI players, used while a hand is fast-forwarded"""
+    for game_update in game_updates:
+        if game_update.is_broadcast():
+            for ai_player in game_manager.ai_players.values():
+                _broadcast_message_to_ai(ai_player, game_update)
+        elif game_update.destination in game_manager.ai_players:
+            _broadcast_message_to_ai(game_manager.ai_players[game_update.destination], game_update)
+
+
+def broadcast_fast_forward(handler, game_manager, sockets, game_updates):
+    """Send updates of a fast-forwarded hand to browsers.
+        Actions till the round result are coalesced into one summary and the
+        rest is sent as usual. AI players have received all of them already.
+    """
+    boundary = len(game_updates)
+    for idx, game_update in enumerate(game_updates):
+        if 'round_result_message' == game_update.message_type:
+            boundary = idx
+            break
+    skipped, rest = game_updates[:boundary], game_updates[boundary:]
+    if len(skipped) != 0 and len(sockets) != 0:
+        message = _gen_fast_forward_message(handler, skipped)
+        message.update(game_manager.pacing.gen_timing('fast_forward_message'))
+        for soc in sockets:
+            try:
+                soc.write_message(message)
+            except:
+                logging.error("Error sending message", exc_info=True)
+    broadcast_update_game(handler, game_manager, sockets, rest, to_ai=False)
+
+
+def _gen_fast_forward_message(handler, game_updates):
+    round_state, actions = None, []
+    for game_update in game_updates:
+        if 'round_state' not in game_update.message: continue
+        round_state = game_update.message['round_state']
+        if 'game_update_message' == game_update.message_type:
+            actions.append((round_state['street'], game_update.message['action']))
+    names = {seat['uuid']: seat['name'] for seat in round_state['seats']}
+    table_html_str = handler.render_string("round_state.html", round_state=round_state)
+    event_html_str = handler.render_string("event_fast_forward.html", actions=actions, names=names)
+    return {
+        'message_type': 'update_game',
+        'content': {
+            'update_type': 'fast_forward_message',
+            'table_html': tornado.escape.to_basestring(table_html_str),
+            'event_html': tornado.escape.to_basestring(event_html_str)
+        }
+    }
 
 
 def _parse_destination(destination, game_manager, sockets):
     if destination == -1:
-        return [soc.uuid for soc in sockets] + list(game_manager.ai_players.keys())
+        uuids = [soc.uuid for soc in sockets]
+        held = [uuid for uuid in game_manager.held_players if uuid not in uuids]
+        return uuids + held + list(game_manager.ai_players.keys())
     else:
         return [destination]
 
@@ -113,15 +242,13 @@ def _find_socket_by_uuid(sockets, uuid):
     return target[0]
 
 
-def _gen_game_update_message(handler, message, game_manager):
-    message_type = message['message']['message_type']
-    hole = False
-    if ('hole_card' in message['message'].keys()):
-        hole = message['message']['hole_card']
+def _gen_game_update_message(handler, game_update, game_manager):
+    message = game_update.message
+    message_type = game_update.message_type
 
     if 'round_start_message' == message_type:
-        round_count = message['message']['round_count']
-        hole_card = message['message']['hole_card']
+        round_count = message['round_count']
+        hole_card = message['hole_card']
         event_html_str = handler.render_string("event_round_start.html",
                                                round_count=round_count, hole_card=hole_card)
         content = {
@@ -129,8 +256,8 @@ def _gen_game_update_message(handler, message, game_manager):
             'event_html': tornado.escape.to_basestring(event_html_str)
         }
     elif 'street_start_message' == message_type:
-        round_state = message['message']['round_state']
-        street = message['message']['street']
+        round_state = message['round_state']
+        street = message['street']
         table_html_str = handler.render_string("round_state.html", round_state=round_state)
         event_html_str = handler.render_string("event_street_start.html", street=street)
         content = {
@@ -139,9 +266,9 @@ def _gen_game_update_message(handler, message, game_manager):
             'event_html': tornado.escape.to_basestring(event_html_str)
         }
     elif 'game_update_message' == message_type:
-        round_state = message['message']['round_state']
-        action = message['message']['action']
-        action_histories = message['message']['action_histories']
+        round_state = message['round_state']
+        action = message['action']
+        action_histories = message['action_histories']
         table_html_str = handler.render_string("round_state.html", round_state=round_state)
         event_html_str = handler.render_string(
             "event_update_game.html", action=action, round_state=round_state)
@@ -151,73 +278,49 @@ def _gen_game_update_message(handler, message, game_manager):
             'event_html': tornado.escape.to_basestring(event_html_str)
         }
     elif 'round_result_message' == message_type:
-        # print(repr(message['message'].items()))
-        # Here, add additional field to hand_info to indicate which card to display (suit, rank)
-        # Append hand info to each winner
-        hand_info = message['message']['hand_info']
-        hand_out = []
+        # hands are shown with the hole cards sent to the players in this round
+        hand_info = message['hand_info']
         for hand in hand_info:
-            if (hand['uuid'] in game_manager.hole_cards):
-                hand['hand_cards'] = game_manager.hole_cards[hand['uuid']]
-
-                # Fix spelling errors
-                if (hand['hand']['hand']['strength'] == 'FLASH'):
-                    hand['hand']['hand']['strength'] = 'FLUSH'
-
-                if (hand['hand']['hand']['strength'] == 'THREECARD'):
-                    hand['hand']['hand']['strength'] = 'THREE OF A KIND'
-
-                if (hand['hand']['hand']['strength'] == 'ONEPAIR'):
-                    hand['hand']['hand']['strength'] = 'PAIR'
-
-                if (hand['hand']['hand']['strength'] == 'TWOPAIR'):
-                    hand['hand']['hand']['strength'] = 'TWO PAIR'
-
-                if (hand['hand']['hand']['strength'] == 'HIGHCARD'):
-                    hand['hand']['hand']['strength'] = 'HIGH CARD'
-                hand_out.append(hand)
-            else:
-                print(f"UUID {hand['uuid']} does NOT exist in hole cards...")
-                raise (KeyError)
-        hand_info = hand_out
-        round_state = message['message']['round_state']
+            if hand['uuid'] not in game_manager.hole_cards:
+                raise KeyError("UUID %s does NOT exist in hole cards" % hand['uuid'])
+        round_state = message['round_state']
 
-        winners = message['message']['winners']
-        round_count = message['message']['round_count']
+        winners = message['winners']
+        round_count = message['round_count']
         table_html_str = handler.render_string("round_state.html", round_state=round_state)
         event_html_str = handler.render_string("event_round_result.html",
                                                round_state=round_state, hand_info=hand_info, winners=winners,
-                                               round_count=round_count)
+                                               round_count=round_count, hole_cards=game_manager.hole_cards)
         content = {
             'update_type': message_type,
             'table_html': tornado.escape.to_basestring(table_html_str),
             'event_html': tornado.escape.to_basestring(event_html_str)
         }
-        # Reset hands
-        game_manager.reset_hole_record()
     elif 'game_result_message' == message_type:
-        game_info = message['message']['game_information']
+        game_info = message['game_information']
         event_html_str = handler.render_string("event_game_result.html", game_information=game_info)
         content = {
             'update_type': message_type,
             'event_html': tornado.escape.to_basestring(event_html_str)
         }
     elif 'ask_message' == message_type:
-        round_state = message['message']['round_state']
-        hole_card = message['message']['hole_card']
-        valid_actions = message['message']['valid_actions']
-        action_histories = message['message']['action_histories']
+        round_state = message['round_state']
+        hole_card = message['hole_card']
+        valid_actions = message['valid_actions']
+        action_histories = message['action_histories']
         table_html_str = handler.render_string("round_state.html", round_state=round_state)
         event_html_str = handler.render_string("event_ask_action.html",
                                                hole_card=hole_card, valid_actions=valid_actions,
                                                action_histories=action_histories)
         content = {
             'update_type': message_type,
+            # sent back with the action, to tell it from an action for an older ask
+            'step': game_update.step,
             'table_html': tornado.escape.to_basestring(table_html_str),
             'event_html': tornado.escape.to_basestring(event_html_str)
         }
     else:
-        raise Exception("Unexpected message received : %r" % message)
+        raise Exception("Unexpected message received : %r" % game_update.update)
 
     return {
         'message_type': 'update_game',
@@ -225,76 +328,5 @@ def _gen_game_update_message(handler, message, game_manager):
     }
 
 
-def _broadcast_message_to_ai(ai_player, message):
-    message_type = message['message']['message_type']
-    hole = False
-    if ('hole_card' in message['message'].keys()):
-        hole = message['message']['hole_card']
-    if 'round_start_message' == message_type:
-        round_count = message['message']['round_count']
-        hole_card = message['message']['hole_card']
-        seats = message['message']['seats']
-        ai_player.receive_round_start_message(round_count, hole_card, seats)
-    elif 'street_start_message' == message_type:
-        street = message['message']['street']
-        round_state = message['message']['round_state']
-        ai_player.receive_street_start_message(street, round_state)
-    elif 'game_update_message' == message_type:
-        action = message['message']['action']
-        round_state = message['message']['round_state']
-        ai_player.receive_game_update_message(action, round_state)
-    elif 'round_result_message' == message_type:
-        winners = message['message']['winners']
-        round_state = message['message']['round_state']
-        hand_info = message['message']['hand_info']
-        if (hole):
-            print(hole)
-        ai_player.receive_round_result_message(winners, hand_info, round_state)
-    elif 'game_result_message' == message_type:
-        pass  # ai does not handle game result
-    elif 'ask_message' == message_type:
-        pass  # ask message handling is done in global_game_config.ask_action_to_ai
-    else:
-        raise Exception("Unexpected message received : %r" % message)
-
-
-def _calc_wait_interval(mode, update):
-    message_type = update["message"]["message_type"]
-    if 'dev' == mode:
-        return 0
-    elif 'slow' == mode:
-        return SLOW_WAIT_INTERVAL[message_type]
-    elif 'moderate' == mode:
-        return MODERATE_WAIT_INTERVAL[message_type]
-    elif 'fast' == mode:
-        return FAST_WAIT_INTERVAL[message_type]
-    else:
-        raise Exception("Unexpected mode received [ %s ]" % mode)
-
-
-SLOW_WAIT_INTERVAL = {
-    'round_start_message': 5,
-    'street_start_message': 4,
-    'ask_message': 0,
-    'game_update_message': 4,
-    'round_result_message': 10,
-    'game_result_message': 0
-}
-
-MODERATE_WAIT_INTERVAL = {
-    'round_start_message': 6,
-    'street_start_message': 6,
-    'ask_message': 2,
-    'game_update_message': 2,
-    'round_result_message': 10,
-    'game_result_message': 0
-}
-
-FAST_WAIT_INTERVAL = {
-    'round_start_message': 1,
-    'street_start_message': 0.5,
-    'ask_message': 0,
-    'game_update_message': 0.5,
-    'round_result_message': 15,
-    'game_result_message': 0
-}
\ No newline at end of file
+def _broadcast_message_to_ai(ai_player, game_update):
+    GU.dispatch_to_ai(ai_player, game_update)
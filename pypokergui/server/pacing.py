@@ -0,0 +1,101 @@
+import time
+
+"""Pacing of game updates shown in browsers, one policy per table.
+    Updates are not delayed on the server anymore. Each update sent to browsers
+    is scheduled at a display time, and the time is put into its payload
+    ("display_at" with the "sent_at" time of the server, both in ms), so the
+    browser plays the updates back by itself. The server computes the game
+    ahead of the browsers till it is "lookahead" seconds ahead of them.
+    Waits are the seconds an update stays on the screen before the next one.
+"""
+
+DEV_WAIT_INTERVAL = {
+    'round_start_message': 0,
+    'street_start_message': 0,
+    'ask_message': 0,
+    'game_update_message': 0,
+    'round_result_message': 0,
+    'game_result_message': 0,
+    'fast_forward_message': 0
+}
+
+SLOW_WAIT_INTERVAL = {
+    'round_start_message': 5,
+    'street_start_message': 4,
+    'ask_message': 0,
+    'game_update_message': 4,
+    'round_result_message': 10,
+    'game_result_message': 0,
+    'fast_forward_message': 4
+}
+
+MODERATE_WAIT_INTERVAL = {
+    'round_start_message': 6,
+    'street_start_message': 6,
+    'ask_message': 2,
+    'game_update_message': 2,
+    'round_result_message': 10,
+    'game_result_message': 0,
+    'fast_forward_message': 2
+}
+
+FAST_WAIT_INTERVAL = {
+    'round_start_message': 1,
+    'street_start_message': 0.5,
+    'ask_message': 0,
+    'game_update_message': 0.5,
+    'round_result_message': 15,
+    'game_result_message': 0,
+    'fast_forward_message': 0.5
+}
+
+WAIT_INTERVALS = {
+    'dev': DEV_WAIT_INTERVAL,
+    'slow': SLOW_WAIT_INTERVAL,
+    'moderate': MODERATE_WAIT_INTERVAL,
+    'fast': FAST_WAIT_INTERVAL
+}
+
+class PacingPolicy(object):
+
+    def __init__(self, mode="moderate", lookahead=10.0, clock=time.time):
+        self.set_mode(mode)
+        self.lookahead = lookahead
+        self.clock = clock
+        self.paused_at = None
+        self.scheduled_until = 0  # time when the last scheduled update is done on the screen
+
+    def set_mode(self, mode):
+        if mode not in WAIT_INTERVALS:
+            raise Exception("Unexpected mode received [ %s ]" % mode)
+        self.mode = mode
+
+    def is_paused(self):
+        return self.paused_at is not None
+
+    def toggle_pause(self):
+        if self.is_paused():
+            # updates waiting on the screen are shown after the pause
+            now = self.clock()
+            if self.scheduled_until > self.paused_at:
+                self.scheduled_until += now - self.paused_at
+            self.paused_at = None
+        else:
+            self.paused_at = self.clock()
+        return self.is_paused()
+
+    def schedule(self, message_type):
+        """Book the screen for an update and return its display time"""
+        display_at = max(self.clock(), self.scheduled_until)
+        if self.is_paused(): display_at = max(display_at, self.paused_at)
+        self.scheduled_until = display_at + WAIT_INTERVALS[self.mode][message_type]
+        return display_at
+
+    def delay(self):
+        """Seconds the server should wait before computing next update, or None while paused"""
+        if self.is_paused(): return None
+        return max(0, self.scheduled_until - self.lookahead - self.clock())
+
+    def gen_timing(self, message_type):
+        display_at = self.schedule(message_type)
+        return { 'display_at': int(display_at * 1000), 'sent_at': int(self.clock() * 1000) }
@@ -6,22 +6,32 @@ src_path = os.path.join(root, "pypokergui")
 sys.path.append(root)
 sys.path.append(src_path)
 
-import yaml
 import uuid
+import secrets
 import tornado.ioloop
 import tornado.options
 import tornado.web
 import tornado.websocket
 from tornado.options import define, options
 
-import pypokerengine.utils.action_utils as AU
-
+import pypokergui.ai_generator as AG
+import pypokergui.config_builder as Config
+import pypokergui.engine_wrapper as Engine
+import pypokergui.server.card_assets as CA
 import pypokergui.server.game_manager as GM
+import pypokergui.server.lobby as Lobby
 import pypokergui.server.message_manager as MM
+import pypokergui.server.pacing as Pacing
 
 define("port", default=8888, help="run on the given port", type=int)
 define("config", default=None, help="path to game config", type=str)
 define("speed", default="moderate", help="how fast game progress", type=str)
+define("reload_interval", default=1.0, help="seconds between checks of modified AI scripts (0 to disable)", type=float)
+
+
+# signs the session cookies, new at every start. Tables forked by the cluster share
+# it, as browsers send the cookie of localhost to every port
+COOKIE_SECRET = secrets.token_hex(32)
 
 
 class Application(tornado.web.Application):
@@ -30,12 +40,15 @@ class Application(tornado.web.Application):
         handlers = [
             (r"/", PokerRequestHandler),
             (r"/pokersocket", PokerWebSocketHandler),
+            (r"/api/tables", Lobby.LobbyApiHandler),
         ]
+        self.lobby = Lobby.LobbyIndex()
         settings = dict(
-            cookie_secret="__TODO:_GENERATE_YOUR_OWN_RANDOM_VALUE_HERE__",
+            cookie_secret=COOKIE_SECRET,
             template_path=os.path.join(os.path.dirname(__file__), "templates"),
             static_path=os.path.join(os.path.dirname(__file__), "static"),
             xsrf_cookies=True,
+            ui_methods=CA.UI_METHODS,
         )
         super(Application, self).__init__(handlers, debug=True, **settings)
 
@@ -43,28 +56,73 @@ class Application(tornado.web.Application):
 class PokerRequestHandler(tornado.web.RequestHandler):
 
     def get(self):
+        # the session survives reloads and reconnects, so the browser keeps its seat
+        if not self.get_secure_cookie("session"):
+            self.set_secure_cookie("session", str(uuid.uuid4()))
         self.render("index.html", config=global_game_manager, registered=False)
 
 
 class PokerWebSocketHandler(tornado.websocket.WebSocketHandler):
     sockets = set()
+    pending_progress = None
+    waiting_progress = None  # method scheduled while no browser was connected
+    seat_holds = {}  # uuid of disconnected player -> timeout releasing the seat
 
     def get_compression_options(self):
         # Non-None enables compression with default options.
         return {}
 
     def open(self):
-        self.uuid = str(uuid.uuid4())
+        self.replaced = False
+        session = self.get_secure_cookie("session")
+        self.uuid = tornado.escape.to_basestring(session) if session else str(uuid.uuid4())
+        for soc in list(PokerWebSocketHandler.sockets):
+            if soc.uuid != self.uuid: continue
+            if global_game_manager.get_human_player_info(self.uuid):
+                self._take_over_session(soc)
+            else:
+                # another tab of a spectator
+                self.uuid = str(uuid.uuid4())
         PokerWebSocketHandler.sockets.add(self)
+        if self.uuid in PokerWebSocketHandler.seat_holds:
+            tornado.ioloop.IOLoop.current().remove_timeout(PokerWebSocketHandler.seat_holds.pop(self.uuid))
+        global_game_manager.return_human_player(self.uuid)
+        if PokerWebSocketHandler.waiting_progress is not None:
+            method_name, PokerWebSocketHandler.waiting_progress = PokerWebSocketHandler.waiting_progress, None
+            self._call_later(0, method_name)
+
+    def _take_over_session(self, soc):
+        # the player opened the game again, the old socket is told not to reconnect
+        soc.replaced = True
+        PokerWebSocketHandler.sockets.discard(soc)
+        try:
+            soc.write_message({'message_type': 'session_replaced'})
+            soc.close()
+        except tornado.websocket.WebSocketClosedError:
+            pass
 
     def on_close(self):
-        PokerWebSocketHandler.sockets.remove(self)
+        PokerWebSocketHandler.sockets.discard(self)
+        if self.replaced: return
         if global_game_manager.get_human_player_info(self.uuid):
-            global_game_manager.remove_human_player_info(self.uuid)
-            MM.broadcast_config_update(self, global_game_manager, self.sockets)
+            # the seat waits for the player to reconnect
+            global_game_manager.hold_human_player(self.uuid)
+            PokerWebSocketHandler.seat_holds[self.uuid] = tornado.ioloop.IOLoop.current().call_later(
+                    global_game_manager.seat_hold_timeout, PokerWebSocketHandler._release_seat, self.uuid)
+
+    @classmethod
+    def _release_seat(cls, uuid):
+        cls.seat_holds.pop(uuid, None)
+        global_game_manager.release_human_player(uuid)
+        if global_game_manager.is_playing_poker and global_game_manager.next_player_uuid == uuid:
+            # the game was waiting for the player
+            cls._run_on_open_socket("_progress_the_game_till_human")
+        elif not global_game_manager.is_playing_poker and len(cls.sockets) != 0:
+            MM.broadcast_config_update(next(iter(cls.sockets)), global_game_manager, cls.sockets)
 
     def on_connection_close(self):
         print(f"Connection closed: {self.uuid}")
+        super(PokerWebSocketHandler, self).on_connection_close()
 
     def on_message(self, message):
         js = tornado.escape.json_decode(message)
@@ -76,85 +134,165 @@ class PokerWebSocketHandler(tornado.websocket.WebSocketHandler):
             if global_game_manager.is_playing_poker:
                 MM.alert_server_restart(self, self.uuid, self.sockets)
             else:
-                global_game_manager.start_game()
-                MM.broadcast_start_game(self, global_game_manager, self.sockets)
-                MM.broadcast_update_game(self, global_game_manager, self.sockets, MODE_SPEED)
-                if self._is_next_player_ai(global_game_manager):
-                    self._progress_the_game_till_human()
+                self._start_game()
         elif 'action_declare_action' == message_type:
-            if self.uuid == global_game_manager.next_player_uuid:
+            # an action sent for an older ask (ex. double click, resent after reconnect) is ignored
+            if self.uuid == global_game_manager.next_player_uuid and \
+                    js.get('step') == global_game_manager.engine.step:
                 action, amount = self._correct_action(js)
                 global_game_manager.update_game(action, amount)
-                MM.broadcast_update_game(self, global_game_manager, self.sockets, MODE_SPEED)
-                if self._is_next_player_ai(global_game_manager):
+                MM.broadcast_update_game(self, global_game_manager, self.sockets)
+                self._progress_the_game_till_human()
+        elif 'action_toggle_pause' == message_type:
+            # spectators cannot pause the table
+            if self._is_seated():
+                if not global_game_manager.pacing.toggle_pause():
                     self._progress_the_game_till_human()
+                MM.broadcast_game_state(global_game_manager, self.sockets)
+        elif 'action_resync' == message_type:
+            MM.send_resync(self, global_game_manager, self, js.get('last_seq'))
+        elif 'action_set_speed' == message_type:
+            # spectators and unknown modes do not change the speed of the table
+            if self._is_seated() and js.get('speed') in Pacing.WAIT_INTERVALS:
+                global_game_manager.pacing.set_mode(js['speed'])
+                MM.broadcast_game_state(global_game_manager, self.sockets)
         else:
             raise Exception("Unexpected message [ %r ] received" % message)
 
+    def _is_seated(self):
+        return global_game_manager.get_human_player_info(self.uuid) is not None
+
+    def _start_game(self):
+        global_game_manager.start_next_game()
+        MM.broadcast_start_game(self, global_game_manager, self.sockets)
+        MM.broadcast_game_state(global_game_manager, self.sockets)
+        MM.broadcast_update_game(self, global_game_manager, self.sockets)
+        self._progress_the_game_till_human()
+
+    def _rematch_if_finished(self):
+        if global_game_manager.auto_rematch and not global_game_manager.is_playing_poker:
+            # let browsers show the result before the next game starts
+            self._call_later(global_game_manager.pacing.delay(), "_start_game")
+
     def _correct_action(self, data):
         try:
-            data["amount"] = int(data["amount"])
+            amount = int(data["amount"])
         except:
-            data["amount"] = -1
-        players = global_game_manager.engine.current_state["table"].seats.players
-        next_player_pos = global_game_manager.engine.current_state["next_player"]
-        sb_amount = global_game_manager.engine.current_state["small_blind_amount"]
-        actions = AU.generate_legal_actions(players, next_player_pos, sb_amount)
-
-        if data["action"] == "fold":
-            data["amount"] = 0
-        elif data["action"] == "call":
-            data["amount"] = actions[1]["amount"]
-        else:
-            legal = actions[2]["amount"]
-            if legal["min"] <= data["amount"] <= legal["max"]:
-                data["amount"] = data["amount"]
-            else:
-                data["action"] = "fold"
-                data["amount"] = 0
-        return data["action"], data["amount"]
+            amount = -1
+        legal_actions = global_game_manager.engine.legal_actions
+        return Engine.correct_action(legal_actions, data["action"], amount)
 
     def _progress_the_game_till_human(self):
+        # the game runs ahead of browsers till pacing policy asks to wait for them
+        PokerWebSocketHandler._cancel_pending_progress()
         while self._is_next_player_ai(global_game_manager):
             if GM.has_game_finished(global_game_manager.latest_messages): break
+            delay = global_game_manager.pacing.delay()
+            if delay is None: return  # paused, progressed again on resume
+            if delay > 0:
+                self._call_later(delay, "_progress_the_game_till_human")
+                return
+            if global_game_manager.fast_forward and not global_game_manager.has_human_in_hand():
+                self._fast_forward_hand()
+                continue
+            action, amount = global_game_manager.ask_action_to_ai_player(
+                global_game_manager.next_player_uuid)
+            global_game_manager.update_game(action, amount)
+            MM.broadcast_update_game(self, global_game_manager, self.sockets)
+        self._rematch_if_finished()
+
+    def _fast_forward_hand(self):
+        # nobody in browsers decides in this hand, so AI players play it out
+        # without pacing and browsers receive a summary of the actions
+        game_updates = []
+        while self._is_next_player_ai(global_game_manager):
             action, amount = global_game_manager.ask_action_to_ai_player(
                 global_game_manager.next_player_uuid)
             global_game_manager.update_game(action, amount)
-            MM.broadcast_update_game(self, global_game_manager, self.sockets, MODE_SPEED)
+            MM.broadcast_update_to_ai(global_game_manager, global_game_manager.latest_updates)
+            game_updates.extend(global_game_manager.latest_updates)
+            if any(['round_result_message' == update.message_type
+                    for update in global_game_manager.latest_updates]): break
+        MM.broadcast_fast_forward(self, global_game_manager, self.sockets, game_updates)
+
+    def _call_later(self, delay, method_name):
+        if delay is None: return  # paused
+        PokerWebSocketHandler._cancel_pending_progress()
+        PokerWebSocketHandler.pending_progress = tornado.ioloop.IOLoop.current().call_later(
+                delay, PokerWebSocketHandler._run_on_open_socket, method_name)
+
+    @classmethod
+    def _run_on_open_socket(cls, method_name):
+        # this socket may be closed by now and a closed handler cannot render templates,
+        # so the method runs on any open socket, or when a browser connects again
+        cls.pending_progress = None
+        if len(cls.sockets) == 0:
+            cls.waiting_progress = method_name
+            return
+        getattr(next(iter(cls.sockets)), method_name)()
+
+    @classmethod
+    def _cancel_pending_progress(cls):
+        if cls.pending_progress is not None:
+            tornado.ioloop.IOLoop.current().remove_timeout(cls.pending_progress)
+            cls.pending_progress = None
 
     def _is_next_player_ai(self, game_manager):
         uuid = game_manager.next_player_uuid
-        return uuid and len(uuid) <= 2
+        # seats left by humans are played like AI players till the game ends
+        return uuid and (len(uuid) <= 2 or uuid in game_manager.away_players)
 
 
-MODE_SPEED = "moderate"
 global_game_manager = GM.GameManager()
 
 
 def setup_config(config):
-    global_game_manager.define_rule(
-        config['max_round'], config['initial_stack'], config['small_blind'],
-        config['ante'], config['blind_structure']
-    )
-    for player in config['ai_players']:
-        global_game_manager.join_ai_player(player['name'], player['path'])
-
-
-def start_server(config_path, port, speed):
-    global MODE_SPEED
-    print(config_path)
-    with open(config_path, "rb") as f:
-        config = yaml.load(f, Loader=yaml.SafeLoader)
+    """"config" is a GameConfig of config_builder, its rules are shared and not copied"""
+    global_game_manager.set_rule(config.rules)
+    global_game_manager.auto_rematch = config.auto_rematch
+    global_game_manager.fast_forward = config.fast_forward
+    global_game_manager.seat_hold_timeout = config.seat_hold_timeout
+    for player in config.ai_players:
+        global_game_manager.join_ai_player(player.name, player.path, player.pin)
+        # import scripts now (cached when checked in this process), so the first game
+        # starts warm and pinned seats keep this version
+        if AG.healthcheck(player.path, quiet=True) and player.pin:
+            AG.load_setup_method(player.path, pinned=True)
+
+
+def reload_modified_ai_scripts():
+    # players of the running game keep their version, changed scripts are loaded between games
+    if global_game_manager.is_playing_poker: return
+    paths = [member["setup_script_path"] for member in global_game_manager.members_info
+            if member["type"] == "ai"]
+    for path in AG.find_modified_scripts(paths):
+        AG.healthcheck(path)
+
+
+def start_server(config, port, speed, reload_interval=1.0):
+    listen_table(config, port, speed, reload_interval)
+    tornado.ioloop.IOLoop.current().start()
+
+
+def listen_table(config, port, speed, reload_interval=1.0, table_id=1):
+    """"config" is compiled by config_builder.load_config, "table_id" is given by the cluster"""
     setup_config(config)
-    MODE_SPEED = speed
+    global_game_manager.pacing = Pacing.PacingPolicy(speed)
     app = Application()
+    # this server is the only table of its own lobby, listed with the id the cluster lobby knows it by
+    def publish_status(game_manager):
+        app.lobby.update_table(dict(GM.gen_table_status(game_manager), table_id=table_id, port=port))
+    global_game_manager.status_listeners.append(publish_status)
+    publish_status(global_game_manager)
     app.listen(port)
-    tornado.ioloop.IOLoop.current().start()
+    if reload_interval > 0:
+        tornado.ioloop.PeriodicCallback(reload_modified_ai_scripts, reload_interval * 1000).start()
+    return app
 
 
 def main():
     tornado.options.parse_command_line()
-    start_server(options.config, options.port, options.speed)
+    start_server(Config.check_ai_players(Config.load_config(options.config)), options.port, options.speed, options.reload_interval)
 
 
 if __name__ == '__main__':
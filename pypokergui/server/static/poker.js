@@ -15,9 +15,20 @@ $(document).ready(function() {
         startGame();
     });
 
-    $("#pause_button").on("click", function() {
+    // result of the game is rendered after the page is loaded
+    $(document).on("submit", "#next_game_form", function(e) {
+        e.preventDefault();
+        startGame();
+    });
+
+    // game controls are rendered after the page is loaded
+    $(document).on("click", "#pause_button", function() {
         togglePause();
     });
+
+    $(document).on("change", "#speed_select", function() {
+        setSpeed($(this).val());
+    });
   
     updater.start();
 });
@@ -44,13 +55,31 @@ function startGame() {
     updater.socket.send(JSON.stringify(message));
 }
 
+/*
+ * Callback functions invoked from the game controls.
+ * Pace of the game is held by the server, so that every browser follows it.
+ */
+function togglePause() {
+    updater.togglePause();
+}
+
+function setSpeed(speed) {
+    var message = {
+        'type': "action_set_speed",
+        'speed': speed
+    };
+    updater.socket.send(JSON.stringify(message));
+}
+
 /*
  * Callback function invoked when
  * human player declared his action in the game.
  */
 function declareAction(form) {
+  updater.waitingForAction = false
   var message = form.formToDict();
   message['type'] = "action_declare_action"
+  message['step'] = updater.step
   updater.socket.send(JSON.stringify(message))
 }
 
@@ -72,23 +101,48 @@ jQuery.fn.formToDict = function() {
  */
 var updater = {
     socket: null,
+    queue: [],
+    timer: null,
+    isPaused: false,
+    pausedAt: null,
+    waitingForAction: false,
+    step: null,
+    lastSeq: null,
+    replaced: false,
+    retryDelay: 1000,
 
     /*
      *  This method is invoked when index page is opened.
      *  Setup websocket and register callback method on it.
      *  URL would be "ws://localhost/pokersocket:8888".
+     *  When the socket closes, it connects again and asks the server for
+     *  what it missed ("lastSeq" is the last game update it received).
      */
     start: function() {
         var scheme = location.protocol === "https:" ? "wss://" : "ws://";
         var url = scheme + location.host + "/pokersocket";
         console.log("Connecting to WebSocket at: " + url);
         updater.socket = new WebSocket(url);
+        updater.socket.onopen = function() {
+            updater.retryDelay = 1000;
+            updater.socket.send(JSON.stringify({
+                'type': "action_resync",
+                'last_seq': updater.lastSeq
+            }));
+        };
+        updater.socket.onclose = function() {
+            if (updater.replaced) return;
+            setTimeout(updater.start, updater.retryDelay);
+            updater.retryDelay = Math.min(updater.retryDelay * 2, 10000);
+        };
         updater.socket.onmessage = function(event) {
             var message = JSON.parse(event.data);
             console.log("Received message:", message);
             
             if (message.message_type === 'game_state_update') {
                 console.log("Game state update:", message.is_paused);
+                updater.setPaused(message.is_paused)
+                $("#speed_select").val(message.speed)
                 if (message.is_paused) {
                     $("#pause_button").text("Resume Game").removeClass("btn-warning").addClass("btn-success");
                     $("#declare_action_form").hide();
@@ -101,9 +155,13 @@ var updater = {
             } else if ('config_update' == message['message_type']) {
               updater.updateConfig(message)
             } else if ('start_game' == message['message_type']) {
-              updater.startGame(message)
-            } else if ('update_game' == message['message_type']) {
-              updater.updateGame(message)
+              updater.enqueue(message)
+            } else if ('update_game' == message['message_type'] || 'resync' == message['message_type']) {
+              if (message.seq) updater.lastSeq = message.seq
+              updater.enqueue(message)
+            } else if ('session_replaced' == message['message_type']) {
+              updater.replaced = true
+              alert("The game was opened in another window.")
             } else if ('alert_restart_server' == message['message_type']) {
               updater.alert_restart_server(message)
             } else {
@@ -112,6 +170,55 @@ var updater = {
         }
     },
 
+    /*
+     * Game messages are played back in order at the time scheduled by the server.
+     * "display_at" and "sent_at" are server times, so the delay is measured
+     * from the arrival of the message and clocks need not to be synchronized.
+     */
+    enqueue: function(message) {
+        var delay = (message.display_at || 0) - (message.sent_at || 0);
+        message.local_display_at = Date.now() + Math.max(0, delay);
+        updater.queue.push(message);
+        updater.playQueue();
+    },
+
+    playQueue: function() {
+        if (updater.timer !== null || updater.isPaused) return;
+        while (updater.queue.length > 0) {
+            var wait = updater.queue[0].local_display_at - Date.now();
+            if (wait > 0) {
+                updater.timer = setTimeout(function() {
+                    updater.timer = null;
+                    updater.playQueue();
+                }, wait);
+                return;
+            }
+            var message = updater.queue.shift();
+            if ('start_game' == message['message_type']) {
+                updater.startGame(message)
+            } else if ('resync' == message['message_type']) {
+                updater.resync(message)
+            } else {
+                updater.updateGame(message)
+            }
+        }
+    },
+
+    setPaused: function(isPaused) {
+        if (isPaused && !updater.isPaused) {
+            updater.pausedAt = Date.now();
+            clearTimeout(updater.timer);
+            updater.timer = null;
+        } else if (!isPaused && updater.isPaused) {
+            var pausedFor = Date.now() - updater.pausedAt;
+            updater.queue.forEach(function(message) {
+                message.local_display_at += pausedFor;
+            });
+        }
+        updater.isPaused = isPaused;
+        updater.playQueue();
+    },
+
     /*
      * Invoked when received the new message
      * about update of config like new member is registered.
@@ -144,6 +251,7 @@ var updater = {
      */
     updateGame: function(message) {
         $("#declare_action_form").hide()
+        updater.waitingForAction = false
         content = message['content']
         window.console.log("updateGame: " + JSON.stringify(content))
         message_type = content['update_type']
@@ -154,11 +262,15 @@ var updater = {
           updater.newStreet(content.table_html, content.event_html)
         } else if ('game_update_message' == message_type) {
           updater.newAction(content.table_html, content.event_html)
+        } else if ('fast_forward_message' == message_type) {
+          updater.newAction(content.table_html, content.event_html)
        } else if ('round_result_message' == message_type) {
          updater.roundResult(content.table_html, content.event_html)
        } else if ('game_result_message' == message_type) {
          updater.gameResult(content.event_html)
        } else if ('ask_message' == message_type) {
+         updater.waitingForAction = true
+         updater.step = content.step
          $("#declare_action_form").show()
          updater.askAction(content.table_html, content.event_html)
        } else {
@@ -166,6 +278,17 @@ var updater = {
        }
     },
 
+    /*
+     * Invoked after reconnection with the table now and the events missed.
+     */
+    resync: function(message) {
+      if (message.table_html) $("#table").html($(message.table_html))
+      $("#event_box").html($(message.event_htmls.join("")))
+      updater.waitingForAction = message.ask
+      updater.step = message.step
+      $("#declare_action_form").toggle(message.ask)
+    },
+
     roundStart: function(event_html) {
       $("#event_box").html($(event_html))
     },
@@ -208,8 +331,6 @@ var updater = {
 };
 
 function isPlayerTurn() {
-    // This is a placeholder - you'll need to implement the actual logic
-    // based on your game state
-    return $("#declare_action_form").is(":visible");
+    return updater.waitingForAction;
 }
 
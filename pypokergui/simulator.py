@@ -0,0 +1,83 @@
+import time
+
+import pypokergui.engine_wrapper as Engine
+import pypokergui.server.game_manager as GM
+import pypokergui.server.game_update as GU
+import pypokergui.server.message_manager as MM
+
+"""Run games between AI players without a browser.
+    Messages are routed to the AI players exactly like the server does,
+    so a headless game follows the same rules as a game played on the GUI.
+"""
+
+def setup_game_manager(rule, ai_players):
+    """"rule" is a GameRules of engine_wrapper (shared as it is) or a dict of its keys"""
+    game_manager = GM.GameManager()
+    if isinstance(rule, Engine.GameRules):
+        game_manager.set_rule(rule)
+    else:
+        game_manager.define_rule(
+                rule['max_round'], rule['initial_stack'], rule['small_blind'],
+                rule['ante'], rule['blind_structure'])
+    for name, setup_script_path in ai_players:
+        game_manager.join_ai_player(name, setup_script_path)
+    return game_manager
+
+def play_game(game_manager, initial_stacks=None):
+    """Play a whole game with AI players only.
+        Yields a "round" event for each finished round and a final "game" event.
+    """
+    game_start = time.time()
+    # engine and AI players of the previous game (if any) are reused
+    game_manager.start_next_game(initial_stacks)
+    game_info = MM._gen_game_info(game_manager)
+    if initial_stacks:
+        for seat in game_info["seats"]:
+            seat["stack"] = initial_stacks[seat["uuid"]]
+    for uuid, player in game_manager.ai_players.items():
+        player.receive_game_start_message(game_info)
+        player.set_uuid(uuid)
+
+    round_start = time.time()
+    while True:
+        for game_update in game_manager.latest_updates:
+            _broadcast_message_to_ai(game_manager, game_update)
+            if 'round_result_message' == game_update.message_type:
+                now = time.time()
+                yield _gen_round_event(game_update.message, now - round_start)
+                round_start = now
+            elif 'game_result_message' == game_update.message_type:
+                yield _gen_game_event(game_update.message, time.time() - game_start)
+        if GM.has_game_finished(game_manager.latest_messages): break
+        action, amount = game_manager.ask_action_to_ai_player(game_manager.next_player_uuid)
+        game_manager.update_game(action, amount)
+
+def _broadcast_message_to_ai(game_manager, game_update):
+    if game_update.is_broadcast():
+        for ai_player in game_manager.ai_players.values():
+            GU.dispatch_to_ai(ai_player, game_update)
+    else:
+        GU.dispatch_to_ai(game_manager.ai_players[game_update.destination], game_update)
+
+def _gen_round_event(message, elapsed):
+    return {
+            "type": "round",
+            "round_count": message['round_count'],
+            "stacks": _fetch_stacks(message['round_state']['seats']),
+            "winners": [winner['uuid'] for winner in message['winners']],
+            "elapsed": elapsed
+            }
+
+def _gen_game_event(message, elapsed):
+    seats = message['game_information']['seats']
+    stacks = _fetch_stacks(seats)
+    return {
+            "type": "game",
+            "stacks": stacks,
+            "winner": max(stacks, key=stacks.get),
+            "elapsed": elapsed
+            }
+
+def _fetch_stacks(seats):
+    return { seat['uuid']: seat['stack'] for seat in seats }
+
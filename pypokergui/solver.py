@@ -0,0 +1,561 @@
+import json
+import multiprocessing
+import os
+import random
+
+import numpy as np
+
+from pypokerengine.players import BasePokerPlayer
+
+import pypokergui.engine_wrapper as Engine
+import pypokergui.utils.card_buckets as CB
+import pypokergui.utils.hand_eval as HE
+import pypokergui.utils.range_equity as RE
+
+"""Counterfactual regret minimization for an abstracted game of the project's rules.
+    The abstract game keeps the blinds, ante and initial stack of the rule
+    and the number of players, but bets only the sizes of RAISE_SIZES (pot
+    fractions, plus all-in) in no-limit or fixed bets in limit, at most
+    "max_raises" times per street. Cards are abstracted to "bucket_num"
+    buckets of hand strength per street (percentile of the hand against
+    every other hand on the board), or to the buckets of precomputed
+    card_buckets tables, and the buckets of earlier streets are forgotten.
+    Training is external sampling MCCFR with regret matching+ and a linear
+    average. Regrets and strategy sums are arrays with one row per (decision
+    node, bucket), memory-mapped in the checkpoint directory, so training
+    can be resumed. Worker processes load them from the files, traverse
+    their own deals and send back the change of the arrays, merged and
+    saved every "round_iterations" iterations.
+    PolicyPlayer plays the average strategy; write_bot() generates its
+    setup_ai script.
+"""
+
+STREETS = ["preflop", "flop", "turn", "river"]
+DECISION, FOLDED, SHOWDOWN, CHANCE = range(4)  # chance nodes deal the next street
+FOLD, CALL, RAISE = "fold", "call", "raise"
+RAISE_SIZES = (0.5, 1.0)
+MAX_RAISES = 2
+LIMIT_MAX_RAISES = 3
+BUCKET_NUM = 8
+HS_SAMPLES = 32  # opponent hands sampled to estimate hand strength while training
+DEAL_BATCH = 512
+ROUND_ITERATIONS = 2000  # iterations between merges of workers and checkpoints
+CHECKPOINT_FILES = ["solver.json", "regrets.npy", "strategy.npy", "preflop.npy"]
+
+class GameTree(object):
+    """Betting tree of the abstract game. Nodes are indexes of flat lists."""
+
+    def __init__(self, player_num, initial_stack, small_blind, ante=0,
+            raise_sizes=RAISE_SIZES, max_raises=MAX_RAISES, limit=False):
+        assert 2 <= player_num <= 10
+        self.player_num = player_num
+        self.stack = initial_stack
+        self.big_blind = 2 * small_blind
+        self.raise_sizes = raise_sizes
+        self.max_raises = max_raises
+        self.limit = limit
+        self.kinds, self.players, self.streets, self.children, self.actions = [], [], [], [], []
+        self.pots, self.to_calls, self.max_bets = [], [], []
+        self.decisions = []  # node -> index of decision node (row block of the regret table), -1 if terminal
+        self.terminal_values = []  # node -> (contributions, active players) of terminal nodes
+        self.fold_utilities = {}
+        self.decision_num = 0
+        n = player_num
+        contrib = [ante] * n
+        contrib[0] += small_blind
+        contrib[1 % n] += self.big_blind
+        contrib = [min(amount, initial_stack) for amount in contrib]
+        street_bets = [0] * n
+        street_bets[0], street_bets[1 % n] = small_blind, self.big_blind
+        # like pypokerengine, the big blind has no option when nobody raised
+        pending = [(2 + k) % n for k in range(n - 1)]
+        self.root = self._build(0, contrib, street_bets, [False] * n, pending, 0, self.big_blind)
+        self.max_actions = max(len(children) for children in self.children)
+
+    def _build(self, street, contrib, street_bets, folded, pending, raises, min_raise):
+        node = len(self.kinds)
+        for values in [self.kinds, self.players, self.streets, self.children, self.actions,
+                self.pots, self.to_calls, self.max_bets, self.decisions, self.terminal_values]:
+            values.append(None)
+        self.streets[node] = street
+        self.pots[node] = sum(contrib)
+        self.children[node], self.actions[node] = [], []
+        self.decisions[node] = -1
+        alive = [p for p in range(self.player_num) if not folded[p]]
+        if len(alive) == 1 or len(pending) == 0:
+            self._build_street_end(node, street, contrib, folded, alive)
+            return node
+        actor = pending[0]
+        max_bet = max(street_bets)
+        to_call = min(max_bet - street_bets[actor], self.stack - contrib[actor])
+        self.kinds[node], self.players[node] = DECISION, actor
+        self.to_calls[node], self.max_bets[node] = to_call, max_bet
+        self.decisions[node] = self.decision_num
+        self.decision_num += 1
+        branches = []
+        if to_call > 0:
+            branches.append((FOLD, 0))
+        branches.append((CALL, to_call))
+        for raise_to in self._gen_raises(street, contrib, street_bets, actor, max_bet, to_call, raises, min_raise):
+            branches.append((RAISE, raise_to))
+        for action, amount in branches:
+            c, s, f, p = list(contrib), list(street_bets), list(folded), list(pending[1:])
+            next_raises, next_min_raise = raises, min_raise
+            if action == FOLD:
+                f[actor] = True
+            elif action == CALL:
+                c[actor] += amount
+                s[actor] += amount
+            else:
+                c[actor] += amount - s[actor]
+                s[actor] = amount
+                next_raises, next_min_raise = raises + 1, max(min_raise, amount - max_bet)
+                # every other player able to act has to answer the raise
+                p = [(actor + k) % self.player_num for k in range(1, self.player_num)]
+                p = [q for q in p if not f[q] and c[q] < self.stack]
+            self.actions[node].append((action, amount))
+            self.children[node].append(self._build(street, c, s, f, p, next_raises, next_min_raise))
+        return node
+
+    def _build_street_end(self, node, street, contrib, folded, alive):
+        can_act = [p for p in alive if contrib[p] < self.stack]
+        if len(alive) == 1:
+            self.kinds[node] = FOLDED
+        elif street == len(STREETS) - 1 or len(can_act) <= 1:
+            self.kinds[node] = SHOWDOWN
+        else:
+            # the street is over, the children is the first decision of the next street
+            self.kinds[node] = CHANCE
+            pending = [p for p in range(self.player_num) if p in can_act]
+            self.children[node].append(self._build(street + 1, contrib, [0] * self.player_num, folded,
+                pending, 0, self.big_blind))
+            return
+        active = tuple(not f for f in folded)
+        self.terminal_values[node] = (tuple(contrib), active)
+        if self.kinds[node] == FOLDED:  # known before the cards are
+            self.fold_utilities[node] = self.utility(node, None)
+
+    def _gen_raises(self, street, contrib, street_bets, actor, max_bet, to_call, raises, min_raise):
+        all_in = street_bets[actor] + self.stack - contrib[actor]
+        if raises >= self.max_raises or all_in <= max_bet:
+            return []
+        if self.limit:
+            bet = self.big_blind if street < 2 else 2 * self.big_blind
+            return [min(max_bet + bet, all_in)]
+        pot = sum(contrib) + to_call
+        sizes = [max_bet + max(int(size * pot), min_raise) for size in self.raise_sizes]
+        return sorted(set([min(size, all_in) for size in sizes] + [all_in]))
+
+    def utility(self, node, scores):
+        """Chips won by each player at the terminal node, showdown decided by scores"""
+        contrib, active = self.terminal_values[node]
+        pot = sum(contrib)
+        if self.kinds[node] == FOLDED:
+            winners = [p for p in range(self.player_num) if active[p]]
+        else:
+            best = max(scores[p] for p in range(self.player_num) if active[p])
+            winners = [p for p in range(self.player_num) if active[p] and scores[p] == best]
+        share = float(pot) / len(winners)
+        return [(share if p in winners else 0.0) - contrib[p] for p in range(self.player_num)]
+
+def gen_tree(meta):
+    rule = meta["rule"]
+    return GameTree(meta["player_num"], rule["initial_stack"], rule["small_blind"], rule["ante"],
+            tuple(meta["raise_sizes"]), meta["max_raises"], meta["limit"])
+
+def gen_preflop_strengths(samples=1000, seed=0):
+    """Return percentile of every combo of range_equity.COMBOS by its equity against a random hand"""
+    equities, classes = np.zeros(len(RE.COMBOS)), {}
+    for idx, (a, b) in enumerate(RE.COMBOS.tolist()):
+        high, low = max(a, b), min(a, b)
+        key = (high >> 2, low >> 2, (a & 3) == (b & 3))
+        if key not in classes:
+            classes[key] = RE.estimate_equity([high, low], [], samples=samples, seed=seed)[0]
+        equities[idx] = classes[key]
+    order = np.argsort(equities, kind="stable")
+    percentiles = np.empty(len(equities))
+    percentiles[order] = (np.arange(len(equities)) + 0.5) / len(equities)
+    return percentiles.astype(np.float32)
+
+def hand_strength(hole, board):
+    """Share of the other hands the hand beats on the board (ties half), given as card ids"""
+    known = RE._to_mask(list(hole) + list(board))
+    villains = RE.COMBOS[(RE.COMBO_MASKS & np.uint64(known)) == 0]
+    scores = HE.evaluate(np.vstack([np.array([list(hole) + list(board)]), np.hstack(
+        [villains, np.broadcast_to(np.array(board, dtype=np.int32), (len(villains), len(board)))])]))
+    return float(np.mean((scores[0] > scores[1:]) + 0.5 * (scores[0] == scores[1:])))
+
+def bucket_of(strength, bucket_num):
+    return min(int(strength * bucket_num), bucket_num - 1)
+
+def deal_batch(player_num, preflop, bucket_num, rng, size=DEAL_BATCH, tables=None):
+    """Return (buckets (size, players, streets), showdown scores (size, players)) of random deals"""
+    cards = np.argsort(rng.random((size, 52)), axis=1).astype(np.int32)
+    holes = cards[:, :2 * player_num].reshape(size, player_num, 2)
+    board = cards[:, 2 * player_num:2 * player_num + 5]
+    buckets = np.zeros((size, player_num, len(STREETS)), dtype=np.int32)
+    if tables is not None:
+        for street, board_size in enumerate(CB.BOARD_SIZES):
+            buckets[:, :, street] = tables.buckets_of(holes.reshape(-1, 2),
+                    np.repeat(board[:, :board_size], player_num, axis=0)).reshape(size, player_num)
+    else:
+        _strength_buckets(buckets, holes, board, preflop, bucket_num, rng)
+    hands = np.concatenate([holes, np.broadcast_to(board[:, None, :], (size, player_num, 5))], axis=2)
+    scores = HE.evaluate(hands.reshape(-1, 7)).reshape(size, player_num)
+    return buckets, scores
+
+def _strength_buckets(buckets, holes, board, preflop, bucket_num, rng):
+    combo_idx = np.array([[RE.COMBO_INDEX[tuple(sorted(hole))] for hole in deal] for deal in holes.tolist()])
+    buckets[:, :, 0] = np.minimum((preflop[combo_idx] * bucket_num).astype(np.int32), bucket_num - 1)
+    for street, board_size in [(1, 3), (2, 4), (3, 5)]:
+        strengths = _sample_strengths(holes, board[:, :board_size], rng)
+        buckets[:, :, street] = np.minimum((strengths * bucket_num).astype(np.int32), bucket_num - 1)
+
+def _sample_strengths(holes, board, rng, samples=HS_SAMPLES):
+    size, player_num, _ = holes.shape
+    known = np.zeros((size, player_num, 52), dtype=bool)
+    rows = np.arange(size)[:, None]
+    for p in range(player_num):
+        known[rows, p, holes[:, p]] = True
+        known[rows, p, board] = True
+    # two distinct unknown cards per sampled opponent hand
+    noise = rng.random((size, player_num, samples, 52)) + known[:, :, None, :]
+    villains = np.argpartition(noise, 1, axis=3)[..., :2].astype(np.int32)
+    boards = np.broadcast_to(board[:, None, None, :], (size, player_num, samples, board.shape[1]))
+    villain_scores = HE.evaluate(np.concatenate([villains, boards], axis=3).reshape(-1, 2 + board.shape[1]))
+    own_scores = HE.evaluate(np.concatenate([holes, boards[:, :, 0, :]], axis=2).reshape(-1, 2 + board.shape[1]))
+    villain_scores = villain_scores.reshape(size, player_num, samples)
+    own_scores = own_scores.reshape(size, player_num, 1)
+    return ((own_scores > villain_scores) + 0.5 * (own_scores == villain_scores)).mean(axis=2)
+
+class Trainer(object):
+    """External sampling MCCFR on in-memory copies of the tables"""
+
+    def __init__(self, tree, regrets, strategy, preflop, bucket_num, seed=None, tables=None):
+        self.tree = tree
+        self.regrets = regrets
+        self.strategy = strategy
+        self.preflop = preflop
+        self.bucket_num = bucket_num
+        self.tables = tables
+        self.np_rng = np.random.default_rng(seed)
+        self.rng = random.Random(seed)
+
+    def run(self, iterations, first_iteration):
+        """Each iteration deals once and traverses the tree for every player"""
+        done = 0
+        while done < iterations:
+            buckets, scores = deal_batch(self.tree.player_num, self.preflop, self.bucket_num, self.np_rng,
+                    min(DEAL_BATCH, iterations - done), self.tables)
+            for deal_buckets, deal_scores in zip(buckets.tolist(), scores.tolist()):
+                weight = first_iteration + done + 1  # linear averaging
+                for player in range(self.tree.player_num):
+                    self._traverse(self.tree.root, deal_buckets, deal_scores, player, weight)
+                done += 1
+
+    def _traverse(self, node, buckets, scores, traverser, weight):
+        tree = self.tree
+        kind = tree.kinds[node]
+        if kind == FOLDED:
+            return tree.fold_utilities[node][traverser]
+        if kind == SHOWDOWN:
+            return tree.utility(node, scores)[traverser]
+        children = tree.children[node]
+        if kind == CHANCE:  # cards of every street are dealt in advance
+            return self._traverse(children[0], buckets, scores, traverser, weight)
+        player = tree.players[node]
+        row = tree.decisions[node] * self.bucket_num + buckets[player][tree.streets[node]]
+        action_num = len(children)
+        strategy = regret_matching(self.regrets[row, :action_num].tolist())
+        if player != traverser:
+            self.strategy[row, :action_num] += [weight * prob for prob in strategy]
+            action = _sample(strategy, self.rng.random())
+            return self._traverse(children[action], buckets, scores, traverser, weight)
+        values = [self._traverse(child, buckets, scores, traverser, weight) for child in children]
+        value = sum([prob * v for prob, v in zip(strategy, values)])
+        regrets = self.regrets[row, :action_num]
+        regrets += [v - value for v in values]
+        np.maximum(regrets, 0, out=regrets)  # regret matching+
+        return value
+
+def regret_matching(regrets):
+    positive = [r if r > 0 else 0.0 for r in regrets]
+    total = sum(positive)
+    if total <= 0: return [1.0 / len(regrets)] * len(regrets)
+    return [r / total for r in positive]
+
+def _sample(strategy, r):
+    for idx, prob in enumerate(strategy):
+        r -= prob
+        if r < 0: return idx
+    return len(strategy) - 1
+
+def create_checkpoint(checkpoint_dir, rule, player_num=2, bucket_num=BUCKET_NUM,
+        raise_sizes=RAISE_SIZES, max_raises=None, limit=False, card_buckets=None):
+    """Create tables of a new abstract game. "rule" is like gen_game_config().
+        "card_buckets" is a directory of card_buckets tables replacing "bucket_num" strength buckets.
+    """
+    rule = Engine.gen_game_config(1, rule["initial_stack"], rule["small_blind"], rule.get("ante", 0))
+    if card_buckets is not None:
+        card_buckets = os.path.abspath(card_buckets)
+        tables = CB.BucketTables(card_buckets)
+        missing = [street for street in STREETS if street not in tables.streets]
+        if missing:
+            raise Exception("Card buckets of [ %s ] miss streets %s" % (card_buckets, missing))
+        bucket_num = tables.bucket_num
+    meta = {
+            "rule": { key: rule[key] for key in ["initial_stack", "small_blind", "ante"] },
+            "player_num": player_num,
+            "bucket_num": bucket_num,
+            "raise_sizes": list(raise_sizes),
+            "max_raises": max_raises if max_raises is not None else (LIMIT_MAX_RAISES if limit else MAX_RAISES),
+            "limit": limit,
+            "card_buckets": card_buckets,
+            "iterations": 0
+            }
+    tree = gen_tree(meta)
+    if not os.path.isdir(checkpoint_dir): os.makedirs(checkpoint_dir)
+    shape = (tree.decision_num * bucket_num, tree.max_actions)
+    for name in ["regrets.npy", "strategy.npy"]:
+        table = np.lib.format.open_memmap(os.path.join(checkpoint_dir, name), mode="w+", dtype=np.float64, shape=shape)
+        table.flush()
+    np.save(os.path.join(checkpoint_dir, "preflop.npy"), gen_preflop_strengths())
+    _save_meta(checkpoint_dir, meta)
+    return meta
+
+def has_checkpoint(checkpoint_dir):
+    return all(os.path.exists(os.path.join(checkpoint_dir, name)) for name in CHECKPOINT_FILES)
+
+def load_meta(checkpoint_dir):
+    with open(os.path.join(checkpoint_dir, "solver.json"), "r") as f:
+        return json.load(f)
+
+def _save_meta(checkpoint_dir, meta):
+    path = os.path.join(checkpoint_dir, "solver.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def train(checkpoint_dir, iterations, processes=1, round_iterations=ROUND_ITERATIONS, seed=None, log=None):
+    """Run "iterations" more iterations on the checkpoint, saved every round"""
+    meta = load_meta(checkpoint_dir)
+    regrets = np.load(os.path.join(checkpoint_dir, "regrets.npy"), mmap_mode="r+")
+    strategy = np.load(os.path.join(checkpoint_dir, "strategy.npy"), mmap_mode="r+")
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    base_seed = seed if seed is not None else random.randrange(1 << 30)
+    try:
+        done = 0
+        while done < iterations:
+            round_size = min(round_iterations, iterations - done)
+            shares = [round_size // processes + (1 if k < round_size % processes else 0) for k in range(processes)]
+            first = meta["iterations"]
+            jobs = []
+            for k, share in enumerate(shares):
+                if share == 0: continue
+                jobs.append((checkpoint_dir, share, first, base_seed + first * processes + k))
+                first += share
+            results = pool.map(_train_job, jobs) if pool else [_train_job(job) for job in jobs]
+            for regret_delta, strategy_delta in results:
+                regrets += regret_delta
+                strategy += strategy_delta
+            np.maximum(regrets, 0, out=regrets)
+            regrets.flush()
+            strategy.flush()
+            meta["iterations"] += round_size
+            _save_meta(checkpoint_dir, meta)
+            done += round_size
+            if log: log("%d iterations" % meta["iterations"])
+    finally:
+        if pool: pool.close()
+    return meta
+
+def _train_job(job):
+    """Train on copies of the tables and return how much they changed"""
+    checkpoint_dir, iterations, first_iteration, seed = job
+    meta = load_meta(checkpoint_dir)
+    tree = _cached_tree(meta)
+    regrets = np.array(np.load(os.path.join(checkpoint_dir, "regrets.npy"), mmap_mode="r"))
+    strategy = np.zeros(regrets.shape)
+    initial_regrets = regrets.copy()
+    preflop = np.load(os.path.join(checkpoint_dir, "preflop.npy"))
+    tables = _cached_tables(meta.get("card_buckets"))
+    Trainer(tree, regrets, strategy, preflop, meta["bucket_num"], seed, tables).run(iterations, first_iteration)
+    return regrets - initial_regrets, strategy
+
+_trees = {}
+
+def _cached_tree(meta):
+    key = json.dumps({ k: v for k, v in meta.items() if k != "iterations" }, sort_keys=True)
+    if key not in _trees: _trees[key] = gen_tree(meta)
+    return _trees[key]
+
+_tables = {}
+
+def _cached_tables(table_dir):
+    if table_dir is None: return None
+    if table_dir not in _tables: _tables[table_dir] = CB.BucketTables(table_dir)
+    return _tables[table_dir]
+
+def average_policy(checkpoint_dir):
+    """Return the average strategy normalized per row, uniform on rows never reached"""
+    meta = load_meta(checkpoint_dir)
+    tree = _cached_tree(meta)
+    strategy = np.load(os.path.join(checkpoint_dir, "strategy.npy"), mmap_mode="r")
+    action_nums = np.zeros(len(strategy), dtype=np.int32)
+    for node, decision in enumerate(tree.decisions):
+        if decision >= 0:
+            action_nums[decision * meta["bucket_num"]:(decision + 1) * meta["bucket_num"]] = len(tree.children[node])
+    legal = np.arange(strategy.shape[1])[None, :] < action_nums[:, None]
+    totals = strategy.sum(axis=1, keepdims=True)
+    uniform = legal / np.maximum(action_nums[:, None], 1)
+    return np.where(totals > 0, strategy / np.where(totals > 0, totals, 1), uniform).astype(np.float32)
+
+BOT_TEMPLATE = '''"""Plays the policy trained by pypokergui.solver in %(checkpoint_dir)s
+    (%(player_num)d players, %(iterations)d iterations).
+"""
+from pypokergui.solver import PolicyPlayer
+
+CHECKPOINT_DIR = %(checkpoint_dir)r
+
+def setup_ai():
+    return PolicyPlayer(CHECKPOINT_DIR)
+'''
+
+def write_bot(checkpoint_dir, script_path):
+    """Save the average policy next to the tables and generate a setup_ai script playing it"""
+    checkpoint_dir = os.path.abspath(checkpoint_dir)
+    meta = load_meta(checkpoint_dir)
+    np.save(os.path.join(checkpoint_dir, "policy.npy"), average_policy(checkpoint_dir))
+    with open(script_path, "w") as f:
+        f.write(BOT_TEMPLATE % { "checkpoint_dir": checkpoint_dir, "player_num": meta["player_num"],
+            "iterations": meta["iterations"] })
+
+_policies = {}
+
+def load_policy(checkpoint_dir):
+    """Return (meta, tree, policy, preflop strengths, card buckets) shared by the players of the process"""
+    if checkpoint_dir not in _policies:
+        meta = load_meta(checkpoint_dir)
+        policy = np.load(os.path.join(checkpoint_dir, "policy.npy"), mmap_mode="r")
+        preflop = np.load(os.path.join(checkpoint_dir, "preflop.npy"))
+        _policies[checkpoint_dir] = (meta, gen_tree(meta), policy.tolist(), preflop,
+                _cached_tables(meta.get("card_buckets")))
+    return _policies[checkpoint_dir]
+
+class PolicyPlayer(BasePokerPlayer):
+    """Follows the abstract game along the real actions and samples the average strategy.
+        Real raises are mapped to the abstract raise of the closest pot fraction.
+        Off the tree (other player number, more raises than the abstraction) it calls.
+    """
+
+    def __init__(self, checkpoint_dir, rng=random.random):
+        super().__init__()
+        self.meta, self.tree, self.policy, self.preflop, self.tables = load_policy(checkpoint_dir)
+        self.rng = rng
+
+    def declare_action(self, valid_actions, hole_card, round_state):
+        node = self._find_node(round_state)
+        if node is None or self.tree.kinds[node] != DECISION:
+            return valid_actions[1]["action"], valid_actions[1]["amount"]
+        street = self.tree.streets[node]
+        hole, board = HE.card_ids(hole_card), HE.card_ids(round_state["community_card"])
+        row = self.tree.decisions[node] * self.meta["bucket_num"] + self._bucket(street, hole, board)
+        actions = self.tree.actions[node]
+        action, amount = actions[_sample(self.policy[row][:len(actions)], self.rng())]
+        return self._to_real_action(valid_actions, node, action, amount, round_state)
+
+    def _bucket(self, street, hole, board):
+        if self.tables is not None: return self.tables.bucket(hole, board)
+        if street == 0: strength = float(self.preflop[RE.COMBO_INDEX[tuple(sorted(hole))]])
+        else: strength = hand_strength(hole, board)
+        return bucket_of(strength, self.meta["bucket_num"])
+
+    def _to_real_action(self, valid_actions, node, action, amount, round_state):
+        raise_amount = valid_actions[2]["amount"]
+        if action == FOLD:
+            return "fold", 0
+        if action == CALL or raise_amount["min"] == -1:
+            return "call", valid_actions[1]["amount"]
+        # same pot fraction as the abstract raise, on the real pot
+        if not self.tree.limit and (action, amount) == self.tree.actions[node][-1]:
+            return "raise", raise_amount["max"]  # the last raise of no-limit nodes is the all-in
+        pot = round_state["pot"]["main"]["amount"] + sum(side["amount"] for side in round_state["pot"]["side"])
+        max_bet = valid_actions[1]["amount"]
+        to_call = max_bet - _street_paid(round_state, self.uuid)
+        raise_to = max_bet + int(self._raise_fraction(node, amount) * (pot + to_call))
+        return "raise", max(raise_amount["min"], min(raise_to, raise_amount["max"]))
+
+    def _raise_fraction(self, node, amount):
+        tree = self.tree
+        return float(amount - tree.max_bets[node]) / (tree.pots[node] + tree.to_calls[node])
+
+    def _find_node(self, round_state):
+        """Return the abstract node of the real action histories, None off the tree"""
+        seats = [seat for seat in round_state["seats"] if seat["state"] != "folded" or seat["stack"] > 0]
+        if len(seats) != self.tree.player_num: return None
+        sb_uuid = round_state["seats"][round_state["small_blind_pos"]]["uuid"]
+        uuids = [seat["uuid"] for seat in seats]
+        order = uuids[uuids.index(sb_uuid):] + uuids[:uuids.index(sb_uuid)]
+        players = { uuid: idx for idx, uuid in enumerate(order) }
+        node, pot = self.tree.root, 0
+        for street in STREETS[:STREETS.index(round_state["street"]) + 1]:
+            max_bet, paid = 0, {}
+            for history in round_state["action_histories"].get(street, []):
+                action, amount = history["action"], history.get("amount", 0)
+                if action == "ANTE":
+                    pot += amount
+                    continue
+                if action not in ("SMALLBLIND", "BIGBLIND"):
+                    node = self._skip_chance(node)
+                    if self.tree.kinds[node] != DECISION or self.tree.players[node] != players.get(history["uuid"]):
+                        return None
+                    to_call = max_bet - paid.get(history["uuid"], 0)
+                    node = self._follow(node, action, amount, float(amount - max_bet) / max(pot + to_call, 1))
+                    if node is None: return None
+                if action != "FOLD":
+                    pot += amount - paid.get(history["uuid"], 0)
+                    paid[history["uuid"]] = amount
+                    max_bet = max(max_bet, amount)
+        node = self._skip_chance(node)
+        if self.tree.kinds[node] != DECISION or self.tree.players[node] != players.get(self.uuid): return None
+        return node
+
+    def _skip_chance(self, node):
+        while self.tree.kinds[node] == CHANCE:
+            node = self.tree.children[node][0]
+        return node
+
+    def _follow(self, node, action, amount, fraction):
+        actions = self.tree.actions[node]
+        kinds = [kind for kind, _ in actions]
+        if action == "FOLD":
+            return self.tree.children[node][kinds.index(FOLD)] if FOLD in kinds else None
+        if action == "CALL":
+            return self.tree.children[node][kinds.index(CALL)]
+        # real raises are compared by pot fraction, the real pot differs from the abstract one
+        raises = [(abs(self._raise_fraction(node, raise_to) - fraction), idx)
+                for idx, (kind, raise_to) in enumerate(actions) if kind == RAISE]
+        if len(raises) == 0: return None
+        return self.tree.children[node][min(raises)[1]]
+
+    def receive_game_start_message(self, game_info):
+        pass
+
+    def receive_round_start_message(self, round_count, hole_card, seats):
+        pass
+
+    def receive_street_start_message(self, street, round_state):
+        pass
+
+    def receive_game_update_message(self, action, round_state):
+        pass
+
+    def receive_round_result_message(self, winners, hand_info, round_state):
+        pass
+
+def _street_paid(round_state, uuid):
+    paid = 0
+    for history in round_state["action_histories"].get(round_state["street"], []):
+        if history["uuid"] == uuid and history["action"] in ("CALL", "RAISE", "SMALLBLIND", "BIGBLIND"):
+            paid = history["amount"]
+    return paid
@@ -0,0 +1,148 @@
+import math
+import multiprocessing
+
+import pypokergui.engine_wrapper as Engine
+import pypokergui.simulator as Sim
+
+"""Headless multi-table tournament between AI players.
+    The tournament progresses by sessions. In a session every table plays
+    "hands_per_session" hands in parallel, then busted players are eliminated
+    and the remaining players are rebalanced across tables.
+    Blind levels are scheduled by the number of hands played in the tournament
+    and are precompiled into an array, so the level of any hand is O(1).
+"""
+
+class Tournament(object):
+
+    def __init__(self, entrants, initial_stack, small_blind, ante=0, blind_structure=None,
+            table_size=9, hands_per_session=10, max_hands=1000):
+        assert len(entrants) >= 2 and table_size >= 2 and hands_per_session > 0
+        self.entrants = [gen_entrant_info(entrant_id, name, path, initial_stack)
+                for entrant_id, (name, path) in enumerate(entrants)]
+        rule = Engine.gen_game_config(max_hands, initial_stack, small_blind, ante, blind_structure)
+        self.blind_levels = rule.blind_levels
+        self.initial_stack = initial_stack
+        self.table_size = table_size
+        self.hands_per_session = hands_per_session
+        self.max_hands = max_hands
+        self.hand_count = 0
+        self.tables = seat_players(list(range(len(entrants))), table_size)
+
+    def play(self, processes=1):
+        if processes > 1:
+            pool = multiprocessing.Pool(processes)
+            try:
+                while not self.has_finished():
+                    self.play_session(pool.map)
+            finally:
+                pool.close()
+        else:
+            while not self.has_finished():
+                self.play_session(map)
+        self._decide_remaining_places()
+        return self.standings()
+
+    def play_session(self, map_method=map):
+        jobs = [(self._gen_table_seats(table), self._gen_session_rule()) for table in self.tables]
+        for results in map_method(_play_table, jobs):
+            for entrant_id, stack in results:
+                self.entrants[entrant_id]["stack"] = stack
+        self.hand_count += self.hands_per_session
+        self._eliminate_busted_players()
+        self.tables = balance_tables(self.tables, self.table_size)
+
+    def has_finished(self):
+        return len(self.remaining_players()) <= 1 or self.hand_count >= self.max_hands
+
+    def remaining_players(self):
+        return [entrant for entrant in self.entrants if entrant["place"] is None]
+
+    def standings(self):
+        return sorted(self.entrants, key=lambda entrant: (entrant["place"] is None, entrant["place"]))
+
+    def current_blind_level(self):
+        return self.blind_levels[min(self.hand_count+1, self.max_hands)]
+
+    def _gen_table_seats(self, table):
+        return [(entrant_id, self.entrants[entrant_id]["name"], self.entrants[entrant_id]["path"],
+            self.entrants[entrant_id]["stack"]) for entrant_id in table]
+
+    def _gen_session_rule(self):
+        hands = min(self.hands_per_session, self.max_hands - self.hand_count)
+        blind_structure = {}
+        for round_count in range(1, hands+1):
+            level = self.blind_levels[min(self.hand_count+round_count, self.max_hands)]
+            if round_count == 1 or level != self.blind_levels[min(self.hand_count+round_count-1, self.max_hands)]:
+                blind_structure[round_count] = { 'small_blind': level[0], 'ante': level[1] }
+        # the engine finishes the game when it reaches "max_round", so one more round is needed
+        return Engine.gen_game_config(hands+1, self.initial_stack,
+                blind_structure[1]['small_blind'], blind_structure[1]['ante'], blind_structure)
+
+    def _eliminate_busted_players(self):
+        remaining_num = len(self.remaining_players())
+        busted = [entrant for entrant in self.remaining_players() if entrant["stack"] == 0]
+        # players busted in the same session are ranked by their stack at the start of the session
+        busted.sort(key=lambda entrant: entrant["session_start_stack"])
+        for idx, entrant in enumerate(busted):
+            entrant["place"] = remaining_num - idx
+            entrant["eliminated_hand"] = self.hand_count
+        busted_ids = set([entrant["id"] for entrant in busted])
+        self.tables = [[entrant_id for entrant_id in table if entrant_id not in busted_ids] for table in self.tables]
+        for entrant in self.remaining_players():
+            entrant["session_start_stack"] = entrant["stack"]
+
+    def _decide_remaining_places(self):
+        remaining = sorted(self.remaining_players(), key=lambda entrant: entrant["stack"], reverse=True)
+        for idx, entrant in enumerate(remaining):
+            entrant["place"] = idx + 1
+
+def seat_players(entrant_ids, table_size):
+    """Deal players to tables in round-robin order"""
+    table_num = _calc_table_num(len(entrant_ids), table_size)
+    tables = [[] for _ in range(table_num)]
+    for idx, entrant_id in enumerate(entrant_ids):
+        tables[idx % table_num].append(entrant_id)
+    return tables
+
+def balance_tables(tables, table_size):
+    """Break tables which are no longer needed and move players
+        till the numbers of players at tables differ at most by one.
+    """
+    tables = [table for table in tables if len(table) != 0]
+    if len(tables) == 0: return tables
+    table_num = _calc_table_num(sum([len(table) for table in tables]), table_size)
+    while len(tables) > table_num:
+        tables.sort(key=len)
+        broken_table = tables.pop(0)
+        for entrant_id in broken_table:
+            min(tables, key=len).append(entrant_id)
+    while True:
+        largest, smallest = max(tables, key=len), min(tables, key=len)
+        if len(largest) - len(smallest) <= 1: break
+        smallest.append(largest.pop())
+    return tables
+
+def gen_entrant_info(entrant_id, name, path, stack):
+    return {
+            "id": entrant_id,
+            "name": name,
+            "path": path,
+            "stack": stack,
+            "session_start_stack": stack,
+            "place": None,
+            "eliminated_hand": None
+            }
+
+def _calc_table_num(player_num, table_size):
+    # keep at least 2 players on every table
+    return max(1, min(int(math.ceil(1.0 * player_num / table_size)), player_num // 2))
+
+def _play_table(job):
+    seats, rule = job
+    game_manager = Sim.setup_game_manager(rule, [(name, path) for _, name, path, _ in seats])
+    initial_stacks = { str(idx): seat[3] for idx, seat in enumerate(seats) }
+    stacks = initial_stacks
+    for event in Sim.play_game(game_manager, initial_stacks):
+        stacks = event["stacks"]
+    return [(seat[0], stacks[str(idx)]) for idx, seat in enumerate(seats)]
+
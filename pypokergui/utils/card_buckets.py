@@ -0,0 +1,303 @@
+"""Card abstraction: buckets of (hole cards, board) precomputed on disk.
+    build_tables() groups the situations of every street in buckets of hands
+    playing alike, and BucketTables maps a situation to its bucket by a few
+    reads of memory-mapped arrays, without evaluating any hand.
+    Boards are indexed up to suit isomorphism. The canonical form of a board is
+    the smallest of its 24 suit permutations (sorted card ids read as a number),
+    and hole cards take the permutation of their board. Per street the
+    directory holds
+        <street>_rows.npy    : int32 (C(52, board size),) canonical row of every board, by colex index
+        <street>_perms.npy   : uint8, suit permutation of every board to its canonical form
+        <street>_buckets.npy : uint8 (canonical boards, 1326) bucket of every combo of
+                               range_equity.COMBOS, NO_BUCKET if it uses a board card
+        <street>_ehs.npy     : float32 (buckets,) expected hand strength of the buckets
+    Hand strength is the percentile of a hand among the hands left by a full
+    board. Features of a situation are the histogram of its hand strength over
+    runouts sampled per board (the strength itself on the river), averaged over
+    the suit permutations keeping the board, so isomorphic hands share their
+    bucket. Histograms are clustered by k-means on their cumulative sums, where
+    euclidean distance stands for earth mover's distance, and buckets are
+    numbered by increasing expected hand strength (EHS).
+"""
+import itertools
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+import pypokergui.utils.hand_eval as HE
+import pypokergui.utils.range_equity as RE
+
+STREETS = ["preflop", "flop", "turn", "river"]
+BOARD_SIZES = [0, 3, 4, 5]
+BUCKET_NUM = 32
+RUNOUTS = { "preflop": 510, "flop": 30, "turn": 15, "river": 1 }  # rounded up to RUNOUT_GROUP
+RUNOUT_GROUP = 3
+HIST_BINS = 16
+FIT_BOARDS = 400  # boards whose features fit the centers, drawn by their number of raw boards
+FIT_POINTS = 100000
+KMEANS_ITERATIONS = 30
+EVAL_BATCH = 400000  # hands evaluated at once
+NO_BUCKET = 255
+
+SUIT_PERMS = list(itertools.permutations(range(4)))
+PERM_CARDS = np.array([[(card & ~3) | perm[card & 3] for card in range(52)] for perm in SUIT_PERMS], dtype=np.int32)
+COMBO_OF_CARDS = np.full((52, 52), -1, dtype=np.int32)
+COMBO_OF_CARDS[RE.COMBOS[:, 0], RE.COMBOS[:, 1]] = np.arange(len(RE.COMBOS))
+COMBO_OF_CARDS[RE.COMBOS[:, 1], RE.COMBOS[:, 0]] = np.arange(len(RE.COMBOS))
+COMBO_PERMS = COMBO_OF_CARDS[PERM_CARDS[:, RE.COMBOS[:, 0]], PERM_CARDS[:, RE.COMBOS[:, 1]]]  # (24, 1326)
+BINOMIALS = np.array([[math.comb(n, k) for k in range(6)] for n in range(53)], dtype=np.int64)
+_PERM_CARDS = PERM_CARDS.tolist()
+_BINOMIALS = BINOMIALS.tolist()
+_COMBO_OF_CARDS = COMBO_OF_CARDS.tolist()
+
+class BucketTables(object):
+
+    def __init__(self, table_dir):
+        with open(os.path.join(table_dir, "buckets.json"), "r") as f:
+            self.meta = json.load(f)
+        self.bucket_num = self.meta["bucket_num"]
+        self.streets = self.meta["streets"]
+        self.rows, self.perms, self.buckets, self.ehs = {}, {}, {}, {}
+        for street in self.streets:
+            size = BOARD_SIZES[STREETS.index(street)]
+            load = lambda name: np.load(os.path.join(table_dir, "%s_%s.npy" % (street, name)), mmap_mode="r")
+            self.rows[size], self.perms[size], self.buckets[size] = load("rows"), load("perms"), load("buckets")
+            self.ehs[size] = np.load(os.path.join(table_dir, "%s_ehs.npy" % street))
+
+    def bucket(self, hole, board):
+        """Bucket of hole cards and board given as card ids"""
+        board = sorted(board)
+        idx = sum([_BINOMIALS[card][col + 1] for col, card in enumerate(board)])
+        perm = _PERM_CARDS[self.perms[len(board)][idx]]
+        return int(self.buckets[len(board)][self.rows[len(board)][idx], _COMBO_OF_CARDS[perm[hole[0]]][perm[hole[1]]]])
+
+    def buckets_of(self, holes, boards):
+        """Buckets of arrays of hole cards (n, 2) and boards (n, board size)"""
+        boards = np.asarray(boards)
+        size = boards.shape[1]
+        idx = colex_indices(boards)
+        perms = PERM_CARDS[self.perms[size][idx]]
+        holes = np.take_along_axis(perms, np.asarray(holes), axis=1)
+        return self.buckets[size][self.rows[size][idx], COMBO_OF_CARDS[holes[:, 0], holes[:, 1]]]
+
+def colex_indices(boards):
+    """Rank of every board (sets of card ids) among the boards of its size"""
+    boards = np.sort(np.asarray(boards, dtype=np.int64), axis=1)
+    return BINOMIALS[boards, np.arange(1, boards.shape[1] + 1)].sum(axis=1)
+
+def gen_board_index(board_size, chunk=200000):
+    """Return (canonical row and suit permutation of every board by colex index, canonical boards)"""
+    boards = np.array(list(itertools.combinations(range(52), board_size)), dtype=np.int32)
+    boards = boards.reshape(len(boards), board_size)
+    keys, perms = np.empty(len(boards), dtype=np.int64), np.empty(len(boards), dtype=np.uint8)
+    for start in range(0, len(boards), chunk):
+        permuted = _board_keys(boards[start:start + chunk])
+        perms[start:start + chunk] = permuted.argmin(axis=0)
+        keys[start:start + chunk] = permuted.min(axis=0)
+    canonical_keys, inverse = np.unique(keys, return_inverse=True)
+    idx = colex_indices(boards)
+    rows, board_perms = np.empty(len(boards), dtype=np.int32), np.empty(len(boards), dtype=np.uint8)
+    rows[idx], board_perms[idx] = inverse, perms
+    return rows, board_perms, _decode_keys(canonical_keys, board_size)
+
+def _board_keys(boards):
+    """Keys of the 24 suit permutations of boards, shape (24, boards)"""
+    permuted = np.sort(PERM_CARDS[:, boards], axis=2).astype(np.int64)
+    keys = np.zeros(permuted.shape[:2], dtype=np.int64)
+    for col in range(boards.shape[1]):
+        keys = keys * 52 + permuted[:, :, col]
+    return keys
+
+def _decode_keys(keys, board_size):
+    boards = np.zeros((len(keys), board_size), dtype=np.int32)
+    for col in reversed(range(board_size)):
+        boards[:, col] = keys % 52
+        keys = keys // 52
+    return boards
+
+def river_strengths(boards):
+    """Hand strength of every combo on full boards (n, 5), nan on combos using a board card"""
+    n = len(boards)
+    blocked = (RE.COMBO_MASKS[None, :] & RE._to_masks(boards)[:, None]) != 0
+    hands = np.concatenate([np.broadcast_to(RE.COMBOS[None], (n, len(RE.COMBOS), 2)),
+        np.broadcast_to(boards[:, None, :], (n, len(RE.COMBOS), 5))], axis=2)
+    scores = np.full((n, len(RE.COMBOS)), -1, dtype=np.int64)
+    scores[~blocked] = HE.evaluate(hands[~blocked])
+    # ranks within every board by one search in the sorted scores of all boards
+    keys = scores + (np.arange(n, dtype=np.int64) << 32)[:, None]
+    ordered = np.sort(keys, axis=1).ravel()
+    lower = np.searchsorted(ordered, keys, side="left")
+    equal = np.searchsorted(ordered, keys, side="right") - lower
+    blocked_num = blocked.sum(axis=1)[:, None]
+    less = lower - (np.arange(n) * len(RE.COMBOS))[:, None] - blocked_num
+    strengths = (less + 0.5 * (equal - 1)) / (len(RE.COMBOS) - blocked_num - 1)
+    strengths[blocked] = np.nan
+    return strengths
+
+def board_features(boards, runouts, rng):
+    """Return (features (n, 1326, d), EHS (n, 1326)) of every combo on boards, nan on blocked combos"""
+    n, size = boards.shape
+    known = np.zeros((n, 52), dtype=bool)
+    known[np.arange(n)[:, None], boards] = True
+    # same sampled runouts for every combo of a board, skipped by combos using their cards.
+    # runouts of a group have no card in common, so two hole cards never block a whole group
+    if size < 5:
+        group_num, dealt_num = -(-runouts // RUNOUT_GROUP), RUNOUT_GROUP * (5 - size)
+        noise = rng.random((n, group_num, 52)) + known[:, None, :]
+        dealt = np.argpartition(noise, dealt_num - 1, axis=2)[..., :dealt_num]
+        runouts = group_num * RUNOUT_GROUP
+        dealt = dealt.reshape(n, runouts, 5 - size)
+    else:
+        dealt = np.zeros((n, runouts, 0), dtype=np.int32)
+    full = np.concatenate([np.broadcast_to(boards[:, None, :], (n, runouts, size)), dealt], axis=2)
+    strengths = river_strengths(full.reshape(-1, 5).astype(np.int32)).reshape(n, runouts, -1)
+    if size == 5:
+        features = strengths[:, 0, :, None]
+    else:
+        valid = ~np.isnan(strengths)
+        bins = np.minimum((np.nan_to_num(strengths) * HIST_BINS).astype(np.int32), HIST_BINS - 1)
+        counts = np.stack([((bins == b) & valid).sum(axis=1) for b in range(HIST_BINS)], axis=2)
+        with np.errstate(invalid="ignore"):
+            features = np.cumsum(counts, axis=2) / counts.sum(axis=2, keepdims=True)
+    features = _symmetrize(features, boards)
+    ehs = features[..., 0] if size == 5 else 1 - features.mean(axis=2) + 0.5 / HIST_BINS
+    return features.astype(np.float32), ehs
+
+def _symmetrize(features, boards):
+    """Average features over the suit permutations keeping each board"""
+    keys = _board_keys(boards)
+    total, perm_num = np.zeros(features.shape), np.zeros(len(boards))
+    for perm, stabilizes in enumerate(keys == keys[0]):
+        if stabilizes.any():
+            total[stabilizes] += features[stabilizes][:, COMBO_PERMS[perm]]
+            perm_num += stabilizes
+    return total / perm_num[:, None, None]
+
+def kmeans(points, k, rng, weights=None, iterations=KMEANS_ITERATIONS):
+    """Return centers (k, d) of weighted points (n, d), seeded by k-means++"""
+    weights = np.ones(len(points)) if weights is None else weights
+    k = min(k, len(points))
+    centers = [points[rng.choice(len(points), p=weights / weights.sum())]]
+    distances = ((points - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        chances = weights * distances
+        idx = rng.choice(len(points), p=chances / chances.sum()) if chances.sum() > 0 else rng.integers(len(points))
+        centers.append(points[idx])
+        distances = np.minimum(distances, ((points - points[idx]) ** 2).sum(axis=1))
+    centers = np.array(centers, dtype=np.float64)
+    for _ in range(iterations):
+        labels = assign(points, centers)
+        mass = np.bincount(labels, weights=weights, minlength=k)
+        sums = np.stack([np.bincount(labels, weights=weights * points[:, d], minlength=k)
+            for d in range(points.shape[1])], axis=1)
+        moved = np.where(mass[:, None] > 0, sums / np.maximum(mass, 1e-12)[:, None], centers)
+        if np.allclose(moved, centers): break
+        centers = moved
+    return centers
+
+def assign(points, centers):
+    """Index of the nearest center of every point"""
+    distances = (centers ** 2).sum(axis=1)[None, :] - 2 * points @ centers.T
+    return distances.argmin(axis=1)
+
+def build_street(table_dir, street, bucket_num=BUCKET_NUM, runouts=None, seed=0, log=None):
+    size = BOARD_SIZES[STREETS.index(street)]
+    runouts = RUNOUTS[street] if runouts is None or size == 5 else runouts
+    rng = np.random.default_rng(seed)
+    rows, perms, canonical = gen_board_index(size)
+    multiplicity = np.bincount(rows, minlength=len(canonical)).astype(np.float64)
+    batch = max(1, EVAL_BATCH // (-(-runouts // RUNOUT_GROUP) * RUNOUT_GROUP * len(RE.COMBOS)))
+    # centers fit on a sample of the boards
+    fit_boards = rng.choice(len(canonical), size=min(FIT_BOARDS, len(canonical)), replace=False,
+            p=multiplicity / multiplicity.sum())
+    covered = len(fit_boards) == len(canonical)  # features of the fit are assigned too
+    if covered: fit_boards = np.arange(len(canonical))
+    points, weights, cached = [], [], {}
+    for start in range(0, len(fit_boards), batch):
+        chunk = fit_boards[start:start + batch]
+        features, ehs = board_features(canonical[chunk], runouts, rng)
+        if covered: cached[start] = (features, ehs)
+        valid = ~np.isnan(features[..., 0])
+        points.append(features[valid])
+        weights.append(np.broadcast_to(multiplicity[chunk][:, None], valid.shape)[valid])
+    points, weights = np.concatenate(points), np.concatenate(weights)
+    if len(points) > FIT_POINTS:
+        picked = rng.choice(len(points), size=FIT_POINTS, replace=False)
+        points, weights = points[picked], weights[picked]
+    centers = kmeans(points.astype(np.float64), bucket_num, rng, weights)
+    # bucket ids by increasing strength (decreasing cumulative histogram)
+    order = np.argsort(centers.sum(axis=1) * (1 if size == 5 else -1), kind="stable")
+    centers, bucket_num = centers[order], len(centers)
+    buckets = np.lib.format.open_memmap(os.path.join(table_dir, "%s_buckets.npy" % street), mode="w+",
+            dtype=np.uint8, shape=(len(canonical), len(RE.COMBOS)))
+    ehs_sums, masses = np.zeros(bucket_num), np.zeros(bucket_num)
+    started = time.time()
+    for start in range(0, len(canonical), batch):
+        if start in cached: features, ehs = cached.pop(start)
+        else: features, ehs = board_features(canonical[start:start + batch], runouts, rng)
+        valid = ~np.isnan(ehs)
+        labels = assign(features[valid].astype(np.float64), centers)
+        chunk = np.full(valid.shape, NO_BUCKET, dtype=np.uint8)
+        chunk[valid] = labels
+        buckets[start:start + batch] = chunk
+        board_weights = np.broadcast_to(multiplicity[start:start + batch][:, None], valid.shape)[valid]
+        ehs_sums += np.bincount(labels, weights=board_weights * ehs[valid], minlength=bucket_num)
+        masses += np.bincount(labels, weights=board_weights, minlength=bucket_num)
+        if log and (start // batch) % 500 == 499:
+            log("%s: %d / %d boards (%.0fs)" % (street, start + batch, len(canonical), time.time() - started))
+    buckets.flush()
+    np.save(os.path.join(table_dir, "%s_rows.npy" % street), rows)
+    np.save(os.path.join(table_dir, "%s_perms.npy" % street), perms)
+    # buckets left empty by the boards keep the strength of their center
+    center_ehs = centers[:, 0] if size == 5 else 1 - centers.mean(axis=1) + 0.5 / HIST_BINS
+    ehs = np.where(masses > 0, ehs_sums / np.maximum(masses, 1e-12), center_ehs)
+    np.save(os.path.join(table_dir, "%s_ehs.npy" % street), ehs.astype(np.float32))
+    return len(canonical), bucket_num
+
+def build_tables(table_dir, streets=STREETS, bucket_num=BUCKET_NUM, runouts=None, seed=0, log=None):
+    """Build the tables of streets. "runouts" overrides RUNOUTS of the streets before the river."""
+    if bucket_num >= NO_BUCKET: raise ValueError("At most %d buckets" % (NO_BUCKET - 1))
+    if not os.path.isdir(table_dir): os.makedirs(table_dir)
+    meta_path = os.path.join(table_dir, "buckets.json")
+    meta = { "streets": [], "runouts": {}, "bucket_nums": {} }
+    if os.path.exists(meta_path):
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+    for street in streets:
+        board_num, street_bucket_num = build_street(table_dir, street, bucket_num, runouts, seed, log)
+        meta["streets"] = [s for s in STREETS if s in meta["streets"] or s == street]
+        meta["runouts"][street] = RUNOUTS[street] if runouts is None or street == "river" else runouts
+        meta.setdefault("bucket_nums", {})[street] = street_bucket_num
+        meta["bucket_num"] = max(meta["bucket_nums"].values())
+        meta["hist_bins"] = HIST_BINS
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f, indent=2, sort_keys=True)
+        os.replace(meta_path + ".tmp", meta_path)
+        if log: log("%s: %d canonical boards in %d buckets" % (street, board_num, street_bucket_num))
+    return meta
+
+
+def main(argv):
+    """Usage: python -m pypokergui.utils.card_buckets build <dir> [buckets] [street ...]
+                 python -m pypokergui.utils.card_buckets lookup <dir> <hole cards> [board cards]
+        Cards are comma separated like "SA,SK".
+    """
+    if len(argv) >= 2 and argv[0] == "build":
+        bucket_num = int(argv[2]) if len(argv) > 2 and argv[2].isdigit() else BUCKET_NUM
+        streets = [street for street in argv[2:] if not street.isdigit()]
+        build_tables(argv[1], streets or STREETS, bucket_num, log=print)
+    elif len(argv) in (3, 4) and argv[0] == "lookup":
+        tables = BucketTables(argv[1])
+        hole = HE.card_ids(argv[2].split(","))
+        board = HE.card_ids(argv[3].split(",")) if len(argv) == 4 else []
+        bucket = tables.bucket(hole, board)
+        print("bucket %d of %d (EHS %.3f)" % (bucket, tables.bucket_num, tables.ehs[len(board)][bucket]))
+    else:
+        print(main.__doc__)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
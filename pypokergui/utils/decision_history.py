@@ -0,0 +1,79 @@
+import numpy as np
+
+import pypokergui.utils.hand_eval as HE
+
+"""Bounded history of the decisions of an AI player.
+    Each decision is encoded into one row of ints (cards as hand_eval card ids,
+    -1 when missing) and kept in a ring buffer of "capacity" rows, so the
+    memory of a bot stays the same however many hands it plays, and no dict
+    of the engine is kept alive by the history. The oldest decisions are
+    overwritten first.
+"""
+
+FIELDS = ["round_count", "street", "hole1", "hole2", "board1", "board2", "board3", "board4", "board5",
+        "pot", "stack", "action", "amount"]
+STREETS = ["preflop", "flop", "turn", "river"]
+ACTIONS = ["fold", "call", "raise"]
+DEFAULT_CAPACITY = 1000
+
+ROUND_COUNT, STREET, HOLE, BOARD, POT, STACK, ACTION, AMOUNT = 0, 1, 2, 4, 9, 10, 11, 12
+
+class DecisionHistory(object):
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.buffer = np.full((capacity, len(FIELDS)), -1, dtype=np.int32)
+        self.count = 0  # decisions recorded so far, including the overwritten ones
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def record(self, hole_card, round_state, action, amount, uuid=None):
+        """Encode a decision of declare_action. "uuid" of the player gives its stack."""
+        if self.capacity == 0: return
+        row = [-1] * len(FIELDS)
+        row[ROUND_COUNT] = round_state.get("round_count", -1)
+        row[STREET] = STREETS.index(round_state["street"]) if round_state["street"] in STREETS else -1
+        for idx, card in enumerate(hole_card[:2]):
+            row[HOLE + idx] = HE.card_id(card)
+        for idx, card in enumerate(round_state["community_card"][:5]):
+            row[BOARD + idx] = HE.card_id(card)
+        pot = round_state["pot"]
+        row[POT] = pot["main"]["amount"] + sum([side["amount"] for side in pot["side"]])
+        for seat in round_state["seats"]:
+            if seat["uuid"] == uuid: row[STACK] = seat["stack"]
+        row[ACTION] = ACTIONS.index(action)
+        row[AMOUNT] = amount
+        self.buffer[self.count % self.capacity] = row
+        self.count += 1
+
+    def rows(self):
+        """Return a copy of the kept rows, the oldest first"""
+        if self.count <= self.capacity: return self.buffer[:self.count].copy()
+        start = self.count % self.capacity
+        return np.concatenate([self.buffer[start:], self.buffer[:start]])
+
+    def __iter__(self):
+        for row in self.rows().tolist():
+            yield decode(row)
+
+    def last(self):
+        if self.count == 0: return None
+        return decode(self.buffer[(self.count - 1) % self.capacity].tolist())
+
+    def clear(self):
+        self.buffer[:] = -1
+        self.count = 0
+
+def decode(row):
+    """Return a decision as a dict, with cards and names like pypokerengine"""
+    return {
+            "round_count": row[ROUND_COUNT],
+            "street": STREETS[row[STREET]] if row[STREET] >= 0 else None,
+            "hole_card": [HE.card_str(card) for card in row[HOLE:HOLE + 2] if card >= 0],
+            "community_card": [HE.card_str(card) for card in row[BOARD:BOARD + 5] if card >= 0],
+            "pot": row[POT],
+            "stack": row[STACK],
+            "action": ACTIONS[row[ACTION]],
+            "amount": row[AMOUNT]
+            }
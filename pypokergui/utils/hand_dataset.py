@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+
+import pypokergui.utils.hand_eval as HE
+
+"""Loader of UCI poker-hand dataset (data/poker-hand-training-true.csv).
+    Each row is S1,C1,...,S5,C5,CLASS where suits are 1..4, ranks are
+    1 (ace) .. 13 (king) and CLASS is 0 (nothing in hand) .. 9 (royal flush).
+    Rows are converted to card ids of hand_eval, so the dataset works as
+    a correctness oracle of the evaluator.
+"""
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "poker-hand-training-true.csv")
+ROYAL_FLUSH = 9
+
+def load_dataset(path=DEFAULT_PATH):
+    """Return (hands, classes) as int8 arrays with shape (N, 5) and (N,)"""
+    chunks = list(iter_dataset(path))
+    hands = np.concatenate([hands for hands, _ in chunks])
+    classes = np.concatenate([classes for _, classes in chunks])
+    return hands, classes
+
+def iter_dataset(path=DEFAULT_PATH, chunk_size=8192):
+    """Read the csv in chunks of "chunk_size" rows to keep memory flat on big files"""
+    with open(path, "r") as f:
+        header = f.readline()
+        assert header.startswith("S1"), "unexpected header [ %s ]" % header.strip()
+        while True:
+            lines = [line for line in (f.readline() for _ in range(chunk_size)) if line.strip()]
+            if len(lines) == 0: break
+            rows = np.loadtxt(lines, dtype=np.int8, delimiter=",", ndmin=2)
+            yield _to_card_ids(rows[:, :10]), rows[:, 10]
+
+def classify(hands):
+    """Return CLASS of the dataset for 5-card hands given as card ids"""
+    scores = HE.evaluate(hands)
+    classes = HE.category(scores).astype(np.int8)
+    is_royal = (classes == HE.STRAIGHTFLASH) & ((scores >> 16 & 15) == HE.RANKS.index("A"))
+    classes[is_royal] = ROYAL_FLUSH
+    return classes
+
+def validate(path=DEFAULT_PATH):
+    """Return indexes of rows whose CLASS is not reproduced by classify()"""
+    hands, classes = load_dataset(path)
+    return np.nonzero(classify(hands) != classes)[0]
+
+def _to_card_ids(rows):
+    suits = rows[:, 0::2].astype(np.int8) - 1
+    ranks = (rows[:, 1::2].astype(np.int8) + 11) % 13  # 1 (ace) -> 12, 2 -> 0, ..., 13 (king) -> 11
+    return (ranks * 4 + suits).astype(np.int8)
+
@@ -0,0 +1,120 @@
+import numpy as np
+
+"""Vectorized poker hand evaluator.
+    Cards are encoded as small ints: card_id = rank * 4 + suit, where rank is
+    0 (deuce) .. 12 (ace) and suit is the index in "CDHS". evaluate() takes an
+    array of hands of 5 to 7 cards and returns int32 scores which compare like
+    the hands do. Category of the hand is score >> CATEGORY_SHIFT and the lower
+    20 bits hold the ranks deciding ties, packed as 4-bit nibbles.
+    Every step is done on whole columns with lookup tables indexed by 13-bit
+    rank masks, so evaluating many hands costs a few numpy operations.
+"""
+
+RANKS = "23456789TJQKA"
+SUITS = "CDHS"
+
+HIGHCARD, ONEPAIR, TWOPAIR, THREECARD, STRAIGHT, FLASH, FULLHOUSE, FOURCARD, STRAIGHTFLASH = range(9)
+CATEGORY_NAMES = ["HIGHCARD", "ONEPAIR", "TWOPAIR", "THREECARD", "STRAIGHT",
+        "FLASH", "FULLHOUSE", "FOURCARD", "STRAIGHTFLASH"]
+CATEGORY_SHIFT = 20
+
+def card_id(card):
+    """Convert card string of pypokerengine (ex. "SA", "C9") to card id"""
+    return RANKS.index(card[1]) * 4 + SUITS.index(card[0])
+
+def card_ids(cards):
+    return [card_id(card) for card in cards]
+
+def card_str(card_id):
+    return SUITS[card_id & 3] + RANKS[card_id >> 2]
+
+def evaluate(hands):
+    """Return scores of hands given as array of card ids with shape (N, 5..7)"""
+    hands = np.asarray(hands, dtype=np.int32)
+    if hands.ndim == 1: hands = hands[None, :]
+    hand_num = hands.shape[0]
+    rows = np.arange(hand_num)
+    ranks, suits = hands >> 2, hands & 3
+    counts = np.zeros((hand_num, 13), dtype=np.int32)
+    suit_counts = np.zeros((hand_num, 4), dtype=np.int32)
+    suit_masks = np.zeros((hand_num, 4), dtype=np.int32)
+    for col in range(hands.shape[1]):
+        counts[rows, ranks[:, col]] += 1
+        suit_counts[rows, suits[:, col]] += 1
+        suit_masks[rows, suits[:, col]] |= 1 << ranks[:, col]
+
+    m1 = (counts >= 1).astype(np.int32) @ _RANK_BITS
+    m2 = (counts >= 2).astype(np.int32) @ _RANK_BITS
+    m3 = (counts >= 3).astype(np.int32) @ _RANK_BITS
+    m4 = (counts >= 4).astype(np.int32) @ _RANK_BITS
+    flush_mask = np.where(suit_counts >= 5, suit_masks, 0).max(axis=1)
+
+    straight_flush_high = _STRAIGHT_HIGH[flush_mask]
+    straight_high = _STRAIGHT_HIGH[m1]
+    r4 = _HIGHEST[m4]
+    r3 = _HIGHEST[m3]
+    b3 = _bit(r3)
+    full_house_pair = _HIGHEST[m2 & ~b3]
+    pair_high = _HIGHEST[m2]
+    b2 = _bit(pair_high)
+    pair_low = _HIGHEST[m2 & ~b2]
+    b2_low = _bit(pair_low)
+
+    conditions = [
+            straight_flush_high >= 0,
+            r4 >= 0,
+            (r3 >= 0) & (full_house_pair >= 0),
+            flush_mask != 0,
+            straight_high >= 0,
+            r3 >= 0,
+            pair_low >= 0,
+            pair_high >= 0
+            ]
+    payloads = [
+            straight_flush_high << 16,
+            r4 << 16 | _HIGHEST[m1 & ~_bit(r4)] << 12,
+            r3 << 16 | full_house_pair << 12,
+            _TOP5[flush_mask],
+            straight_high << 16,
+            r3 << 16 | _TOP2[m1 & ~b3] << 8,
+            pair_high << 16 | pair_low << 12 | _HIGHEST[m1 & ~b2 & ~b2_low] << 8,
+            pair_high << 16 | _TOP3[m1 & ~b2] << 4
+            ]
+    categories = [STRAIGHTFLASH, FOURCARD, FULLHOUSE, FLASH, STRAIGHT, THREECARD, TWOPAIR, ONEPAIR]
+    scores = [category << CATEGORY_SHIFT | payload for category, payload in zip(categories, payloads)]
+    return np.select(conditions, scores, default=_TOP5[m1]).astype(np.int32)
+
+def evaluate_one(cards):
+    """Evaluate single hand given as list of card ids"""
+    return int(evaluate([cards])[0])
+
+def category(scores):
+    return np.asarray(scores) >> CATEGORY_SHIFT
+
+def category_name(score):
+    return CATEGORY_NAMES[score >> CATEGORY_SHIFT]
+
+def _bit(ranks):
+    return np.where(ranks >= 0, 1 << np.maximum(ranks, 0), 0)
+
+def _gen_tables():
+    mask_num = 1 << 13
+    highest = np.full(mask_num, -1, dtype=np.int32)
+    straight_high = np.full(mask_num, -1, dtype=np.int32)
+    tops = { k: np.zeros(mask_num, dtype=np.int32) for k in [2, 3, 5] }
+    straights = [(high, sum([1 << r for r in range(high-4, high+1)])) for high in range(12, 3, -1)]
+    straights.append((3, (1 << 12) | 0b1111))  # A-2-3-4-5
+    for mask in range(1, mask_num):
+        ranks = [r for r in range(12, -1, -1) if mask >> r & 1]
+        highest[mask] = ranks[0]
+        for k, table in tops.items():
+            packed = 0
+            for idx in range(k):
+                packed = packed << 4 | (ranks[idx] if idx < len(ranks) else 0)
+            table[mask] = packed
+        straight_high[mask] = next((high for high, bits in straights if mask & bits == bits), -1)
+    return highest, straight_high, tops[2], tops[3], tops[5]
+
+_RANK_BITS = (1 << np.arange(13)).astype(np.int32)
+_HIGHEST, _STRAIGHT_HIGH, _TOP2, _TOP3, _TOP5 = _gen_tables()
+
@@ -0,0 +1,190 @@
+"""Incremental opponent statistics for AI players.
+    OpponentTracker is fed from the callbacks of BasePokerPlayer
+    (receive_round_start_message, receive_street_start_message and
+    receive_game_update_message), so every action is counted exactly once.
+    Each opponent holds a fixed number of counters. Passing decay < 1 turns them
+    into exponentially decayed counters which weight roughly the last
+    1 / (1 - decay) hands, so memory per opponent stays constant either way.
+    With journal=True raw (not decayed) increments are also collected, so that
+    they can be persisted and merged by addition (see profile_store).
+"""
+
+STREETS = ["preflop", "flop", "turn", "river"]
+PREFLOP, FLOP, TURN, RIVER = range(4)
+
+class OpponentStats(object):
+
+    COUNTERS = ["hands", "vpip", "pfr"]
+    STREET_COUNTERS = ["raises", "calls", "checks", "folds", "cbet_faced", "cbet_folded"]
+
+    def __init__(self):
+        for name in self.COUNTERS:
+            setattr(self, name, 0.0)
+        for name in self.STREET_COUNTERS:
+            setattr(self, name, [0.0] * len(STREETS))
+
+    def decay(self, factor):
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) * factor)
+        for name in self.STREET_COUNTERS:
+            counter = getattr(self, name)
+            for street in range(len(STREETS)):
+                counter[street] *= factor
+
+    def merge(self, other):
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in self.STREET_COUNTERS:
+            counter, other_counter = getattr(self, name), getattr(other, name)
+            for street in range(len(STREETS)):
+                counter[street] += other_counter[street]
+
+    def to_list(self):
+        values = [getattr(self, name) for name in self.COUNTERS]
+        for name in self.STREET_COUNTERS:
+            values += getattr(self, name)
+        return values
+
+    @classmethod
+    def from_list(cls, values):
+        stats = cls()
+        for idx, name in enumerate(cls.COUNTERS):
+            setattr(stats, name, values[idx])
+        offset = len(cls.COUNTERS)
+        for name in cls.STREET_COUNTERS:
+            setattr(stats, name, list(values[offset:offset+len(STREETS)]))
+            offset += len(STREETS)
+        return stats
+
+    def vpip_rate(self, default=0.5):
+        return _ratio(self.vpip, self.hands, default)
+
+    def pfr_rate(self, default=0.3):
+        return _ratio(self.pfr, self.hands, default)
+
+    def aggression_factor(self, street=None, default=1.0):
+        """(bets + raises) / calls. Postflop streets are summed when street is None."""
+        streets = [STREETS.index(street)] if street else [FLOP, TURN, RIVER]
+        return _ratio(sum([self.raises[s] for s in streets]), sum([self.calls[s] for s in streets]), default)
+
+    def aggression_frequency(self, street=None, default=0.5):
+        """(bets + raises) / all actions, which stays in [0, 1] unlike aggression factor"""
+        streets = [STREETS.index(street)] if street else [FLOP, TURN, RIVER]
+        raises = sum([self.raises[s] for s in streets])
+        actions = raises + sum([self.calls[s] + self.checks[s] + self.folds[s] for s in streets])
+        return _ratio(raises, actions, default)
+
+    def fold_to_cbet(self, street="flop", default=0.5):
+        s = STREETS.index(street)
+        return _ratio(self.cbet_folded[s], self.cbet_faced[s], default)
+
+class OpponentTracker(object):
+
+    def __init__(self, decay=1.0, journal=False):
+        assert 0 < decay <= 1
+        self.decay = decay
+        self.stats = {}
+        self.journal = {} if journal else None
+        self._reset_round()
+
+    def get(self, uuid):
+        if uuid not in self.stats:
+            self.stats[uuid] = OpponentStats()
+        return self.stats[uuid]
+
+    def seed(self, uuid, stats):
+        """Start tracking uuid from previously saved stats.
+            Decayed counters never exceed the window, so saved stats are scaled down to it.
+        """
+        window = 1.0 / (1 - self.decay) if self.decay != 1.0 else None
+        seeded = OpponentStats.from_list(stats.to_list())
+        if window and seeded.hands > window:
+            seeded.decay(window / seeded.hands)
+        self.stats[uuid] = seeded
+
+    def drain_journal(self):
+        journal, self.journal = self.journal, {}
+        return journal
+
+    def receive_round_start(self, seats):
+        self._reset_round()
+        for seat in seats:
+            if seat["state"] == "folded": continue
+            stats = self.get(seat["uuid"])
+            if self.decay != 1.0: stats.decay(self.decay)
+            self._count(seat["uuid"], "hands")
+
+    def receive_street_start(self, street, round_state):
+        if street not in STREETS: return
+        self.street = STREETS.index(street)
+        self.street_bets = {}
+        self.cbettor = None
+        self.cbet_responders = set()
+        self.prev_aggressor, self.street_aggressor = self.street_aggressor, None
+        if self.street == PREFLOP:
+            for history in round_state["action_histories"].get("preflop", []):
+                if history["action"] in ["SMALLBLIND", "BIGBLIND"]:
+                    self.street_bets[history["uuid"]] = history["amount"]
+
+    def receive_action(self, uuid, action, amount):
+        if self.street is None: return
+        street = self.street
+        action, paid = action.lower(), self.street_bets.get(uuid, 0)
+        self._count_cbet_response(uuid, action)
+        if action == "fold":
+            self._count(uuid, "folds", street)
+        elif action == "call" and amount <= paid:
+            self._count(uuid, "checks", street)
+        elif action == "call":
+            self._count(uuid, "calls", street)
+            self._count_vpip(uuid)
+        elif action == "raise":
+            self._count(uuid, "raises", street)
+            self._count_vpip(uuid)
+            if street == PREFLOP and uuid not in self.pfr_counted:
+                self.pfr_counted.add(uuid)
+                self._count(uuid, "pfr")
+            if self.street_aggressor is None and uuid == self.prev_aggressor:
+                self.cbettor = uuid
+            elif self.cbettor is not None:
+                self.cbettor = None  # facing a re-raise is not facing a cbet anymore
+            self.street_aggressor = uuid
+        if action in ["call", "raise"]:
+            self.street_bets[uuid] = max(paid, amount)
+
+    def _count(self, uuid, name, street=None):
+        targets = [self.get(uuid)]
+        if self.journal is not None:
+            if uuid not in self.journal: self.journal[uuid] = OpponentStats()
+            targets.append(self.journal[uuid])
+        for stats in targets:
+            if street is None:
+                setattr(stats, name, getattr(stats, name) + 1)
+            else:
+                getattr(stats, name)[street] += 1
+
+    def _count_vpip(self, uuid):
+        if self.street == PREFLOP and uuid not in self.vpip_counted:
+            self.vpip_counted.add(uuid)
+            self._count(uuid, "vpip")
+
+    def _count_cbet_response(self, uuid, action):
+        if self.cbettor is None or uuid == self.cbettor or uuid in self.cbet_responders: return
+        self.cbet_responders.add(uuid)
+        self._count(uuid, "cbet_faced", self.street)
+        if action == "fold":
+            self._count(uuid, "cbet_folded", self.street)
+
+    def _reset_round(self):
+        self.street = None
+        self.street_bets = {}
+        self.vpip_counted = set()
+        self.pfr_counted = set()
+        self.street_aggressor = None
+        self.prev_aggressor = None
+        self.cbettor = None
+        self.cbet_responders = set()
+
+def _ratio(numerator, denominator, default):
+    return 1.0 * numerator / denominator if denominator > 0 else default
+
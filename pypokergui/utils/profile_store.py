@@ -0,0 +1,117 @@
+import os
+import time
+import sqlite3
+
+from pypokergui.utils.opponent_stats import OpponentStats, STREETS
+
+"""On-disk store of opponent statistics keyed by player name.
+    Profiles are saved as increments which are added to the stored counters
+    in a single upsert, so many simulator processes can write the same
+    profiles at once without losing updates. WAL journal lets readers go on
+    while a writer commits, and busy timeout makes writers queue up.
+"""
+
+COLUMNS = OpponentStats.COUNTERS + ["%s_%s" % (name, street)
+        for name in OpponentStats.STREET_COUNTERS for street in STREETS]
+
+class ProfileStore(object):
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self.connection = None
+
+    def load(self, names):
+        """Return { name: OpponentStats } of the names which have a saved profile"""
+        names = list(names)
+        if len(names) == 0: return {}
+        placeholders = ", ".join(["?"] * len(names))
+        rows = self._connect().execute(
+                "SELECT name, %s FROM profiles WHERE name IN (%s)" % (", ".join(COLUMNS), placeholders),
+                names).fetchall()
+        return { row[0]: OpponentStats.from_list(list(row[1:])) for row in rows }
+
+    def save(self, increments):
+        """Add { name: OpponentStats } to the stored profiles in one transaction"""
+        if len(increments) == 0: return
+        sql = "INSERT INTO profiles (name, %s) VALUES (?, %s) ON CONFLICT(name) DO UPDATE SET %s" % (
+                ", ".join(COLUMNS), ", ".join(["?"] * len(COLUMNS)),
+                ", ".join(["%s = %s + excluded.%s" % (c, c, c) for c in COLUMNS]))
+        rows = [[name] + stats.to_list() for name, stats in increments.items()]
+        connection = self._connect()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(sql, rows)
+
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def _connect(self):
+        if self.connection is None:
+            dirname = os.path.dirname(self.path)
+            if dirname and not os.path.exists(dirname): os.makedirs(dirname)
+            # autocommit mode, transactions are started explicitly in save
+            self.connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            _execute_when_unlocked(self.connection, "PRAGMA journal_mode=WAL", self.timeout)
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS profiles (name TEXT PRIMARY KEY, %s)" %
+                    ", ".join(["%s REAL NOT NULL DEFAULT 0" % c for c in COLUMNS]))
+        return self.connection
+
+def _execute_when_unlocked(connection, sql, timeout):
+    # switching journal mode of a database opened by other processes may fail
+    # without waiting for the busy timeout, so retry it till the timeout
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return connection.execute(sql)
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) or time.time() > deadline: raise
+            time.sleep(0.01)
+
+class ProfileSync(object):
+    """Connect OpponentTracker to ProfileStore for an AI player.
+        Profiles are loaded lazily when opponents are seen at game start,
+        and journaled increments are flushed every "flush_interval" rounds.
+    """
+
+    def __init__(self, store, tracker, flush_interval=20):
+        assert tracker.journal is not None
+        self.store = store
+        self.tracker = tracker
+        self.flush_interval = flush_interval
+        self.names = {}
+        self.loaded = set()
+        self.unflushed_rounds = 0
+
+    def receive_game_start(self, seats, my_uuid=None):
+        self.flush()
+        self.names = { seat["uuid"]: seat["name"] for seat in seats if seat["uuid"] != my_uuid }
+        new_names = [name for name in self.names.values() if name not in self.loaded]
+        profiles = self.store.load(new_names)
+        for uuid, name in self.names.items():
+            if name in profiles: self.tracker.seed(uuid, profiles[name])
+        self.loaded.update(new_names)
+
+    def receive_round_result(self, is_last_round=False, my_uuid=None):
+        # uuid of AI player is set after its game start message
+        self.names.pop(my_uuid, None)
+        self.unflushed_rounds += 1
+        if is_last_round or self.unflushed_rounds >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        journal = self.tracker.drain_journal()
+        increments = {}
+        for uuid, stats in journal.items():
+            if uuid not in self.names: continue
+            name = self.names[uuid]
+            if name in increments:
+                increments[name].merge(stats)
+            else:
+                increments[name] = stats
+        self.store.save(increments)
+        self.unflushed_rounds = 0
+
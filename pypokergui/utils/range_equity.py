@@ -0,0 +1,257 @@
+import collections
+import itertools
+import multiprocessing
+
+import numpy as np
+
+import pypokergui.utils.hand_eval as HE
+
+"""Equity of a weighted hand range against another one.
+    A range is an array of weights over the 1326 two-card combos (COMBOS),
+    usually parsed from a string like "TT+,AKs,KQo:0.5". equity() compares
+    every hero combo with every villain combo on the boards completed by the
+    missing cards. The completions are all enumerated when there are at most
+    "max_runouts" of them (turn and river by default), otherwise "samples"
+    completions are drawn. Either way every combo of both ranges is scored
+    on every completion, in batches by hand_eval.
+    Scores of the combos on a complete board are cached, so later queries on
+    the same board (next action of the street, another range) only evaluate
+    combos not seen yet. Pairs of combos sharing a card with each other or
+    with the board are left out.
+    estimate_equity() is the cheap query of a known hand against random
+    hands: exact when the opponent holdings x runouts to enumerate are within
+    a budget, otherwise sampled with one random runout and opponent hands per
+    sample.
+"""
+
+COMBOS = np.array(list(itertools.combinations(range(52), 2)), dtype=np.int32)
+COMBO_INDEX = { (int(a), int(b)): idx for idx, (a, b) in enumerate(COMBOS) }
+COMBO_MASKS = (np.uint64(1) << COMBOS[:, 0].astype(np.uint64)) | (np.uint64(1) << COMBOS[:, 1].astype(np.uint64))
+RANGE_SUITS = "cdhs"  # suits in range strings ("AhKh"), same order as hand_eval.SUITS
+
+MAX_RUNOUTS = 50
+SAMPLES = 500
+EXACT_BUDGET = 100000  # heads-up turn (~45k holdings x runouts) and river are enumerated
+HAND_SAMPLES = 1000
+MAX_CACHED_BOARDS = 2048
+MAX_BATCH_CELLS = 2000000  # boards x hero combos x villain combos compared at once
+# smaller jobs are not worth starting processes
+PARALLEL_MIN_HANDS = 500000  # hands evaluated
+PARALLEL_MIN_CELLS = 50000000  # hero combos x villain combos compared
+
+class BoardCache(object):
+    """Scores of combos on complete boards, kept for the last MAX_CACHED_BOARDS boards"""
+
+    def __init__(self, max_boards=MAX_CACHED_BOARDS):
+        self.max_boards = max_boards
+        self.boards = collections.OrderedDict()  # board mask -> int32 scores of COMBOS, -1 if not evaluated
+
+    def scores(self, boards, board_masks, combo_idx):
+        """Return scores of the combos on the boards as array (len(boards), len(combo_idx))"""
+        entries, missing = [], []
+        for row, board_mask in enumerate(board_masks.tolist()):
+            entry = self.boards.get(board_mask)
+            if entry is None:
+                entry = np.full(len(COMBOS), -1, dtype=np.int32)
+                self.boards[board_mask] = entry
+                if len(self.boards) > self.max_boards: self.boards.popitem(last=False)
+            else:
+                self.boards.move_to_end(board_mask)
+            entries.append(entry)
+            unknown = combo_idx[entry[combo_idx] < 0]
+            if len(unknown) != 0: missing.append((row, unknown))
+        if len(missing) != 0:
+            rows = np.concatenate([np.full(len(unknown), row) for row, unknown in missing])
+            combos = np.concatenate([unknown for _, unknown in missing])
+            scores = HE.evaluate(np.hstack([COMBOS[combos], boards[rows]]))
+            for (row, unknown), chunk in zip(missing, np.split(scores, np.cumsum([len(u) for _, u in missing])[:-1])):
+                entries[row][unknown] = chunk
+        return np.stack(entries)[:, combo_idx]
+
+_board_cache = BoardCache()
+
+def parse_range(text):
+    """Return weights of COMBOS described by comma separated tokens, later tokens win.
+        "AA", "TT+", "55-22", "AKs", "AKo", "AK", "ATs+", "A5s-A2s", "AhKh",
+        "random" (every combo), each optionally weighted as "KQo:0.5".
+    """
+    weights = np.zeros(len(COMBOS))
+    for token in text.replace(" ", "").split(","):
+        if len(token) == 0: continue
+        hand, _, weight = token.partition(":")
+        weights[_expand_token(hand)] = float(weight) if weight else 1.0
+    return weights
+
+def hand_range(cards):
+    """Range holding only the hand given as 2 cards of pypokerengine (ex. ["HA", "SK"]) or card ids"""
+    weights = np.zeros(len(COMBOS))
+    weights[_combo_index(_to_card_ids(cards))] = 1.0
+    return weights
+
+def random_range():
+    return np.ones(len(COMBOS))
+
+def equity(hero, villain, board=(), max_runouts=MAX_RUNOUTS, samples=SAMPLES, processes=1, seed=None):
+    """Return probability that hero range beats villain range (ties count half).
+        "board" is given as 0 to 5 cards of pypokerengine or card ids.
+    """
+    board = np.array(_to_card_ids(board), dtype=np.int32)
+    board_mask = _to_mask(board)
+    hero_idx, villain_idx = _live_combos(hero, board_mask), _live_combos(villain, board_mask)
+    if len(hero_idx) == 0 or len(villain_idx) == 0:
+        raise Exception("No combo of the range is possible on board [ %s ]" % ",".join(map(HE.card_str, board)))
+    runouts = gen_runouts(board, max_runouts, samples, seed)
+    exact = _combination_num(52 - len(board), 5 - len(board)) <= max_runouts
+    job = (hero_idx, hero[hero_idx], villain_idx, villain[villain_idx])
+    hand_num = len(runouts) * len(np.union1d(hero_idx, villain_idx))
+    cell_num = len(runouts) * len(hero_idx) * len(villain_idx)
+    if processes > 1 and (hand_num >= PARALLEL_MIN_HANDS or cell_num >= PARALLEL_MIN_CELLS):
+        jobs = [job + (chunk, exact) for chunk in np.array_split(runouts, processes)]
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_accumulate_job, jobs)
+        finally:
+            pool.close()
+    else:
+        results = [_accumulate_job(job + (runouts, exact))]
+    won, total = [sum(values) for values in zip(*results)]
+    return float(won / total) if total > 0 else 0.5
+
+def estimate_equity(hole_cards, board=(), nb_player=2, budget=EXACT_BUDGET, samples=HAND_SAMPLES, seed=None):
+    """Return (equity, exact) of the hand against nb_player - 1 random hands, ties split.
+        The equity is exact when the combinations to enumerate are at most "budget"
+        (heads-up only), otherwise it is estimated on "samples" deals.
+    """
+    hole, board = _to_card_ids(hole_cards), _to_card_ids(board)
+    if nb_player == 2 and count_combinations(len(board)) <= budget:
+        return equity(hand_range(hole), random_range(), board, max_runouts=budget), True
+    return _sample_hand_equity(hole, board, nb_player - 1, samples, seed), False
+
+def count_combinations(board_size):
+    """Opponent holdings x runouts of a heads-up hand on a board of board_size cards"""
+    deck_size = 50 - board_size
+    return _combination_num(deck_size, 2) * _combination_num(deck_size - 2, 5 - board_size)
+
+def gen_runouts(board, max_runouts=MAX_RUNOUTS, samples=SAMPLES, seed=None):
+    """Return complete boards as array (N, 5): every completion if there are at most
+        max_runouts of them, otherwise "samples" random ones
+    """
+    board = np.asarray(board, dtype=np.int32)
+    missing = 5 - len(board)
+    deck = np.setdiff1d(np.arange(52, dtype=np.int32), board)
+    if _combination_num(len(deck), missing) <= max_runouts:
+        completions = list(itertools.combinations(deck, missing))
+        completions = np.array(completions, dtype=np.int32).reshape(len(completions), missing)
+    else:
+        rng = np.random.default_rng(seed)
+        completions = deck[np.argpartition(rng.random((samples, len(deck))), missing, axis=1)[:, :missing]]
+    return np.hstack([np.broadcast_to(board, (len(completions), len(board))), completions])
+
+def _accumulate_job(job):
+    """Return (weighted wins, weighted pairs) of hero combos against villain combos on the runouts"""
+    hero_idx, hero_weights, villain_idx, villain_weights, runouts, exact = job
+    # weights of pairs, zero for pairs sharing a card
+    disjoint = (COMBO_MASKS[hero_idx][:, None] & COMBO_MASKS[villain_idx][None, :]) == 0
+    pair_weights = np.outer(hero_weights, villain_weights) * disjoint
+    combo_idx = np.union1d(hero_idx, villain_idx)
+    hero_pos, villain_pos = np.searchsorted(combo_idx, hero_idx), np.searchsorted(combo_idx, villain_idx)
+    batch_size = max(1, MAX_BATCH_CELLS // (len(hero_idx) * len(villain_idx)))
+    won, total = 0.0, 0.0
+    for start in range(0, len(runouts), batch_size):
+        boards = runouts[start:start + batch_size]
+        board_masks = _to_masks(boards)
+        if exact:
+            scores = _board_cache.scores(boards, board_masks, combo_idx)
+        else:  # sampled boards rarely come again, so they would only flush the cache
+            scores = HE.evaluate(np.hstack([np.repeat(COMBOS[combo_idx], len(boards), axis=0),
+                np.tile(boards, (len(combo_idx), 1))])).reshape(len(combo_idx), len(boards)).T
+        hero_live = (COMBO_MASKS[hero_idx][None, :] & board_masks[:, None]) == 0
+        villain_live = (COMBO_MASKS[villain_idx][None, :] & board_masks[:, None]) == 0
+        diff = scores[:, hero_pos][:, :, None] - scores[:, villain_pos][:, None, :]
+        results = (diff > 0) + 0.5 * (diff == 0)
+        won += np.einsum("bh,bv,bhv,hv->", hero_live, villain_live, results, pair_weights)
+        total += np.einsum("bh,bv,hv->", hero_live.astype(float), villain_live, pair_weights)
+    return won, total
+
+def _sample_hand_equity(hole, board, opponent_num, samples, seed):
+    missing = 5 - len(board)
+    deck = np.setdiff1d(np.arange(52, dtype=np.int32), hole + board)
+    draw_num = missing + 2 * opponent_num
+    rng = np.random.default_rng(seed)
+    draws = deck[np.argpartition(rng.random((samples, len(deck))), draw_num - 1, axis=1)[:, :draw_num]]
+    boards = np.hstack([np.broadcast_to(np.array(board, dtype=np.int32), (samples, len(board))), draws[:, :missing]])
+    hands = [np.hstack([np.broadcast_to(np.array(hole, dtype=np.int32), (samples, 2)), boards])]
+    for idx in range(opponent_num):
+        hands.append(np.hstack([draws[:, missing + 2 * idx:missing + 2 * idx + 2], boards]))
+    scores = HE.evaluate(np.vstack(hands)).reshape(opponent_num + 1, samples)
+    best = scores[1:].max(axis=0)
+    tied = (scores[1:] == best).sum(axis=0)
+    return float(np.mean(np.where(scores[0] > best, 1.0, np.where(scores[0] == best, 1.0 / (tied + 1), 0.0))))
+
+def _live_combos(weights, board_mask):
+    return np.nonzero((weights > 0) & ((COMBO_MASKS & np.uint64(board_mask)) == 0))[0]
+
+def _expand_token(token):
+    if token.lower() in ("random", "any"):
+        return list(range(len(COMBOS)))
+    if len(token) == 4 and token[1] in RANGE_SUITS and token[3] in RANGE_SUITS:
+        cards = [_range_card_id(token[:2]), _range_card_id(token[2:])]
+        return [_combo_index(cards)]
+    plus = token.endswith("+")
+    first, _, last = token.rstrip("+").partition("-")
+    high, low, kind = _parse_hand_class(first, token)
+    if high == low:  # pairs
+        if last: lowest, highest = sorted([_parse_hand_class(last, token)[0], high])
+        else: lowest, highest = high, (12 if plus else high)
+        return [idx for rank in range(lowest, highest + 1) for idx in _class_combos(rank, rank, None)]
+    if last:
+        last_high, last_low, last_kind = _parse_hand_class(last, token)
+        if last_high != high or last_kind != kind:
+            raise Exception("Unexpected range token [ %s ]" % token)
+        lowest, highest = sorted([low, last_low])
+    else:
+        lowest, highest = low, (high - 1 if plus else low)
+    return [idx for kicker in range(lowest, highest + 1) for idx in _class_combos(high, kicker, kind)]
+
+def _parse_hand_class(text, token):
+    """Return (high rank, low rank, "s" / "o" / None) of text like "AKs" """
+    if len(text) not in (2, 3) or any(rank not in HE.RANKS for rank in text[:2]) or text[2:] not in ("", "s", "o"):
+        raise Exception("Unexpected range token [ %s ]" % token)
+    high, low = sorted([HE.RANKS.index(text[0]), HE.RANKS.index(text[1])], reverse=True)
+    if high == low and text[2:]:
+        raise Exception("Unexpected range token [ %s ]" % token)
+    return high, low, text[2:] or None
+
+def _class_combos(high, low, kind):
+    combos = []
+    for suit_a in range(4):
+        for suit_b in range(4):
+            if high == low and suit_a >= suit_b: continue
+            if kind == "s" and suit_a != suit_b: continue
+            if kind == "o" and suit_a == suit_b: continue
+            combos.append(_combo_index([high * 4 + suit_a, low * 4 + suit_b]))
+    return combos
+
+def _range_card_id(text):
+    return HE.RANKS.index(text[0]) * 4 + RANGE_SUITS.index(text[1])
+
+def _combo_index(cards):
+    return COMBO_INDEX[tuple(sorted(int(card) for card in cards))]
+
+def _to_card_ids(cards):
+    return [HE.card_id(card) if isinstance(card, str) else int(card) for card in cards]
+
+def _to_mask(cards):
+    return sum([1 << int(card) for card in cards])
+
+def _to_masks(boards):
+    masks = np.zeros(len(boards), dtype=np.uint64)
+    for col in range(boards.shape[1]):
+        masks |= np.uint64(1) << boards[:, col].astype(np.uint64)
+    return masks
+
+def _combination_num(n, k):
+    num = 1
+    for idx in range(k):
+        num = num * (n - idx) // (idx + 1)
+    return num
@@ -23,7 +23,7 @@ setup(
         "License :: OSI Approved :: MIT License",
     ],
     entry_points={
-        'console_scripts': ['pypokergui=pypokergui.__main__:cli']
+        'console_scripts': ['pypokergui=pypokergui.__main__:main']
     },
     )
 
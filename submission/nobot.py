@@ -1,12 +1,19 @@
+import os
 import random
 from pypokerengine.players import BasePokerPlayer
-from pypokerengine.utils.card_utils import gen_cards, estimate_hole_card_win_rate
+from pypokergui.utils.decision_history import DecisionHistory
+from pypokergui.utils.opponent_stats import OpponentTracker
+from pypokergui.utils.profile_store import ProfileStore, ProfileSync
+import pypokergui.utils.range_equity as RE
+
+# Opponent profiles are kept across games and sessions in this database, only when it is set
+PROFILE_DB_PATH = os.environ.get("NOBOT_PROFILE_DB")
+# Number of the latest decisions kept for learning, older ones are overwritten
+HISTORY_SIZE = int(os.environ.get("NOBOT_HISTORY_SIZE", 1000))
 
 class HandStrengthEvaluator:
     @staticmethod
     def evaluate_hand_strength(hole_cards, community_cards):
-        total_cards = hole_cards + community_cards
-
         # Check for premium starting hands
         if len(community_cards) == 0:
             ranks = [card[1] for card in hole_cards]
@@ -44,18 +51,10 @@ class HandStrengthEvaluator:
             # Default preflop strength
             return 0.4
 
-        # For post-flop, we'll use a Monte Carlo simulation
-        if len(total_cards) < 7:
-            win_rate = estimate_hole_card_win_rate(
-                nb_simulation=1000,
-                nb_player=2,
-                hole_card=gen_cards(hole_cards),
-                community_card=gen_cards(community_cards)
-            )
-            return win_rate
-
-        # For completed hands, we'll assign a strength value directly
-        return 0.7  # Default for completed hand
+        # For post-flop, equity against a random hand: enumerated exactly on turn and river,
+        # sampled on the flop
+        win_rate, _ = RE.estimate_equity(hole_cards, community_cards)
+        return win_rate
 
 class PositionEvaluator:
     @staticmethod
@@ -93,46 +92,27 @@ class PositionEvaluator:
         return relative_position
 
 class OpponentModeling:
-    def __init__(self):
-        self.player_profiles = {}  # uuid -> profile data
-
-    def update_profile(self, uuid, action, amount, street, pot_size):
-        if uuid not in self.player_profiles:
-            self.player_profiles[uuid] = {
-                'aggression_factor': 0.5,  # 0 = passive, 1 = aggressive
-                'preflop_vpip': 0.5,       # Voluntarily put money in pot
-                'pfr': 0.3,                # Preflop raise %
-                'af_by_street': {'preflop': 0.5, 'flop': 0.5, 'turn': 0.5, 'river': 0.5},
-                'n_hands': 0,
-                'actions': []
-            }
-
-        profile = self.player_profiles[uuid]
-        profile['n_hands'] += 1
-        profile['actions'].append((street, action, amount, pot_size))
-
-        # Update aggression metrics
-        if action == 'RAISE' or action == 'CALL':
-            # Update VPIP for preflop
-            if street == 'preflop':
-                profile['preflop_vpip'] = (profile['preflop_vpip'] * (profile['n_hands'] - 1) + 1) / profile['n_hands']
-                if action == 'RAISE':
-                    profile['pfr'] = (profile['pfr'] * (profile['n_hands'] - 1) + 1) / profile['n_hands']
-
-            # Update aggression factor
-            if action == 'RAISE':
-                street_af = profile['af_by_street'][street]
-                profile['af_by_street'][street] = (street_af * 4 + 1) / 5  # Exponential moving average
-                profile['aggression_factor'] = sum(profile['af_by_street'].values()) / 4
+    def __init__(self, decay=0.98):
+        # Counters weight roughly the last 1 / (1 - decay) hands of each opponent
+        self.tracker = OpponentTracker(decay, journal=True)
+
+    def observe_round_start(self, seats):
+        self.tracker.receive_round_start(seats)
+
+    def observe_street_start(self, street, round_state):
+        self.tracker.receive_street_start(street, round_state)
+
+    def observe_action(self, uuid, action, amount):
+        self.tracker.receive_action(uuid, action, amount)
 
     def get_exploit_strategy(self, uuid, hand_strength, position_value, pot_odds):
-        if uuid not in self.player_profiles or self.player_profiles[uuid]['n_hands'] < 5:
+        if uuid not in self.tracker.stats or self.tracker.stats[uuid].hands < 5:
             return None  # Not enough data to exploit
 
-        profile = self.player_profiles[uuid]
+        aggression = self.tracker.stats[uuid].aggression_frequency()
 
         # Against aggressive players, tighten up and value bet more
-        if profile['aggression_factor'] > 0.7:
+        if aggression > 0.7:
             # They're aggressive, we should be more selective but value bet stronger
             if hand_strength > 0.7:
                 return 'value_bet'  # Bet for value against aggressive player
@@ -140,7 +120,7 @@ class OpponentModeling:
                 return 'fold'  # Fold weak hands against aggression
 
         # Against passive players, bluff more and value bet thinner
-        elif profile['aggression_factor'] < 0.3:
+        elif aggression < 0.3:
             if position_value > 0.7 and hand_strength > 0.3:
                 return 'bluff'  # Bluff in position against passive players
             elif hand_strength > 0.6:
@@ -176,7 +156,6 @@ class StrategyManager:
         pot = round_state['pot']['main']['amount']
         dealer_btn = round_state['dealer_btn']
         seats = round_state['seats']
-        action_histories = round_state['action_histories']
 
         # Calculate current pot odds
         call_amount = valid_actions[1]['amount']
@@ -188,17 +167,7 @@ class StrategyManager:
         # Evaluate position
         position_value = self.position_evaluator.evaluate_position(seats, dealer_btn, my_uuid)
 
-        # Track opponent actions and update models
-        if street in action_histories:
-            for action_info in action_histories[street]:
-                if action_info['uuid'] != my_uuid:
-                    self.opponent_modeler.update_profile(
-                        action_info['uuid'],
-                        action_info['action'],
-                        action_info.get('amount', 0),
-                        street,
-                        pot
-                    )
+        # Opponent models are updated once per action in receive_game_update_message
 
         # Determine optimal strategy based on hand strength, position, and opponent tendencies
         action, amount = self.determine_strategy(
@@ -315,9 +284,8 @@ class NoBot(BasePokerPlayer):  # Do not forget to make parent class as "BasePoke
         super().__init__()
         self.strategy_manager = StrategyManager()
         self.uuid = None
-        self.hole_cards_history = []
-        self.round_state_history = []
-        self.action_history = []
+        self.profile_sync = None
+        self.history = DecisionHistory(HISTORY_SIZE)
 
     #  we define the logic to make an action through this method. (so this method would be the core of your AI)
     def declare_action(self, valid_actions, hole_card, round_state):
@@ -325,10 +293,6 @@ class NoBot(BasePokerPlayer):  # Do not forget to make parent class as "BasePoke
         if self.uuid is None:
             self.uuid = self.find_my_uuid(round_state)
 
-        # Store history for learning
-        self.hole_cards_history.append(hole_card)
-        self.round_state_history.append(round_state)
-
         # Get the optimal action from our strategy manager
         action, amount = self.strategy_manager.decide_action(
             valid_actions,
@@ -338,8 +302,8 @@ class NoBot(BasePokerPlayer):  # Do not forget to make parent class as "BasePoke
             self.uuid
         )
 
-        # Record our action
-        self.action_history.append((action, amount))
+        # Store history for learning, encoded so that round_state is not kept
+        self.history.record(hole_card, round_state, action, amount, self.uuid)
 
         # Execute the chosen action
         if action == "fold":
@@ -372,13 +336,22 @@ class NoBot(BasePokerPlayer):  # Do not forget to make parent class as "BasePoke
         self.ante_amount = game_info["rule"]["ante"]
         self.blind_structure = game_info["rule"]["blind_structure"]
 
+        # Load saved profiles of the opponents seated in this game
+        if PROFILE_DB_PATH is None:
+            return
+        if self.profile_sync is None:
+            self.profile_sync = ProfileSync(
+                ProfileStore(PROFILE_DB_PATH), self.strategy_manager.opponent_modeler.tracker)
+        self.profile_sync.receive_game_start(game_info["seats"], self.uuid)
+
     def receive_round_start_message(self, round_count, hole_card, seats):
         # Reset round-specific tracking
         self.current_round_hole_card = hole_card
+        self.strategy_manager.opponent_modeler.observe_round_start(seats)
 
     def receive_street_start_message(self, street, round_state):
         # Update state at the beginning of each street
-        pass
+        self.strategy_manager.opponent_modeler.observe_street_start(street, round_state)
 
     def receive_game_update_message(self, new_action, round_state):
         # Track opponent actions for modeling
@@ -387,19 +360,22 @@ class NoBot(BasePokerPlayer):  # Do not forget to make parent class as "BasePoke
 
         # Update our opponent models with this new action
         if new_action['player_uuid'] != self.uuid:
-            street = round_state['street']
-            self.strategy_manager.opponent_modeler.update_profile(
+            self.strategy_manager.opponent_modeler.observe_action(
                 new_action['player_uuid'],
                 new_action['action'],
-                new_action.get('amount', 0),
-                street,
-                round_state['pot']['main']['amount']
+                new_action.get('amount', 0)
             )
 
     def receive_round_result_message(self, winners, hand_info, round_state):
         # Learn from the round result
         self.analyze_round_result(winners, hand_info, round_state)
 
+        # Save opponent profiles in batches, the game result is not notified to AI
+        if self.profile_sync is not None:
+            is_last_round = round_state['round_count'] + 1 >= self.max_round or \
+                len([seat for seat in round_state['seats'] if seat['stack'] > 0]) <= 1
+            self.profile_sync.receive_round_result(is_last_round, self.uuid)
+
     def analyze_round_result(self, winners, hand_info, round_state):
         # Simple win/loss analysis to refine strategy
         my_uuid_in_winners = any(winner['uuid'] == self.uuid for winner in winners)
@@ -0,0 +1,109 @@
+import os
+import sys
+import shutil
+import tempfile
+
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.ai_generator as AG
+
+class AIGeneratorTest(BaseUnitTest):
+
+    def setUp(self):
+        AG.clear_cache()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        AG.clear_cache()
+        shutil.rmtree(self.tmpdir)
+        if self.tmpdir in sys.path: sys.path.remove(self.tmpdir)
+
+    def test_healthcheck(self):
+        self.true(AG.healthcheck(ai_setup_script_path, quiet=True))
+        self.false(AG.healthcheck(self._write_script("broken_ai.py", "x = 1\n"), quiet=True))
+        self.false(AG.healthcheck(os.path.join(self.tmpdir, "missing.py"), quiet=True))
+
+    def test_script_is_imported_once(self):
+        path = self._write_script("sample_ai.py", sample_script)
+        import_count = AG._import_count[0]
+        for _ in range(3):
+            AG.load_setup_method(path)()
+        self.true(AG.healthcheck(path, quiet=True))
+        self.eq(import_count + 1, AG._import_count[0])
+        self.eq(1, sys.path.count(self.tmpdir))
+
+    def test_script_is_reloaded_when_modified(self):
+        path = self._write_script("sample_ai.py", sample_script)
+        first = AG.load_setup_method(path)
+        os.utime(path, (0, os.path.getmtime(path) + 10))
+        self.true(first is not AG.load_setup_method(path))
+
+    def test_superseded_module_is_removed(self):
+        path = self._write_script("sample_ai.py", sample_script)
+        first = AG.load_setup_method(path)
+        os.utime(path, (0, os.path.getmtime(path) + 10))
+        latest = AG.load_setup_method(path)
+        self.false(first.__module__ in sys.modules)
+        self.true(latest.__module__ in sys.modules)
+        self.true(isinstance(first(), AG.BasePokerPlayer))  # built players still work
+        AG.clear_cache()
+        self.false(latest.__module__ in sys.modules)
+
+    def test_broken_edit_keeps_previous_module(self):
+        path = self._write_script("sample_ai.py", sample_script)
+        first = AG.load_setup_method(path)
+        modules = [name for name in sys.modules if name.startswith("_pypokergui_ai_")]
+        self._write_script("sample_ai.py", "raise ValueError('broken')")
+        os.utime(path, (0, os.path.getmtime(path) + 10))
+        with self.assertRaisesRegex(Exception, "broken"):
+            AG.load_setup_method(path)
+        self.true(first.__module__ in sys.modules)
+        self.eq(modules, [name for name in sys.modules if name.startswith("_pypokergui_ai_")])
+
+    def test_find_modified_scripts(self):
+        path = self._write_script("sample_ai.py", sample_script)
+        self.eq([], AG.find_modified_scripts([path]))
+        AG.load_setup_method(path)
+        self.eq([], AG.find_modified_scripts([path]))
+        os.utime(path, (0, os.path.getmtime(path) + 10))
+        self.eq([path], AG.find_modified_scripts([path, path]))
+        AG.load_setup_method(path)
+        self.eq([], AG.find_modified_scripts([path]))
+
+    def test_pinned_script_keeps_its_version(self):
+        path = self._write_script("sample_ai.py", sample_script)
+        pinned = AG.load_setup_method(path, pinned=True)
+        os.utime(path, (0, os.path.getmtime(path) + 10))
+        latest = AG.load_setup_method(path)
+        self.true(pinned is AG.load_setup_method(path, pinned=True))
+        self.true(pinned is not latest)
+        self.true(pinned.__module__ != latest.__module__)
+        self.true(sys.modules[pinned.__module__] is not sys.modules[latest.__module__])
+        os.utime(path, (0, os.path.getmtime(path) + 10))
+        newer = AG.load_setup_method(path)
+        self.true(pinned.__module__ in sys.modules)
+        self.false(latest.__module__ in sys.modules)
+        self.true(newer.__module__ in sys.modules)
+
+    def test_load_setup_method_of_broken_script(self):
+        path = self._write_script("broken_ai.py", "def setup_ai():\n    return 1\n")
+        with self.assertRaises(Exception):
+            AG.load_setup_method(path)
+
+    def _write_script(self, filename, source):
+        path = os.path.join(self.tmpdir, filename)
+        with open(path, "w") as f:
+            f.write(source)
+        return path
+
+ai_setup_script_path = os.path.join(os.path.dirname(__file__), "server", "sample_ai_setup_script.py")
+
+sample_script = """
+from pypokerengine.players import BasePokerPlayer
+
+class SamplePlayer(BasePokerPlayer):
+    pass
+
+def setup_ai():
+    return SamplePlayer()
+"""
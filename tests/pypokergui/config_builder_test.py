@@ -9,7 +9,8 @@ except ImportError:
 
 import yaml
 
-from pypokergui.config_builder import build_config
+from pypokergui.config_builder import AIPlayer, build_config, check_ai_players, compile_config, \
+        healthy_bots, load_config
 
 class ConfigBuilderTest(BaseUnitTest):
 
@@ -40,6 +41,85 @@ class ConfigBuilderTest(BaseUnitTest):
         self.eq("FIXME:your-ai-name", data["ai_players"][0]["name"])
         self.eq("FIXME:your-setup-script-path", data["ai_players"][0]["path"])
 
+    def test_load_utf16_config(self):
+        with open(tmp_file_path, "w", encoding="utf-16") as f:
+            f.write(config_text)
+        config = load_config(tmp_file_path)
+        self.eq((10, 100, 5, 0), config.rules[:4])
+        self.eq(((1, 5, 0),), config.rules.blind_structure)
+        self.eq((False, False, 60), config[2:])
+        self.eq((AIPlayer("fish", ai_setup_script_path, False, None),), config.ai_players)
+
+    def test_load_config_without_ai_players(self):
+        with open(tmp_file_path, "w") as f:
+            f.write(config_text.split("ai_players")[0] + "ai_players:\n")
+        self.eq((), load_config(tmp_file_path).ai_players)
+
+    def test_load_invalid_config(self):
+        with open(tmp_file_path, "w") as f:
+            f.write(config_text.replace("ante: 0\n", ""))
+        with self.assertRaisesRegex(Exception, "misses keys \\['ante'\\]"):
+            load_config(tmp_file_path)
+        with open(tmp_file_path, "w") as f:
+            f.write(config_text.replace("path:", "pass:"))
+        with self.assertRaisesRegex(Exception, "needs a name and a path"):
+            load_config(tmp_file_path)
+
+    def test_every_error_is_reported(self):
+        config = yaml.safe_load(config_text)
+        config.update({ "blind_structure": { 3: { "small_blind": 0, "ante": 1 } }, "fast_forward": "yes" })
+        config["ai_players"].append({ "name": "ghost", "path": "no_such_script.py" })
+        with self.assertRaises(Exception) as context:
+            compile_config(config, "conf.yaml")
+        self.eq("\n  ".join([
+            "Invalid config [ conf.yaml ] :",
+            "small_blind of round 3 must be an integer >= 1 but was 0",
+            "fast_forward must be true or false but was 'yes'"
+            ]), str(context.exception))
+
+    def test_rules_are_compiled(self):
+        config = yaml.safe_load(config_text)
+        config["blind_structure"] = { 3: { "small_blind": 10, "ante": 1 } }
+        rules = compile_config(config).rules
+        self.eq((5, 0), rules.blind_levels[2])
+        self.eq((10, 1), rules.blind_levels[10])
+        self.eq(11, len(rules.blind_levels))
+
+    def test_check_ai_players(self):
+        config = yaml.safe_load(config_text)
+        config["ai_players"].append({ "name": "broken", "path": __file__, "pin": True })
+        config["ai_players"].append({ "name": "ghost", "path": "no_such_script.py" })
+        config = compile_config(config)
+        self.eq("script [ no_such_script.py ] does not exist", config.ai_players[2].error)
+        config = check_ai_players(config)
+        self.none(config.ai_players[0].error)
+        self.include("setup_ai", config.ai_players[1].error)
+        self.true(config.ai_players[1].pin)
+        self.eq("script [ no_such_script.py ] does not exist", config.ai_players[2].error)
+        logs = []
+        self.eq([("fish", ai_setup_script_path)], healthy_bots(config, log=logs.append))
+        self.size(2, logs)
+        self.include("Skip [ broken ]", logs[0])
+
+    def test_check_ai_players_in_parallel(self):
+        config = yaml.safe_load(config_text)
+        config["ai_players"] += [{ "name": "broken", "path": __file__ }, { "name": "fish2", "path": ai_setup_script_path }]
+        config = check_ai_players(compile_config(config), processes=2)
+        self.eq([None, None], [config.ai_players[0].error, config.ai_players[2].error])
+        self.not_none(config.ai_players[1].error)
+
+
+ai_setup_script_path = os.path.join(os.path.dirname(__file__), "server", "sample_ai_setup_script.py")
+
+config_text = """max_round: 10
+initial_stack: 100
+small_blind: 5
+ante: 0
+blind_structure: null
+ai_players:
+  - name: fish
+    path: %s
+""" % ai_setup_script_path
 
 tmp_file_path = os.path.join(os.path.dirname(__file__), "config_builder_test_tmp.yaml")
 
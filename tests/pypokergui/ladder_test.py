@@ -0,0 +1,63 @@
+import io
+import json
+import os
+
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.ladder as Ladder
+
+class LadderTest(BaseUnitTest):
+
+    def test_iter_ladder(self):
+        bots = [("hoge", ai_setup_script_path), ("fuga", ai_setup_script_path), ("boo", ai_setup_script_path)]
+        events = list(Ladder.iter_ladder(bots, rule, 2))
+        pairings = [event for event in events if event["type"] == "pairing"]
+        self.eq([["hoge", "fuga"], ["hoge", "boo"], ["fuga", "boo"]], [event["players"] for event in pairings])
+        games = [event for event in events if event["type"] == "game"]
+        self.size(6, games)
+        hands = [event for event in events if event["type"] == "hand"]
+        self.eq(sum([event["hands"] for event in pairings]), len(hands))
+        first = hands[0]
+        self.eq((0, 0, 1), (first["pairing"], first["game"], first["hand"]))
+        self.eq(["fuga", "hoge"], sorted(first["stacks"].keys()))
+        self.true(set(first["winners"]) <= set(["hoge", "fuga"]))
+        self.eq(200, sum(games[0]["stacks"].values()))
+        self.include(games[0]["winner"], ["hoge", "fuga"])
+        self.eq(2, sum(pairings[0]["wins"].values()))
+
+    def test_same_name_seated_twice(self):
+        bots = [("hoge", ai_setup_script_path), ("hoge", ai_setup_script_path)]
+        events = list(Ladder.iter_ladder(bots, rule, 2))
+        pairing = events[-1]
+        self.eq(["hoge#1", "hoge#2"], pairing["players"])
+        self.eq(["hoge#1", "hoge#2"], sorted(pairing["wins"].keys()))
+        self.eq(2, sum(pairing["wins"].values()))
+        games = [event for event in events if event["type"] == "game"]
+        self.eq(["hoge#1", "hoge#2"], sorted(games[0]["stacks"].keys()))
+
+    def test_max_hands(self):
+        bots = [("hoge", ai_setup_script_path), ("fuga", ai_setup_script_path), ("boo", ai_setup_script_path)]
+        events = list(Ladder.iter_ladder(bots, rule, 10, max_hands=5))
+        self.size(5, [event for event in events if event["type"] == "hand"])
+        # games have 3 hands, the second one is cut
+        self.eq(["game", "pairing"], [event["type"] for event in events if event["type"] != "hand"])
+        self.eq(5, events[-1]["hands"])
+        self.eq(1, events[-1]["games"])
+
+    def test_write_jsonl(self):
+        bots = [("hoge", ai_setup_script_path), ("fuga", ai_setup_script_path)]
+        f = io.StringIO()
+        line_num = Ladder.write_jsonl(Ladder.iter_ladder(bots, rule, 1), f)
+        lines = f.getvalue().splitlines()
+        self.eq(line_num, len(lines))
+        self.eq(["hand"] * (line_num - 2) + ["game", "pairing"], [json.loads(line)["type"] for line in lines])
+
+rule = {
+        "max_round": 4,
+        "initial_stack": 100,
+        "small_blind": 5,
+        "ante": 0,
+        "blind_structure": None
+        }
+
+ai_setup_script_path = os.path.join(os.path.dirname(__file__), "server", "sample_ai_setup_script.py")
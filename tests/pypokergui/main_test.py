@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+from mock import patch
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.__main__ as Main
+
+class MainTest(BaseUnitTest):
+
+    def test_build_config_does_not_import_server(self):
+        code = "import sys, runpy; sys.argv = ['pypokergui', 'build_config']; " \
+                "runpy.run_module('pypokergui', run_name='__main__'); " \
+                "sys.stderr.write(' '.join(sorted(sys.modules)))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        self.include("max_round: 10", result.stdout)
+        modules = result.stderr.split()
+        self.false([name for name in modules if name.split(".")[0] in ["tornado", "numpy", "pypokerengine"]])
+
+    def tearDown(self):
+        if os.path.exists(config_path):
+            os.remove(config_path)
+
+    @patch("webbrowser.open")
+    @patch("pypokergui.server.poker.start_server")
+    def test_serve_passes_parsed_config(self, start_server, open_browser):
+        with open(config_path, "w") as f:
+            f.write("max_round: 5\ninitial_stack: 100\nsmall_blind: 5\nante: 0\nblind_structure: null\nai_players: []\n")
+        Main.serve(config_path, 8000, "fast", 0, open_browser=False)
+        self.false(open_browser.called)
+        config = start_server.call_args[0][0]
+        self.eq(5, config.rules.max_round)
+        self.eq((5, 0), config.rules.blind_levels[5])
+        self.eq((8000, "fast", 0), start_server.call_args[0][1:])
+        Main.serve(config_path, 8000, "fast", 0)
+        open_browser.assert_called_once_with("http://localhost:8000")
+
+root = os.path.join(os.path.dirname(__file__), "..", "..")
+config_path = os.path.join(os.path.dirname(__file__), "main_test_tmp.yaml")
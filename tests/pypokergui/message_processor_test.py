@@ -2,6 +2,8 @@ from pypokerengine.engine.card import Card
 from pypokerengine.engine.deck import Deck
 from tests.base_unittest import BaseUnitTest
 
+import pypokerengine.utils.action_utils as AU
+
 import pypokergui.engine_wrapper as Engine
 
 class EngineWrapperTest(BaseUnitTest):
@@ -33,6 +35,32 @@ class EngineWrapperTest(BaseUnitTest):
         self.eq([MSG_GU, MSG_AK], fuga_msg)
         self.eq([MSG_GU], boo_msg)
 
+    def test_legal_actions_per_step(self):
+        players_info = Engine.gen_players_info(["hoge", "fuga", "boo"], ["HOGE", "FUGA", "BOO"])
+        engine = Engine.EngineWrapper()
+        msgs = engine.start_game(players_info, Engine.gen_game_config(5, 100, 10, 1))
+        self.eq(1, engine.step)
+        state = engine.current_state
+        expected = AU.generate_legal_actions(state["table"].seats.players, state["next_player"], state["small_blind_amount"])
+        self.eq(expected, engine.legal_actions)
+        self.true(engine.legal_actions is msgs[-1][1]["message"]["valid_actions"])
+        engine.update_game("call", 10)
+        self.eq(2, engine.step)
+        self.eq(20, engine.legal_actions[1]["amount"])
+
+    def test_correct_action(self):
+        legal_actions = [
+                { "action": "fold", "amount": 0 },
+                { "action": "call", "amount": 10 },
+                { "action": "raise", "amount": { "min": 20, "max": 100 } }
+                ]
+        self.eq(("call", 10), Engine.correct_action(legal_actions, "call", 0))
+        self.eq(("raise", 50), Engine.correct_action(legal_actions, "raise", 50))
+        self.eq(("fold", 0), Engine.correct_action(legal_actions, "raise", 101))
+        self.eq(("fold", 0), Engine.correct_action(legal_actions, "allin", 50))
+        legal_actions[2]["amount"] = { "min": -1, "max": -1 }
+        self.eq(("fold", 0), Engine.correct_action(legal_actions, "raise", -1))
+
     def test_update_game_when_round_finished(self):
         uuid_list = ["hoge", "fuga", "boo"]
         name_list = ["HOGE", "FUGA", "BOO"]
@@ -84,19 +112,51 @@ class EngineWrapperTest(BaseUnitTest):
         self.eq(100, config['initial_stack'])
         self.eq(10, config['small_blind'])
         self.eq(1, config['ante'])
-        self.eq(1, config['blind_structure'][1]['ante'])
+        self.eq(((1, 10, 1),), config['blind_structure'])
 
     def test_gen_game_config_with_blind_structure(self):
         config = Engine.gen_game_config(5, 100, 10, 1, blind_structure)
-        self.eq(1, config['blind_structure'][1]['ante'])
-        self.eq(5, config['blind_structure'][2]['ante'])
-
-    def test_get_forced_bet_amount(self):
-        self.eq((10, 1), Engine._get_forced_bet_amount(1, blind_structure))
-        self.eq((20, 5), Engine._get_forced_bet_amount(2, blind_structure))
-        self.eq((30, 10), Engine._get_forced_bet_amount(3, blind_structure))
-        self.eq((30, 10), Engine._get_forced_bet_amount(4, blind_structure))
-        self.eq((50, 20), Engine._get_forced_bet_amount(5, blind_structure))
+        self.eq(((1, 10, 1), (2, 20, 5), (3, 30, 10), (5, 50, 20)), config['blind_structure'])
+
+    def test_compile_blind_structure(self):
+        structure = Engine.gen_rule_info(Engine.gen_game_config(5, 100, 10, 1, blind_structure))['blind_structure']
+        levels = Engine.compile_blind_structure(structure, 6)
+        self.eq(7, len(levels))
+        self.eq([(10, 1), (20, 5), (30, 10), (30, 10), (50, 20), (50, 20)], levels[1:])
+
+    def test_game_rules_are_compiled(self):
+        rule = Engine.gen_game_config(5, 100, 10, 1, blind_structure)
+        self.eq(rule.blind_levels, tuple(Engine.compile_blind_structure(Engine.gen_rule_info(rule)['blind_structure'], 5)))
+        self.eq(10, rule.get('small_blind'))
+        self.none(rule.get('hoge'))
+        self.false(1 in blind_structure)  # the structure of the caller is not modified
+        with self.assertRaises(AttributeError):
+            rule.max_round = 10
+        # players get a copy, changing it does not change the rule
+        Engine.gen_rule_info(rule)['blind_structure'][2]['ante'] = 100
+        self.eq(5, Engine.gen_rule_info(rule)['blind_structure'][2]['ante'])
+
+    def test_invalid_rule(self):
+        with self.assertRaisesRegex(Exception, "max_round must be an integer >= 1 but was 0"):
+            Engine.gen_game_config(0, 100, 10, 1)
+        errors = Engine.find_rule_errors(5, "100", 10, -1, { 2: { 'small_blind': 20 }, "x": 3 })
+        self.eq([
+            "initial_stack must be an integer >= 1 but was '100'",
+            "ante must be an integer >= 0 but was -1",
+            "ante of round 2 must be an integer >= 0 but was None",
+            "round count of blind_structure must be an integer >= 1 but was 'x'",
+            "level of round 'x' must have small_blind and ante but was 3"
+            ], errors)
+        self.eq(["blind_structure must map round counts to levels but was [1, 2]"],
+                Engine.find_rule_errors(5, 100, 10, 1, [1, 2]))
+
+    def test_start_game_with_initial_stacks(self):
+        players_info = Engine.gen_players_info(["hoge", "fuga"], ["HOGE", "FUGA"])
+        game_config = Engine.gen_game_config(5, 100, 10, 0)
+        engine = Engine.EngineWrapper()
+        engine.start_game(players_info, game_config, {"hoge": 300, "fuga": 50})
+        stacks = [p.stack + p.pay_info.amount for p in engine.current_state['table'].seats.players]
+        self.eq([300, 50], stacks)
 
 blind_structure = {
         2 : { 'small_blind': 20, 'ante': 5 },
@@ -0,0 +1,95 @@
+import os
+
+from mock import patch
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.ranking as Ranking
+
+class RankingTest(BaseUnitTest):
+
+    def test_running_stats(self):
+        stats = Ranking.RunningStats()
+        for value in [1, 2, 3, 4]:
+            stats.push(value)
+        self.eq(4, stats.n)
+        self.almosteq(2.5, stats.mean, 1e-9)
+        self.almosteq(5.0 / 3, stats.variance(), 1e-9)
+
+    def test_running_stats_merge(self):
+        left, right, total = Ranking.RunningStats(), Ranking.RunningStats(), Ranking.RunningStats()
+        for value in [1, 5, 2]:
+            left.push(value)
+            total.push(value)
+        for value in [8, -3]:
+            right.push(value)
+            total.push(value)
+        left.merge(right)
+        self.eq(total.n, left.n)
+        self.almosteq(total.mean, left.mean, 1e-9)
+        self.almosteq(total.variance(), left.variance(), 1e-9)
+
+    def test_sprt_status(self):
+        sprt = Ranking.SPRT(delta=0.1, min_hands=10)
+        winning, losing, even = Ranking.RunningStats(), Ranking.RunningStats(), Ranking.RunningStats()
+        for i in range(200):
+            noise = 1 if i % 2 else -1
+            winning.push(1 + noise)
+            losing.push(-1 + noise)
+            even.push(noise)
+        self.eq(Ranking.ACCEPT_H1, sprt.status(winning))
+        self.eq(Ranking.ACCEPT_H0, sprt.status(losing))
+        self.none(sprt.status(even))
+
+    def test_sprt_status_waits_for_min_hands(self):
+        sprt = Ranking.SPRT(delta=0.1, min_hands=10)
+        stats = Ranking.RunningStats()
+        for value in [5, 6, 7]:
+            stats.push(value)
+        self.none(sprt.status(stats))
+
+    def test_update_elo(self):
+        self.eq((1516, 1484), Ranking.update_elo(1500, 1500, 1.0))
+        self.eq((1500, 1500), Ranking.update_elo(1500, 1500, 0.5))
+
+    def test_play_pairing(self):
+        sprt = Ranking.SPRT(delta=0.1, min_hands=10)
+        bots = [("hoge", ai_setup_script_path), ("fuga", ai_setup_script_path)]
+        stats, verdict = Ranking.play_pairing(bots[0], bots[1], rule, sprt, max_hands=12)
+        self.true(10 <= stats.n <= 12)
+        if stats.n < 12:
+            self.include(verdict, [Ranking.ACCEPT_H1, Ranking.ACCEPT_H0])
+        else:
+            self.include(verdict, [Ranking.ACCEPT_H1, Ranking.ACCEPT_H0, Ranking.INCONCLUSIVE])
+
+    def test_play_pairing_measures_hands_in_their_big_blind(self):
+        sprt = Ranking.SPRT(delta=0.1, min_hands=10)
+        bots = [("hoge", ai_setup_script_path), ("fuga", ai_setup_script_path)]
+        level_rule = dict(rule, blind_structure={ 2: { "small_blind": 10, "ante": 0 } })
+        events = [
+                { "type": "round", "round_count": 1, "stacks": { "0": 110, "1": 90 } },
+                { "type": "round", "round_count": 2, "stacks": { "0": 130, "1": 70 } },
+                { "type": "game", "stacks": { "0": 130, "1": 70 } }
+                ]
+        with patch('pypokergui.simulator.play_game', side_effect=lambda game_manager: iter(events)):
+            stats, _verdict = Ranking.play_pairing(bots[0], bots[1], level_rule, sprt, max_hands=2)
+        self.eq(2, stats.n)
+        self.almosteq(1.0, stats.mean, 1e-9)
+
+    def test_rank_bots(self):
+        bots = [("hoge", ai_setup_script_path), ("fuga", ai_setup_script_path), ("boo", ai_setup_script_path)]
+        leaderboard, pairings = Ranking.rank_bots(bots, rule, min_hands=5, max_hands=5)
+        self.size(3, pairings)
+        self.eq(["boo", "fuga", "hoge"], sorted([entry["name"] for entry in leaderboard]))
+        self.almosteq(3 * Ranking.DEFAULT_ELO, sum([entry["elo"] for entry in leaderboard]), 1e-6)
+        for entry in leaderboard:
+            self.eq(10, entry["hands"])
+
+rule = {
+        "max_round": 10,
+        "initial_stack": 100,
+        "small_blind": 5,
+        "ante": 0,
+        "blind_structure": None
+        }
+
+ai_setup_script_path = os.path.join(os.path.dirname(__file__), "server", "sample_ai_setup_script.py")
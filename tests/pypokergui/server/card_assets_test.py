@@ -0,0 +1,28 @@
+from mock import Mock
+
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.server.card_assets as CA
+
+class CardAssetsTest(BaseUnitTest):
+
+    def test_cards(self):
+        self.size(52, set(CA.CARDS))
+        self.eq("images/spade/A.png", CA.image_path("SA"))
+        self.eq("images/club/T.png", CA.image_path("CT"))
+        self.eq("Ace of Spades", CA.card_name(None, "SA"))
+        self.eq("Ten of Clubs", CA.card_name(None, "CT"))
+
+    def test_card_url_is_resolved_once_per_application(self):
+        handler = Mock()
+        handler.application.card_urls = None
+        handler.static_url.side_effect = lambda path: "/static/%s?v=1&x=2" % path
+        self.eq("/static/images/heart/2.png?v=1&amp;x=2", CA.card_url(handler, "H2"))
+        self.eq("/static/images/poker_pot.png?v=1&amp;x=2", CA.card_url(handler, "pot"))
+        self.eq(53, handler.static_url.call_count)
+
+    def test_strength_label(self):
+        self.eq("FLUSH", CA.strength_label(None, "FLASH"))
+        self.eq("THREE OF A KIND", CA.strength_label(None, "THREECARD"))
+        self.eq("FULL HOUSE", CA.strength_label(None, "FULLHOUSE"))
+        self.eq("HOGE", CA.strength_label(None, "HOGE"))
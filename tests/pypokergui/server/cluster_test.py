@@ -0,0 +1,90 @@
+import os
+import tempfile
+
+import tornado.gen
+import tornado.ioloop
+import tornado.netutil
+
+from mock import patch
+from tests.base_unittest import BaseUnitTest
+
+from pypokergui.server.game_manager import GameManager
+from pypokergui.server.lobby import LobbyIndex
+import pypokergui.server.cluster as Cluster
+
+class ClusterTest(BaseUnitTest):
+
+    def setUp(self):
+        self.broker_path = os.path.join(tempfile.mkdtemp(), "broker.sock")
+
+    def tearDown(self):
+        if os.path.exists(self.broker_path): os.remove(self.broker_path)
+
+    def test_table_status_reaches_broker(self):
+        lobby = LobbyIndex()
+        gm = GameManager()
+        gm.define_rule(10, 100, 5, 0, None)
+
+        async def run():
+            broker = Cluster.TableBroker(lobby)
+            broker.add_socket(tornado.netutil.bind_unix_socket(self.broker_path))
+            client = Cluster.BrokerClient(self.broker_path, 2, 8002)
+            gm.status_listeners.append(client.publish)
+            gm.join_human_player("hoge", "abcd")
+            gm.join_human_player("fuga", "efgh")
+            for _ in range(20):
+                await tornado.gen.sleep(0.01)
+                if lobby.tables.get(2, {}).get("players") == ["hoge", "fuga"]: break
+            broker.stop()
+
+        tornado.ioloop.IOLoop.current().run_sync(run)
+        tables = lobby.tables
+        self.eq(["hoge", "fuga"], tables[2]["players"])
+        self.eq(8002, tables[2]["port"])
+        self.eq("waiting", tables[2]["status"])
+        self.eq(5, tables[2]["small_blind"])
+
+    def test_table_reconnects_and_closed_table_is_removed(self):
+        lobby = LobbyIndex()
+        gm = GameManager()
+        gm.define_rule(10, 100, 5, 0, None)
+        seen = []
+
+        async def wait_for(condition):
+            for _ in range(50):
+                await tornado.gen.sleep(0.01)
+                if condition(): return
+
+        async def run():
+            broker = Cluster.TableBroker(lobby)
+            broker.add_socket(tornado.netutil.bind_unix_socket(self.broker_path))
+            client = Cluster.BrokerClient(self.broker_path, 2, 8002)
+            client.publish(gm)
+            await wait_for(lambda: 2 in lobby.tables)
+            first_stream = client.stream
+            first_stream.close()  # like the lobby process restarted
+            await wait_for(lambda: 2 not in lobby.tables)
+            seen.append(2 in lobby.tables)
+            await wait_for(lambda: 2 in lobby.tables)
+            seen.append(client.stream is not first_stream and not client.stream.closed())
+            client.stream.close()
+            client.stream = None  # no reconnection, like the table process died
+            await wait_for(lambda: 2 not in lobby.tables)
+            broker.stop()
+
+        with patch("pypokergui.server.cluster.RECONNECT_DELAY", 0.05):
+            tornado.ioloop.IOLoop.current().run_sync(run)
+        self.eq([False, True], seen)
+        self.false(2 in lobby.tables)
+
+    def test_publish_without_broker(self):
+        gm = GameManager()
+        client = Cluster.BrokerClient(self.broker_path, 1, 8001)
+
+        async def run():
+            client.publish(gm)
+            await tornado.gen.sleep(0.01)
+
+        tornado.ioloop.IOLoop.current().run_sync(run)
+        self.none(client.stream)
+        self.eq(1, client.latest["table_id"])
@@ -3,7 +3,7 @@ import os
 from tests.base_unittest import BaseUnitTest
 from tests.pypokergui.server.sample_ai_setup_script import FishPlayer
 
-from pypokergui.server.game_manager import GameManager
+from pypokergui.server.game_manager import GameManager, gen_table_status
 
 class GameManagerTest(BaseUnitTest):
 
@@ -16,11 +16,11 @@ class GameManagerTest(BaseUnitTest):
         self.eq(self.GM.rule["initial_stack"], 2)
         self.eq(self.GM.rule["small_blind"], 3)
         self.eq(self.GM.rule["ante"], 4)
-        self.eq(self.GM.rule["blind_structure"], {1: {"small_blind": 3, "ante":4}})
+        self.eq(self.GM.rule["blind_structure"], ((1, 3, 4),))
 
     def test_join_ai_player(self):
         self.GM.join_ai_player("hoge", "fuga")
-        expected = [{ "type": "ai", "uuid":'0', "name": "hoge", "setup_script_path": "fuga" }]
+        expected = [{ "type": "ai", "uuid":'0', "name": "hoge", "setup_script_path": "fuga", "pinned": False }]
         self.eq(expected, self.GM.members_info)
 
     def test_join_human_player(self):
@@ -77,4 +77,108 @@ class GameManagerTest(BaseUnitTest):
         self.eq("call", action)
         self.eq(20, amount)
 
+    def test_finish_game(self):
+        self.GM.define_rule(2, 100, 10, 5, None)
+        self.GM.join_ai_player("hoge", ai_setup_script_path)
+        self.GM.join_ai_player("fuga", ai_setup_script_path)
+        self.GM.start_game()
+        while self.GM.next_player_uuid:
+            self.true(self.GM.is_playing_poker)
+            self.GM.update_game(*self.GM.ask_action_to_ai_player(self.GM.next_player_uuid))
+        self.false(self.GM.is_playing_poker)
+
+    def test_start_next_game_reuses_engine_and_ai_players(self):
+        self.GM.define_rule(10, 100, 10, 5, None)
+        self.GM.join_ai_player("hoge", ai_setup_script_path)
+        self.GM.join_ai_player("fuga", ai_setup_script_path)
+        self.GM.start_game()
+        self.GM.update_game("fold", 0)
+        self.GM.record_hole_card("0", ["SA", "HA"])
+        engine, ai_players = self.GM.engine, dict(self.GM.ai_players)
+        self.GM.start_next_game()
+        self.eq(2, self.GM.game_count)
+        self.true(self.GM.is_playing_poker)
+        self.true(engine is self.GM.engine)
+        for uuid, player in ai_players.items():
+            self.true(player is self.GM.ai_players[uuid])
+        self.eq({}, self.GM.hole_cards)
+        self.eq(1, self.GM.engine.current_state["round_count"])
+        self.eq([100, 100], [p.stack + p.pay_info.amount for p in self.GM.engine.current_state["table"].seats.players])
+
+    def test_has_human_in_hand(self):
+        self.GM.define_rule(10, 100, 10, 5, None)
+        self.GM.join_ai_player("hoge", ai_setup_script_path)
+        self.GM.join_human_player("boo", "bar")
+        self.GM.join_ai_player("fuga", ai_setup_script_path)
+        self.GM.start_game()
+        self.true(self.GM.has_human_in_hand())
+        while self.GM.next_player_uuid != "bar":
+            self.GM.update_game(*self.GM.ask_action_to_ai_player(self.GM.next_player_uuid))
+        self.GM.update_game("fold", 0)
+        self.false(self.GM.has_human_in_hand())
+
+    def test_round_updates(self):
+        self.GM.define_rule(10, 100, 10, 5, None)
+        self.GM.join_ai_player("hoge", ai_setup_script_path)
+        self.GM.join_ai_player("fuga", ai_setup_script_path)
+        self.GM.start_game()
+        self.eq(1, self.GM.game_first_seq)
+        self.eq(list(range(1, len(self.GM.latest_updates) + 1)), [u.seq for u in self.GM.latest_updates])
+        self.eq("round_start_message", self.GM.round_updates[0].message_type)
+        last_seq = self.GM.update_seq
+        self.GM.update_game("fold", 0)
+        self.eq(last_seq + 1, self.GM.latest_updates[0].seq)
+        self.eq("round_start_message", self.GM.round_updates[0].message_type)
+        self.true(self.GM.round_updates[0].seq > last_seq)
+
+    def test_release_human_player_while_playing(self):
+        self.GM.define_rule(10, 100, 10, 5, None)
+        self.GM.join_ai_player("hoge", ai_setup_script_path)
+        self.GM.join_human_player("boo", "bar")
+        self.GM.join_ai_player("fuga", ai_setup_script_path)
+        self.GM.start_game()
+        self.GM.hold_human_player("bar")
+        self.include("bar", self.GM.held_players)
+        self.GM.release_human_player("bar")
+        self.include("bar", self.GM.away_players)
+        self.false(self.GM.has_human_in_hand())
+        while self.GM.next_player_uuid != "bar":
+            self.GM.update_game(*self.GM.ask_action_to_ai_player(self.GM.next_player_uuid))
+        self.include(self.GM.ask_action_to_ai_player("bar")[0], ["fold", "call"])
+        self.GM.start_next_game()
+        self.none(self.GM.get_human_player_info("bar"))
+        self.eq(set(), self.GM.away_players)
+
+    def test_release_human_player_before_game(self):
+        self.GM.join_human_player("boo", "bar")
+        self.GM.hold_human_player("bar")
+        self.GM.return_human_player("bar")
+        self.eq(set(), self.GM.held_players)
+        self.GM.hold_human_player("bar")
+        self.GM.release_human_player("bar")
+        self.none(self.GM.get_human_player_info("bar"))
+
+    def test_status_listeners(self):
+        statuses = []
+        self.GM.status_listeners.append(lambda gm: statuses.append(gen_table_status(gm)))
+        self.GM.define_rule(10, 100, 10, 5, None)
+        self.GM.join_ai_player("hoge", ai_setup_script_path)
+        self.GM.join_ai_player("fuga", ai_setup_script_path)
+        self.GM.start_game()
+        self.eq(["hoge"], statuses[0]["players"])
+        self.eq({"players": ["hoge", "fuga"], "small_blind": 10, "ante": 5, "max_round": 10,
+            "status": "playing", "hand_count": 1, "game_count": 1}, statuses[-1])
+        self.GM.update_game("fold", 0)
+        self.eq(2, statuses[-1]["hand_count"])
+
+    def test_reset_game(self):
+        self.GM.define_rule(10, 100, 10, 5, None)
+        self.GM.join_ai_player("hoge", ai_setup_script_path)
+        self.GM.join_ai_player("fuga", ai_setup_script_path)
+        self.GM.start_game()
+        self.GM.reset_game()
+        self.false(self.GM.is_playing_poker)
+        self.eq([], self.GM.latest_messages)
+        self.none(self.GM.next_player_uuid)
+
 ai_setup_script_path = os.path.join(os.path.dirname(__file__), "sample_ai_setup_script.py")
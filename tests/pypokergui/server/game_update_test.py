@@ -0,0 +1,36 @@
+from mock import Mock
+
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.server.game_update as GU
+
+class GameUpdateTest(BaseUnitTest):
+
+    def test_gen_game_updates(self):
+        update = { "type": "notification", "message": { "message_type": "round_start_message",
+            "round_count": 1, "hole_card": ["SA", "HA"], "seats": [] } }
+        game_update = GU.gen_game_updates([("0", update)])[0]
+        self.eq("0", game_update.destination)
+        self.eq("round_start_message", game_update.message_type)
+        self.eq(["SA", "HA"], game_update.hole_card)
+        self.true(game_update.message is update["message"])
+        self.false(game_update.is_broadcast())
+        with self.assertRaises(AttributeError):
+            game_update.extra = 1
+
+    def test_dispatch_to_ai(self):
+        round_state = { "street": "flop" }
+        update = { "type": "notification", "message": { "message_type": "street_start_message",
+            "street": "flop", "round_state": round_state } }
+        player = Mock()
+        GU.dispatch_to_ai(player, GU.GameUpdate(-1, update))
+        player.receive_street_start_message.assert_called_once_with("flop", round_state)
+        self.true(player.receive_street_start_message.call_args[0][1] is round_state)
+
+    def test_dispatch_ignored_messages(self):
+        player = Mock()
+        update = { "type": "ask", "message": { "message_type": "ask_message" } }
+        GU.dispatch_to_ai(player, GU.GameUpdate("0", update))
+        self.eq([], player.method_calls)
+        with self.assertRaises(Exception):
+            GU.dispatch_to_ai(player, GU.GameUpdate("0", { "message": { "message_type": "hoge" } }))
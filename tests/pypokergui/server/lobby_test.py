@@ -0,0 +1,67 @@
+import json
+
+import tornado.testing
+import tornado.web
+
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.server.lobby as Lobby
+
+class LobbyIndexTest(BaseUnitTest):
+
+    def setUp(self):
+        self.lobby = Lobby.LobbyIndex()
+        for table_id in [3, 1, 2]:
+            self.lobby.update_table(gen_status(table_id))
+
+    def test_get_tables(self):
+        self.eq([1, 2, 3], [status["table_id"] for status in self.lobby.get_tables(0, 10)])
+        self.eq([2], [status["table_id"] for status in self.lobby.get_tables(1, 1)])
+
+    def test_get_page(self):
+        etag, body = self.lobby.get_page(0, 2)
+        page = json.loads(body)
+        self.eq(3, page["total"])
+        self.eq([1, 2], [status["table_id"] for status in page["tables"]])
+        self.true(self.lobby.get_page(0, 2)[1] is body)
+
+    def test_etag_changes_only_with_tables_on_page(self):
+        first, second = self.lobby.get_page(0, 2)[0], self.lobby.get_page(2, 2)[0]
+        self.lobby.update_table(gen_status(3, status="playing"))
+        self.eq(first, self.lobby.get_page(0, 2)[0])
+        self.neq(second, self.lobby.get_page(2, 2)[0])
+        self.lobby.update_table(gen_status(1))  # same status
+        self.eq(first, self.lobby.get_page(0, 2)[0])
+        self.lobby.remove_table(2)
+        self.neq(first, self.lobby.get_page(0, 2)[0])
+
+class LobbyApiHandlerTest(tornado.testing.AsyncHTTPTestCase):
+
+    def get_app(self):
+        app = tornado.web.Application([(r"/api/tables", Lobby.LobbyApiHandler)])
+        app.lobby = Lobby.LobbyIndex()
+        for table_id in range(1, 6):
+            app.lobby.update_table(gen_status(table_id))
+        return app
+
+    def test_get_tables(self):
+        response = self.fetch("/api/tables?offset=1&limit=2")
+        self.assertEqual(200, response.code)
+        page = json.loads(response.body)
+        self.assertEqual([2, 3], [status["table_id"] for status in page["tables"]])
+        self.assertEqual(5, page["total"])
+
+    def test_not_modified(self):
+        etag = self.fetch("/api/tables").headers["Etag"]
+        response = self.fetch("/api/tables", headers={"If-None-Match": etag})
+        self.assertEqual(304, response.code)
+        self._app.lobby.update_table(gen_status(1, status="playing"))
+        response = self.fetch("/api/tables", headers={"If-None-Match": etag})
+        self.assertEqual(200, response.code)
+
+    def test_bad_arguments(self):
+        self.assertEqual(400, self.fetch("/api/tables?limit=many").code)
+
+def gen_status(table_id, status="waiting"):
+    return { "table_id": table_id, "port": 8000 + table_id, "players": ["hoge", "fuga"],
+            "small_blind": 5, "ante": 0, "max_round": 10, "status": status, "hand_count": 0, "game_count": 0 }
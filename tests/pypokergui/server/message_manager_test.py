@@ -47,17 +47,106 @@ class MessageManagerTest(BaseUnitTest):
         gm.update_game("fold", 0)
         with patch(
                 'pypokergui.server.message_manager._gen_game_update_message',
-                return_value="update_game"),\
+                side_effect=lambda *args: { "content": "update_game" }),\
             patch(
                 'pypokergui.server.message_manager._broadcast_message_to_ai',
                 side_effect=self._append_log_on_player):
-            MM.broadcast_update_game("handler", gm, sockets, mode="dev")
+            MM.broadcast_update_game("handler", gm, sockets)
         for soc, uuid in zip(sockets, uuids):
             expected = "update_game"
-            self.eq(expected, soc.write_message.call_args_list[0][0][0])
+            self.eq(expected, soc.write_message.call_args_list[0][0][0]["content"])
+            self.include("display_at", soc.write_message.call_args_list[0][0][0])
         for player in gm.ai_players.values():
             self.assertIsNotNone(player.debug_message)
 
+    def test_broadcast_update_game_renders_once_for_all_sockets(self):
+        uuids = ["hoge", "fuga"]
+        sockets = [gen_mock_socket(uuid) for uuid in uuids]
+        gm = setup_game_manager(uuids)
+        gm.update_game("fold", 0)
+        with patch(
+                'pypokergui.server.message_manager._gen_game_update_message',
+                side_effect=lambda *args: { "content": "update_game" }) as render:
+            MM.broadcast_update_game("handler", gm, sockets)
+        broadcast_num = len([update for update in gm.latest_updates if update.is_broadcast()])
+        self.eq(len(gm.latest_updates), render.call_count)
+        for soc in sockets:
+            self.true(soc.write_message.call_count >= broadcast_num)
+
+    def test_broadcast_fast_forward(self):
+        uuids = ["hoge", "fuga"]
+        sockets = [gen_mock_socket(uuid) for uuid in uuids]
+        gm = GameManager()
+        gm.define_rule(10, 100, 10, 5, None)
+        gm.join_human_player("name", "hoge")
+        gm.join_ai_player("ai", ai_setup_script_path)
+        gm.join_ai_player("ai", ai_setup_script_path)
+        gm.start_game()
+        while gm.has_human_in_hand():
+            if gm.next_player_uuid == "hoge": gm.update_game("fold", 0)
+            else: gm.update_game(*gm.ask_action_to_ai_player(gm.next_player_uuid))
+        game_updates = []
+        while not any([update.message_type == 'round_result_message' for update in game_updates]):
+            gm.update_game(*gm.ask_action_to_ai_player(gm.next_player_uuid))
+            game_updates.extend(gm.latest_updates)
+        action_num = len([u for u in game_updates if u.message_type == 'game_update_message'])
+        handler = Mock()
+        handler.render_string.return_value = "html"
+        with patch(
+                'pypokergui.server.message_manager._gen_game_update_message',
+                side_effect=lambda *args: { "content": "update_game" }),\
+            patch(
+                'pypokergui.server.message_manager._broadcast_message_to_ai') as to_ai:
+            MM.broadcast_fast_forward(handler, gm, sockets, game_updates)
+        self.eq(0, to_ai.call_count)
+        template, kwargs = handler.render_string.call_args_list[-1][0][0], handler.render_string.call_args_list[-1][1]
+        self.eq("event_fast_forward.html", template)
+        self.eq(action_num, len(kwargs["actions"]))
+        for soc in sockets:
+            summary = soc.write_message.call_args_list[0][0][0]
+            self.eq("fast_forward_message", summary["content"]["update_type"])
+            self.include("display_at", summary)
+            self.eq("update_game", soc.write_message.call_args_list[1][0][0]["content"])
+
+    def test_send_resync_to_held_player(self):
+        uuids = ["hoge", "fuga"]
+        sockets = [gen_mock_socket(uuid) for uuid in uuids]
+        gm = setup_game_manager(uuids)
+        renders = []
+        def render(handler, game_update, game_manager):
+            renders.append(game_update)
+            return { "content": { "event_html": game_update.message_type, "table_html": "table" } }
+        with patch('pypokergui.server.message_manager._gen_game_update_message', side_effect=render):
+            MM.broadcast_update_game("handler", gm, sockets)
+            last_seq = gm.update_seq
+            gm.hold_human_player("fuga")
+            live = sockets[:1]
+            while gm.next_player_uuid != "fuga":
+                action = "call" if gm.next_player_uuid == "hoge" else "fold"
+                gm.update_game(*(gm.ask_action_to_ai_player(gm.next_player_uuid) if len(gm.next_player_uuid) <= 2 else (action, 0)))
+                MM.broadcast_update_game("handler", gm, live)
+            render_num = len(renders)
+            returned = gen_mock_socket("fuga")
+            MM.send_resync("handler", gm, returned, last_seq)
+        self.eq(render_num, len(renders))  # nothing is rendered again
+        message = returned.write_message.call_args_list[-1][0][0]
+        self.eq("resync", message["message_type"])
+        self.eq(gm.update_seq, message["seq"])
+        self.eq("table", message["table_html"])
+        self.eq("ask_message", message["event_htmls"][-1])
+        self.true(message["ask"])
+
+    def test_send_resync_to_reloaded_page(self):
+        gm = setup_game_manager(["hoge"])
+        soc = gen_mock_socket("hoge")
+        handler = Mock()
+        handler.render_string.return_value = "html"
+        with patch('pypokergui.server.message_manager._gen_game_update_message',
+                side_effect=lambda *args: { "content": { "event_html": "event" } }):
+            MM.send_resync(handler, gm, soc, None)
+        message_types = [args[0][0]["message_type"] for args in soc.write_message.call_args_list]
+        self.eq(["start_game", "game_state_update", "resync"], message_types)
+
     def _append_log_on_player(self, player, message):
         player.debug_message = message
 
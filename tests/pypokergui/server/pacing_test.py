@@ -0,0 +1,44 @@
+from tests.base_unittest import BaseUnitTest
+
+from pypokergui.server.pacing import PacingPolicy
+
+class PacingPolicyTest(BaseUnitTest):
+
+    def setUp(self):
+        self.now = 100.0
+        self.pacing = PacingPolicy("moderate", lookahead=10, clock=lambda: self.now)
+
+    def test_schedule(self):
+        self.eq(100, self.pacing.schedule("round_start_message"))
+        self.eq(106, self.pacing.schedule("street_start_message"))
+        self.eq(112, self.pacing.schedule("game_update_message"))
+        self.now = 200.0
+        self.eq(200, self.pacing.schedule("game_update_message"))
+
+    def test_delay(self):
+        self.eq(0, self.pacing.delay())
+        for _ in range(3):
+            self.pacing.schedule("street_start_message")
+        self.eq(8, self.pacing.delay())
+        self.now = 110.0
+        self.eq(0, self.pacing.delay())
+
+    def test_toggle_pause(self):
+        self.pacing.schedule("round_start_message")
+        self.true(self.pacing.toggle_pause())
+        self.none(self.pacing.delay())
+        self.now = 130.0
+        self.false(self.pacing.toggle_pause())
+        # 6 seconds of round start were left when paused
+        self.eq(136, self.pacing.schedule("game_update_message"))
+
+    def test_set_mode(self):
+        self.pacing.set_mode("dev")
+        self.pacing.schedule("round_result_message")
+        self.eq(100, self.pacing.schedule("round_start_message"))
+        with self.assertRaises(Exception):
+            self.pacing.set_mode("hoge")
+
+    def test_gen_timing(self):
+        self.pacing.schedule("round_start_message")
+        self.eq({ "display_at": 106000, "sent_at": 100000 }, self.pacing.gen_timing("ask_message"))
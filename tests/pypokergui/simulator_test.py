@@ -0,0 +1,42 @@
+import os
+
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.simulator as Sim
+
+class SimulatorTest(BaseUnitTest):
+
+    def test_setup_game_manager(self):
+        gm = Sim.setup_game_manager(rule, [("hoge", ai_setup_script_path), ("fuga", ai_setup_script_path)])
+        self.eq(10, gm.rule["max_round"])
+        self.eq(["hoge", "fuga"], [member["name"] for member in gm.members_info])
+
+    def test_play_game(self):
+        gm = Sim.setup_game_manager(rule, [("hoge", ai_setup_script_path), ("fuga", ai_setup_script_path)])
+        events = list(Sim.play_game(gm))
+        round_events = [event for event in events if event["type"] == "round"]
+        self.eq("game", events[-1]["type"])
+        self.eq(list(range(1, 10)), [event["round_count"] for event in round_events])
+        for event in events:
+            self.eq(200, sum(event["stacks"].values()))
+        self.include(events[-1]["winner"], ["0", "1"])
+        for player in gm.ai_players.values():
+            self.eq(2, player.game_info["player_num"])
+
+    def test_play_games_with_same_game_manager(self):
+        gm = Sim.setup_game_manager(rule, [("hoge", ai_setup_script_path), ("fuga", ai_setup_script_path)])
+        first_game = next(Sim.play_game(gm))  # leave the game in progress
+        events = list(Sim.play_game(gm))
+        self.eq(1, first_game["round_count"])
+        self.eq(list(range(1, 10)), [event["round_count"] for event in events if event["type"] == "round"])
+        self.eq(2, gm.game_count)
+
+rule = {
+        "max_round": 10,
+        "initial_stack": 100,
+        "small_blind": 5,
+        "ante": 0,
+        "blind_structure": None
+        }
+
+ai_setup_script_path = os.path.join(os.path.dirname(__file__), "server", "sample_ai_setup_script.py")
@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+
+from mock import Mock
+import numpy as np
+from pypokerengine.api.game import setup_config, start_poker
+
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.ai_generator as AG
+import pypokergui.solver as Solver
+import pypokergui.utils.card_buckets as CB
+import pypokergui.utils.hand_eval as HE
+
+FISH_SCRIPT = "sample_player/fish_player_setup.py"
+
+class SolverTest(BaseUnitTest):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.checkpoint_dir = os.path.join(self.tmp_dir, "checkpoint")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_heads_up_tree(self):
+        tree = Solver.GameTree(2, 100, 5, ante=1)
+        root = tree.root
+        self.eq(Solver.DECISION, tree.kinds[root])
+        self.eq(0, tree.players[root])  # small blind acts first
+        self.eq([("fold", 0), ("call", 5), ("raise", 21), ("raise", 32), ("raise", 99)], tree.actions[root])
+        # no option of the big blind after a limp
+        limp = tree.children[root][1]
+        self.eq(Solver.CHANCE, tree.kinds[limp])
+        flop = tree.children[limp][0]
+        self.eq((1, 0, 0), (tree.streets[flop], tree.players[flop], tree.to_calls[flop]))
+        self.eq([-6, 6], tree.fold_utilities[tree.children[root][0]])
+
+    def test_terminals_are_zero_sum(self):
+        tree = Solver.GameTree(3, 100, 5, max_raises=1)
+        for node, kind in enumerate(tree.kinds):
+            if kind in (Solver.FOLDED, Solver.SHOWDOWN):
+                self.almosteq(0, sum(tree.utility(node, [3, 2, 1])), 1e-9)
+                contributions, active = tree.terminal_values[node]
+                self.true(max(contributions) <= 100)
+
+    def test_limit_tree(self):
+        tree = Solver.GameTree(2, 1000, 5, limit=True, max_raises=3)
+        node, raises = tree.root, 0
+        while Solver.RAISE in [action for action, _ in tree.actions[node]]:
+            self.size(1, [a for a, _ in tree.actions[node] if a == Solver.RAISE])
+            node = tree.children[node][-1]
+            raises += 1
+        self.eq(3, raises)
+        self.eq(40, tree.max_bets[node])
+
+    def test_regret_matching(self):
+        self.eq([0.25, 0.75, 0.0], Solver.regret_matching([1.0, 3.0, -2.0]))
+        self.eq([0.5, 0.5], Solver.regret_matching([0.0, -1.0]))
+
+    def test_hand_strength(self):
+        board = HE.card_ids(["SA", "SK", "SQ", "SJ", "ST"])
+        self.eq(0.5, Solver.hand_strength(HE.card_ids(["H2", "D3"]), board))
+        self.eq(1.0, Solver.hand_strength(HE.card_ids(["HA", "DA"]), HE.card_ids(["CA", "SA", "D2"])))
+
+    def test_deal_batch_with_card_buckets(self):
+        tables = Mock(buckets_of=lambda holes, boards: np.full(len(holes), boards.shape[1]))
+        buckets, scores = Solver.deal_batch(3, None, 8, np.random.default_rng(0), 4, tables)
+        self.eq((4, 3, 4), buckets.shape)
+        self.eq([0, 3, 4, 5], buckets[2, 1].tolist())
+        self.eq((4, 3), scores.shape)
+
+    def test_card_buckets_need_every_street(self):
+        table_dir = os.path.join(self.tmp_dir, "buckets")
+        CB.build_tables(table_dir, ["preflop"], bucket_num=4)
+        with self.assertRaises(Exception):
+            Solver.create_checkpoint(self.checkpoint_dir, { "initial_stack": 100, "small_blind": 5 },
+                    card_buckets=table_dir)
+
+    def test_train_and_resume(self):
+        Solver.create_checkpoint(self.checkpoint_dir, { "initial_stack": 100, "small_blind": 5, "ante": 0 },
+                bucket_num=3, max_raises=1)
+        self.true(Solver.has_checkpoint(self.checkpoint_dir))
+        Solver.train(self.checkpoint_dir, 60, round_iterations=40, seed=0)
+        self.eq(60, Solver.load_meta(self.checkpoint_dir)["iterations"])
+        Solver.train(self.checkpoint_dir, 20, seed=1)
+        self.eq(80, Solver.load_meta(self.checkpoint_dir)["iterations"])
+        policy = Solver.average_policy(self.checkpoint_dir)
+        self.almosteq(len(policy), policy.sum(), 1e-3)
+        tree = Solver.gen_tree(Solver.load_meta(self.checkpoint_dir))
+        for node, decision in enumerate(tree.decisions):
+            if decision >= 0:
+                self.eq(0, policy[decision * 3:(decision + 1) * 3, len(tree.actions[node]):].sum())
+
+    def test_train_in_processes(self):
+        Solver.create_checkpoint(self.checkpoint_dir, { "initial_stack": 100, "small_blind": 5, "ante": 0 },
+                bucket_num=2, max_raises=1, limit=True)
+        Solver.train(self.checkpoint_dir, 30, processes=2, seed=0)
+        self.eq(30, Solver.load_meta(self.checkpoint_dir)["iterations"])
+
+    def test_generated_bot_plays(self):
+        Solver.create_checkpoint(self.checkpoint_dir, { "initial_stack": 100, "small_blind": 5, "ante": 1 },
+                bucket_num=3)
+        Solver.train(self.checkpoint_dir, 50, seed=0)
+        script_path = os.path.join(self.tmp_dir, "cfr_bot.py")
+        Solver.write_bot(self.checkpoint_dir, script_path)
+        self.true(AG.healthcheck(script_path, quiet=True))
+        player = AG.load_setup_method(script_path)()
+        config = setup_config(max_round=10, initial_stack=100, small_blind_amount=5, ante=1)
+        config.register_player("cfr", player)
+        config.register_player("fish", AG.load_setup_method(FISH_SCRIPT)())
+        result = start_poker(config, verbose=0)
+        stacks = [p["stack"] for p in result["players"]]
+        # the engine takes the last chips of a player who cannot pay ante and big blind (< 5*2+1)
+        lost = 200 - sum(stacks)
+        if 0 in stacks:
+            self.true(0 <= lost < stacks.count(0) * 11)
+        else:
+            self.eq(0, lost)
+
+    def test_find_node_maps_raise_to_closest_size(self):
+        Solver.create_checkpoint(self.checkpoint_dir, { "initial_stack": 100, "small_blind": 5, "ante": 0 },
+                bucket_num=2)
+        Solver.write_bot(self.checkpoint_dir, os.path.join(self.tmp_dir, "cfr_bot.py"))
+        player = Solver.PolicyPlayer(self.checkpoint_dir)
+        player.set_uuid("bb")
+        round_state = {
+                "street": "preflop", "small_blind_pos": 0, "community_card": [],
+                "seats": [{ "uuid": "sb", "state": "participating", "stack": 70 },
+                    { "uuid": "bb", "state": "participating", "stack": 90 }],
+                "action_histories": { "preflop": [
+                    { "action": "SMALLBLIND", "amount": 5, "uuid": "sb" },
+                    { "action": "BIGBLIND", "amount": 10, "uuid": "bb" },
+                    { "action": "RAISE", "amount": 30, "paid": 25, "uuid": "sb" }] }
+                }
+        tree = player.tree
+        node = player._find_node(round_state)
+        self.eq(tree.children[tree.root][3], node)  # raise to 32 of the abstract game
+        self.eq(1, tree.players[node])
+        round_state["seats"].append({ "uuid": "other", "state": "participating", "stack": 100 })
+        self.none(player._find_node(round_state))
@@ -0,0 +1,59 @@
+import os
+
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.tournament as Tournament
+
+class TournamentTest(BaseUnitTest):
+
+    def test_seat_players(self):
+        self.eq([[0, 3, 6], [1, 4], [2, 5]], Tournament.seat_players(list(range(7)), 3))
+        self.eq([[0, 1, 2]], Tournament.seat_players(list(range(3)), 9))
+
+    def test_balance_tables_moves_players(self):
+        tables = Tournament.balance_tables([[0, 1, 2, 3], [4], [5, 6, 7]], 3)
+        self.eq([3, 2, 3], [len(table) for table in tables])
+        self.eq(list(range(8)), sorted(sum(tables, [])))
+
+    def test_balance_tables_breaks_table(self):
+        tables = Tournament.balance_tables([[0, 1], [2, 3, 4], [5], []], 3)
+        self.eq([3, 3], sorted([len(table) for table in tables]))
+        self.eq(list(range(6)), sorted(sum(tables, [])))
+
+    def test_balance_tables_keeps_two_players_on_table(self):
+        tables = Tournament.balance_tables([[0, 1], [2]], 2)
+        self.eq([[0, 1, 2]], tables)
+
+    def test_session_rule(self):
+        blind_structure = { 4: { 'small_blind': 20, 'ante': 2 }, 12: { 'small_blind': 40, 'ante': 4 } }
+        tournament = Tournament.Tournament(entrants(4), 100, 10, 0, blind_structure, hands_per_session=5, max_hands=20)
+        rule = tournament._gen_session_rule()
+        self.eq(6, rule['max_round'])
+        self.eq(((1, 10, 0), (4, 20, 2)), rule['blind_structure'])
+        tournament.hand_count = 10
+        rule = tournament._gen_session_rule()
+        self.eq(((1, 20, 2), (2, 40, 4)), rule['blind_structure'])
+        self.eq((20, 2), tournament.current_blind_level())
+
+    def test_eliminate_busted_players(self):
+        tournament = Tournament.Tournament(entrants(4), 100, 10, table_size=2)
+        for entrant_id, stack in [(0, 0), (1, 150), (2, 0), (3, 250)]:
+            tournament.entrants[entrant_id]["stack"] = stack
+        tournament.entrants[0]["session_start_stack"] = 120
+        tournament.entrants[2]["session_start_stack"] = 80
+        tournament._eliminate_busted_players()
+        self.eq(3, tournament.entrants[0]["place"])
+        self.eq(4, tournament.entrants[2]["place"])
+        self.eq([1, 3], sorted(sum(tournament.tables, [])))
+
+    def test_play(self):
+        tournament = Tournament.Tournament(entrants(7), 100, 10, table_size=3, hands_per_session=3, max_hands=9)
+        standings = tournament.play()
+        self.true(tournament.has_finished())
+        self.eq(list(range(1, 8)), [entrant["place"] for entrant in standings])
+        self.eq(700, sum([entrant["stack"] for entrant in standings]))
+
+def entrants(num):
+    return [("player%d" % i, ai_setup_script_path) for i in range(num)]
+
+ai_setup_script_path = os.path.join(os.path.dirname(__file__), "server", "sample_ai_setup_script.py")
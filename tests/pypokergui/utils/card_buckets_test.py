@@ -0,0 +1,84 @@
+import itertools
+import shutil
+import tempfile
+
+from mock import patch
+import numpy as np
+
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.utils.card_buckets as CB
+import pypokergui.utils.hand_eval as HE
+import pypokergui.utils.range_equity as RE
+
+class CardBucketsTest(BaseUnitTest):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table_dir = tempfile.mkdtemp()
+        with patch("pypokergui.utils.card_buckets.FIT_BOARDS", 30):
+            CB.build_tables(cls.table_dir, ["preflop"], bucket_num=8)
+            CB.build_tables(cls.table_dir, ["flop"], bucket_num=8, runouts=3)
+        cls.tables = CB.BucketTables(cls.table_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.table_dir)
+
+    def test_board_index(self):
+        rows, perms, canonical = CB.gen_board_index(3)
+        self.eq(22100, len(rows))
+        self.eq(1755, len(canonical))
+        boards = np.array([[0, 1, 2], [0, 4, 8], [51, 47, 43], [5, 20, 33]])
+        idx = CB.colex_indices(boards)
+        all_boards = np.array(list(itertools.combinations(range(52), 3)))
+        self.eq(list(range(22100)), sorted(CB.colex_indices(all_boards).tolist()))
+        # permuted boards are the canonical boards of their rows
+        permuted = np.sort(np.take_along_axis(CB.PERM_CARDS[perms[idx]], boards, axis=1), axis=1)
+        self.eq(canonical[rows[idx]].tolist(), permuted.tolist())
+        self.eq(rows[CB.colex_indices(np.array([[0, 4, 8]]))], rows[CB.colex_indices(np.array([[3, 7, 11]]))])
+        self.neq(rows[CB.colex_indices(np.array([[0, 4, 8]]))], rows[CB.colex_indices(np.array([[0, 5, 8]]))])
+
+    def test_river_strengths(self):
+        royal = np.array([HE.card_ids(["SA", "SK", "SQ", "SJ", "ST"])], dtype=np.int32)
+        strengths = CB.river_strengths(royal)[0]
+        self.eq(1326 - 1081, np.isnan(strengths).sum())
+        self.eq({0.5}, set(strengths[~np.isnan(strengths)].tolist()))
+        board = np.array([HE.card_ids(["SA", "HA", "D7", "C2", "H9"])], dtype=np.int32)
+        strengths = CB.river_strengths(board)[0]
+        self.eq(1.0, strengths[RE.COMBO_INDEX[tuple(sorted(HE.card_ids(["DA", "CA"])))]])
+        self.true(strengths[RE.COMBO_INDEX[tuple(sorted(HE.card_ids(["D3", "C4"])))]] < 0.1)
+
+    def test_kmeans(self):
+        rng = np.random.default_rng(0)
+        points = np.vstack([rng.normal(0, 0.1, (50, 2)), rng.normal(5, 0.1, (50, 2))])
+        centers = CB.kmeans(points, 2, rng)
+        labels = CB.assign(points, centers)
+        self.eq(1, len(set(labels[:50].tolist())))
+        self.neq(labels[0], labels[-1])
+
+    def test_isomorphic_hands_share_bucket(self):
+        bucket = lambda hole, board: self.tables.bucket(HE.card_ids(hole), HE.card_ids(board))
+        self.eq(bucket(["SA", "HA"], []), bucket(["DA", "CA"], []))
+        self.eq(bucket(["SA", "SK"], ["SQ", "SJ", "D2"]), bucket(["HA", "HK"], ["HQ", "HJ", "C2"]))
+        self.eq(bucket(["SA", "SK"], ["SQ", "SJ", "D2"]), bucket(["SK", "SA"], ["D2", "SJ", "SQ"]))
+        self.true(bucket(["SA", "HA"], []) > bucket(["S2", "H7"], []))
+        self.true(bucket(["SA", "SK"], ["SQ", "SJ", "ST"]) > bucket(["D3", "C4"], ["SQ", "SJ", "ST"]))
+
+    def test_buckets_of(self):
+        rng = np.random.default_rng(1)
+        cards = np.argsort(rng.random((20, 52)), axis=1)[:, :5]
+        buckets = self.tables.buckets_of(cards[:, :2], cards[:, 2:])
+        self.eq([self.tables.bucket(deal[:2], deal[2:]) for deal in cards.tolist()], buckets.tolist())
+        self.true((buckets < 8).all())
+
+    def test_ehs_increases_with_bucket(self):
+        for board_size in [0, 3]:
+            ehs = self.tables.ehs[board_size]
+            self.eq(8, len(ehs))
+            self.eq(sorted(ehs.tolist()), ehs.tolist())
+
+    def test_blocked_combos(self):
+        buckets = np.load("%s/flop_buckets.npy" % self.table_dir)
+        self.eq(1755 * (1326 - 1176), (buckets == CB.NO_BUCKET).sum())
+        self.eq(["preflop", "flop"], self.tables.streets)
@@ -0,0 +1,50 @@
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.utils.decision_history as DH
+
+class DecisionHistoryTest(BaseUnitTest):
+
+    def test_record(self):
+        history = DH.DecisionHistory(3)
+        self.none(history.last())
+        history.record(["SA", "HK"], self._gen_round_state(2, "flop", ["C2", "D7", "ST"]), "raise", 40, "uuid-1")
+        self.eq(1, len(history))
+        self.eq({
+            "round_count": 2, "street": "flop", "hole_card": ["SA", "HK"], "community_card": ["C2", "D7", "ST"],
+            "pot": 65, "stack": 80, "action": "raise", "amount": 40 }, history.last())
+
+    def test_unknown_player_has_no_stack(self):
+        history = DH.DecisionHistory(3)
+        history.record(["SA", "HK"], self._gen_round_state(1, "preflop", []), "call", 10)
+        self.eq(-1, history.last()["stack"])
+        self.eq([], history.last()["community_card"])
+
+    def test_oldest_decisions_are_overwritten(self):
+        history = DH.DecisionHistory(3)
+        for round_count in range(1, 6):
+            history.record(["SA", "HK"], self._gen_round_state(round_count, "river", []), "fold", 0, "uuid-1")
+        self.eq(3, len(history))
+        self.eq(5, history.count)
+        self.eq([3, 4, 5], history.rows()[:, DH.ROUND_COUNT].tolist())
+        self.eq([3, 4, 5], [decision["round_count"] for decision in history])
+        self.eq((3, 3, len(DH.FIELDS)), (history.capacity,) + history.buffer.shape)
+        history.clear()
+        self.eq(0, len(history))
+
+    def test_zero_capacity(self):
+        history = DH.DecisionHistory(0)
+        history.record(["SA", "HK"], self._gen_round_state(1, "preflop", []), "call", 10)
+        self.eq(0, len(history))
+        self.size(0, history.rows())
+
+    def _gen_round_state(self, round_count, street, community_card):
+        return {
+                "round_count": round_count,
+                "street": street,
+                "community_card": community_card,
+                "pot": { "main": { "amount": 50 }, "side": [{ "amount": 15 }] },
+                "seats": [
+                    { "uuid": "uuid-0", "stack": 120 },
+                    { "uuid": "uuid-1", "stack": 80 }
+                    ]
+                }
@@ -0,0 +1,34 @@
+import os
+import tempfile
+
+import numpy as np
+
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.utils.hand_dataset as HD
+import pypokergui.utils.hand_eval as HE
+
+class HandDatasetTest(BaseUnitTest):
+
+    def test_load_dataset(self):
+        hands, classes = HD.load_dataset()
+        self.eq((25010, 5), hands.shape)
+        self.eq(np.int8, hands.dtype)
+        self.eq(np.int8, classes.dtype)
+        # first row is royal flush of hearts : 1,10,1,11,1,13,1,12,1,1,9
+        self.eq(["CT", "CJ", "CK", "CQ", "CA"], [HE.card_str(c) for c in hands[0]])
+        self.eq(9, classes[0])
+
+    def test_iter_dataset(self):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w") as f:
+            f.write("S1,C1,S2,C2,S3,C3,S4,C4,S5,C5,CLASS\n")
+            f.write("1,1,2,1,3,5,4,8,1,13,1\n" * 5)
+        try:
+            chunks = list(HD.iter_dataset(path, chunk_size=2))
+            self.eq([2, 2, 1], [len(classes) for _, classes in chunks])
+        finally:
+            os.remove(path)
+
+    def test_validate(self):
+        self.eq(0, len(HD.validate()))
@@ -0,0 +1,68 @@
+import itertools
+
+import numpy as np
+
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.utils.hand_eval as HE
+
+class HandEvalTest(BaseUnitTest):
+
+    def test_card_id(self):
+        self.eq(0, HE.card_id("C2"))
+        self.eq(51, HE.card_id("SA"))
+        for card_id in range(52):
+            self.eq(card_id, HE.card_id(HE.card_str(card_id)))
+
+    def test_categories(self):
+        for cards, name in [
+                (["C2", "D5", "H9", "SJ", "CK"], "HIGHCARD"),
+                (["C2", "D2", "H9", "SJ", "CK"], "ONEPAIR"),
+                (["C2", "D2", "H9", "S9", "CK"], "TWOPAIR"),
+                (["C2", "D2", "H2", "S9", "CK"], "THREECARD"),
+                (["CA", "D2", "H3", "S4", "C5"], "STRAIGHT"),
+                (["CT", "DJ", "HQ", "SK", "CA"], "STRAIGHT"),
+                (["C2", "C5", "C9", "CJ", "CK"], "FLASH"),
+                (["C2", "D2", "H2", "S9", "C9"], "FULLHOUSE"),
+                (["C2", "D2", "H2", "S2", "C9"], "FOURCARD"),
+                (["C9", "CT", "CJ", "CQ", "CK"], "STRAIGHTFLASH"),
+                ]:
+            self.eq(name, HE.category_name(HE.evaluate_one(HE.card_ids(cards))))
+
+    def test_order(self):
+        ordered = [
+                ["C2", "D3", "H4", "S5", "C7"],
+                ["C2", "D3", "H4", "S6", "C7"],
+                ["C2", "D2", "H4", "S5", "C7"],
+                ["C3", "D3", "H2", "S4", "C5", "D9"][:5],
+                ["C3", "D3", "H4", "S4", "C2"],
+                ["C3", "D3", "H4", "S4", "C5"],
+                ["C2", "D2", "H2", "S5", "C7"],
+                ["CA", "D2", "H3", "S4", "C5"],
+                ["C2", "D3", "H4", "S5", "C6"],
+                ["C2", "C3", "C4", "C5", "C7"],
+                ["C2", "D2", "H2", "S3", "C3"],
+                ["C3", "D3", "H3", "S2", "C2"],
+                ["C2", "D2", "H2", "S2", "C3"],
+                ["CA", "C2", "C3", "C4", "C5"],
+                ["CT", "CJ", "CQ", "CK", "CA"]
+                ]
+        scores = [HE.evaluate_one(HE.card_ids(cards)) for cards in ordered]
+        self.eq(sorted(scores), scores)
+        self.eq(len(set(scores)), len(scores))
+
+    def test_seven_cards_is_best_five(self):
+        rng = np.random.RandomState(0)
+        hands = np.argsort(rng.rand(500, 52), axis=1)[:, :7]
+        best = np.max([HE.evaluate(hands[:, list(c)]) for c in itertools.combinations(range(7), 5)], axis=0)
+        self.true((best == HE.evaluate(hands)).all())
+
+    def test_seven_cards_kickers(self):
+        # two pair keeps the best kicker even when a third pair exists
+        a = HE.evaluate_one(HE.card_ids(["CA", "DA", "HK", "SK", "CQ", "DQ", "H2"]))
+        b = HE.evaluate_one(HE.card_ids(["CA", "DA", "HK", "SK", "CJ", "DJ", "H2"]))
+        self.true(a > b)
+        # full house uses the best pair among trips and pairs
+        a = HE.evaluate_one(HE.card_ids(["C5", "D5", "H5", "S3", "C3", "DK", "HK"]))
+        b = HE.evaluate_one(HE.card_ids(["C5", "D5", "H5", "S3", "C3", "DQ", "HQ"]))
+        self.true(a > b)
@@ -0,0 +1,109 @@
+from tests.base_unittest import BaseUnitTest
+
+from pypokergui.utils.opponent_stats import OpponentStats, OpponentTracker
+
+class OpponentTrackerTest(BaseUnitTest):
+
+    def setUp(self):
+        self.tracker = OpponentTracker()
+
+    def test_count_hands(self):
+        self.tracker.receive_round_start(seats)
+        self.tracker.receive_round_start(seats)
+        self.eq(2, self.tracker.get("a").hands)
+        self.eq(0, self.tracker.get("c").hands)
+
+    def test_vpip_and_pfr_counted_once_per_hand(self):
+        self._start_preflop()
+        self.tracker.receive_action("a", "raise", 30)
+        self.tracker.receive_action("b", "call", 30)
+        self.tracker.receive_action("a", "raise", 60)
+        stats = self.tracker.get("a")
+        self.eq(1, stats.vpip)
+        self.eq(1, stats.pfr)
+        self.eq(2, stats.raises[0])
+        self.eq(1, self.tracker.get("b").vpip)
+        self.eq(0, self.tracker.get("b").pfr)
+
+    def test_big_blind_check_is_not_vpip(self):
+        self._start_preflop()
+        self.tracker.receive_action("a", "call", 20)
+        self.tracker.receive_action("b", "call", 20)
+        self.eq(1, self.tracker.get("a").vpip)
+        self.eq(0, self.tracker.get("b").vpip)
+        self.eq(1, self.tracker.get("b").checks[0])
+
+    def test_aggression(self):
+        self._start_preflop()
+        self.tracker.receive_street_start("flop", {})
+        self.tracker.receive_action("a", "raise", 20)
+        self.tracker.receive_action("b", "call", 20)
+        self.tracker.receive_street_start("turn", {})
+        self.tracker.receive_action("a", "call", 0)
+        self.tracker.receive_action("b", "raise", 40)
+        self.tracker.receive_action("a", "call", 40)
+        stats = self.tracker.get("a")
+        self.eq(1.0, stats.aggression_factor())
+        self.eq(1.0 / 3, stats.aggression_frequency())
+        self.eq(0.0, stats.aggression_factor("turn"))
+        self.eq(1.0, self.tracker.get("b").aggression_factor())
+
+    def test_fold_to_cbet(self):
+        self._start_preflop()
+        self.tracker.receive_action("a", "raise", 40)
+        self.tracker.receive_action("b", "call", 40)
+        self.tracker.receive_street_start("flop", {})
+        self.tracker.receive_action("b", "call", 0)
+        self.tracker.receive_action("a", "raise", 30)
+        self.tracker.receive_action("b", "fold", 0)
+        stats = self.tracker.get("b")
+        self.eq(1, stats.cbet_faced[1])
+        self.eq(1.0, stats.fold_to_cbet("flop"))
+
+    def test_donk_bet_is_not_cbet(self):
+        self._start_preflop()
+        self.tracker.receive_action("a", "raise", 40)
+        self.tracker.receive_action("b", "call", 40)
+        self.tracker.receive_street_start("flop", {})
+        self.tracker.receive_action("b", "raise", 30)
+        self.tracker.receive_action("a", "fold", 0)
+        self.eq(0, self.tracker.get("a").cbet_faced[1])
+
+    def test_decay(self):
+        tracker = OpponentTracker(decay=0.5)
+        for _ in range(3):
+            tracker.receive_round_start(seats)
+            tracker.receive_street_start("preflop", round_state)
+            tracker.receive_action("a", "raise", 30)
+        stats = tracker.get("a")
+        self.almosteq(1.75, stats.hands, 1e-9)
+        self.almosteq(1.0, stats.vpip_rate(), 1e-9)
+
+    def test_stats_serialization(self):
+        self._start_preflop()
+        self.tracker.receive_action("a", "raise", 30)
+        stats = self.tracker.get("a")
+        restored = OpponentStats.from_list(stats.to_list())
+        self.eq(stats.to_list(), restored.to_list())
+        restored.merge(stats)
+        self.eq(2, restored.pfr)
+        self.eq(2, restored.raises[0])
+
+    def _start_preflop(self):
+        self.tracker.receive_round_start(seats)
+        self.tracker.receive_street_start("preflop", round_state)
+
+seats = [
+        { "uuid": "a", "state": "participating" },
+        { "uuid": "b", "state": "participating" },
+        { "uuid": "c", "state": "folded" }
+        ]
+
+round_state = {
+        "action_histories": {
+            "preflop": [
+                { "action": "SMALLBLIND", "amount": 10, "uuid": "a" },
+                { "action": "BIGBLIND", "amount": 20, "uuid": "b" }
+                ]
+            }
+        }
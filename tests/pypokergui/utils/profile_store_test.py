@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import multiprocessing
+
+from tests.base_unittest import BaseUnitTest
+
+from pypokergui.utils.opponent_stats import OpponentStats, OpponentTracker
+from pypokergui.utils.profile_store import ProfileStore, ProfileSync
+
+class ProfileStoreTest(BaseUnitTest):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "profiles.sqlite3")
+        self.store = ProfileStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_load_unknown_names(self):
+        self.eq({}, self.store.load(["hoge"]))
+        self.eq({}, self.store.load([]))
+
+    def test_save_adds_increments(self):
+        self.store.save({ "hoge": gen_stats(hands=2, vpip=1), "fuga": gen_stats(hands=1) })
+        self.store.save({ "hoge": gen_stats(hands=3, vpip=2) })
+        profiles = self.store.load(["hoge", "fuga", "boo"])
+        self.eq(["fuga", "hoge"], sorted(profiles.keys()))
+        self.eq(5, profiles["hoge"].hands)
+        self.eq(3, profiles["hoge"].vpip)
+        self.eq(2, profiles["hoge"].raises[1])
+
+    def test_concurrent_save(self):
+        processes = [multiprocessing.Process(target=_save_many, args=(self.path,)) for _ in range(4)]
+        for process in processes: process.start()
+        for process in processes: process.join()
+        self.eq(4 * 25, self.store.load(["hoge"])["hoge"].hands)
+
+class ProfileSyncTest(BaseUnitTest):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = ProfileStore(os.path.join(self.tmp_dir, "profiles.sqlite3"))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_flush_and_load(self):
+        tracker = OpponentTracker(journal=True)
+        sync = ProfileSync(self.store, tracker, flush_interval=2)
+        sync.receive_game_start(seats, my_uuid="0")
+        tracker.receive_round_start(seats)
+        sync.receive_round_result()
+        self.eq({}, self.store.load(["HOGE"]))
+        tracker.receive_round_start(seats)
+        sync.receive_round_result()
+        self.eq(2, self.store.load(["HOGE"])["HOGE"].hands)
+        self.eq({}, self.store.load(["ME"]))
+
+        next_tracker = OpponentTracker(journal=True)
+        ProfileSync(self.store, next_tracker).receive_game_start(seats, my_uuid="0")
+        self.eq(2, next_tracker.get("1").hands)
+
+    def test_my_uuid_is_not_saved(self):
+        tracker = OpponentTracker(journal=True)
+        sync = ProfileSync(self.store, tracker)
+        sync.receive_game_start(seats)
+        tracker.receive_round_start(seats)
+        sync.receive_round_result(is_last_round=True, my_uuid="0")
+        self.eq(["HOGE"], list(self.store.load(["ME", "HOGE"]).keys()))
+
+    def test_seed_is_scaled_to_decay_window(self):
+        self.store.save({ "HOGE": gen_stats(hands=100, vpip=50) })
+        tracker = OpponentTracker(decay=0.9, journal=True)
+        ProfileSync(self.store, tracker).receive_game_start(seats)
+        self.almosteq(10, tracker.get("1").hands, 1e-9)
+        self.almosteq(0.5, tracker.get("1").vpip_rate(), 1e-9)
+
+def gen_stats(hands, vpip=0):
+    stats = OpponentStats()
+    stats.hands, stats.vpip = hands, vpip
+    stats.raises[1] = 1
+    return stats
+
+def _save_many(path):
+    store = ProfileStore(path)
+    for _ in range(25):
+        store.save({ "hoge": gen_stats(hands=1) })
+    store.close()
+
+seats = [
+        { "uuid": "0", "name": "ME", "state": "participating" },
+        { "uuid": "1", "name": "HOGE", "state": "participating" }
+        ]
@@ -0,0 +1,124 @@
+from mock import patch
+import numpy as np
+
+from tests.base_unittest import BaseUnitTest
+
+import pypokergui.utils.hand_eval as HE
+import pypokergui.utils.range_equity as RE
+
+class RangeEquityTest(BaseUnitTest):
+
+    def test_parse_range(self):
+        self.eq(6, RE.parse_range("AA").sum())
+        self.eq(30, RE.parse_range("TT+").sum())
+        self.eq(24, RE.parse_range("55-22").sum())
+        self.eq(4, RE.parse_range("AKs").sum())
+        self.eq(12, RE.parse_range("AKo").sum())
+        self.eq(16, RE.parse_range("AK").sum())
+        self.eq(16, RE.parse_range("ATs+").sum())
+        self.eq(16, RE.parse_range("A5s-A2s").sum())
+        self.eq(1326, RE.parse_range("random").sum())
+        self.eq(1, RE.parse_range("AhKh").sum())
+        self.eq(RE.hand_range(["HA", "HK"]).tolist(), RE.parse_range("AhKh").tolist())
+
+    def test_parse_range_weights(self):
+        weights = RE.parse_range("AK:0.5, AKs")
+        self.eq(4 + 12 * 0.5, weights.sum())
+        self.eq(1.0, weights[RE._combo_index(HE.card_ids(["HA", "HK"]))])
+
+    def test_parse_range_error(self):
+        for token in ["AAs", "AX", "AKs-KQs", "A", "AK+s"]:
+            self.assertRaises(Exception, RE.parse_range, token)
+
+    def test_equity_on_river(self):
+        board = ["S2", "D7", "CT", "H9", "S4"]
+        self.eq(1.0, RE.equity(RE.parse_range("AA"), RE.parse_range("KK"), board))
+        self.eq(0.5, RE.equity(RE.parse_range("AhKh"), RE.parse_range("AcKc"), board))
+
+    def test_equity_on_turn_matches_brute_force(self):
+        board = HE.card_ids(["S2", "D7", "CT", "H9"])
+        hero, villain = RE.parse_range("AA,JTs"), RE.parse_range("KK,98s:0.5")
+        self.almosteq(brute_force_equity(hero, villain, board), RE.equity(hero, villain, board), 1e-9)
+
+    def test_equity_without_possible_combo(self):
+        self.assertRaises(Exception, RE.equity, RE.parse_range("AhKh"), RE.random_range(), ["HA", "D2", "C3"])
+
+    def test_sampled_equity(self):
+        equity = RE.equity(RE.parse_range("AA"), RE.parse_range("KK"), samples=2000, seed=0)
+        self.almosteq(0.82, equity, 0.03)
+        self.eq(equity, RE.equity(RE.parse_range("AA"), RE.parse_range("KK"), samples=2000, seed=0))
+
+    def test_gen_runouts(self):
+        board = HE.card_ids(["S2", "D7", "CT", "H9"])
+        runouts = RE.gen_runouts(board)
+        self.eq((48, 5), runouts.shape)
+        self.eq(board, runouts[:, :4].tolist()[0])
+        self.eq(48, len(set(runouts[:, 4].tolist()) - set(board)))
+        self.eq((100, 5), RE.gen_runouts(board[:3], samples=100, seed=0).shape)
+
+    def test_board_cache(self):
+        cache = RE.BoardCache(max_boards=2)
+        boards = RE.gen_runouts(HE.card_ids(["S2", "D7", "CT", "H9"]))[:3]
+        masks = RE._to_masks(boards)
+        combo_idx = np.nonzero(RE.parse_range("AA"))[0]
+        scores = cache.scores(boards, masks, combo_idx)
+        self.eq((3, 6), scores.shape)
+        self.size(2, cache.boards)
+        with patch("pypokergui.utils.hand_eval.evaluate") as evaluate:
+            self.eq(scores[2].tolist(), cache.scores(boards[2:], masks[2:], combo_idx)[0].tolist())
+            self.false(evaluate.called)
+
+    def test_equity_in_processes(self):
+        hero, villain = RE.parse_range("TT+,AKs"), RE.parse_range("22+,A2s+")
+        board = ["S2", "D7", "CT", "H9"]
+        with patch("pypokergui.utils.range_equity.PARALLEL_MIN_HANDS", 0):
+            self.almosteq(RE.equity(hero, villain, board), RE.equity(hero, villain, board, processes=2), 1e-9)
+
+    def test_count_combinations(self):
+        self.eq(1081 * 990, RE.count_combinations(3))
+        self.eq(1035 * 44, RE.count_combinations(4))
+        self.eq(990, RE.count_combinations(5))
+
+    def test_estimate_equity_exact(self):
+        board = ["S2", "D7", "CT", "H9"]
+        equity, exact = RE.estimate_equity(["HA", "HK"], board)
+        self.true(exact)
+        self.almosteq(RE.equity(RE.hand_range(["HA", "HK"]), RE.random_range(), board, max_runouts=48), equity, 1e-9)
+        equity, exact = RE.estimate_equity(["HA", "HK"], board + ["S4"])
+        self.true(exact)
+        board = HE.card_ids(board + ["S4"])
+        hero_score = HE.evaluate_one(HE.card_ids(["HA", "HK"]) + board)
+        villains = [combo for combo in RE.COMBOS.tolist()
+                if not set(combo) & set(board + HE.card_ids(["HA", "HK"]))]
+        villain_scores = HE.evaluate([combo + board for combo in villains])
+        expected = ((hero_score > villain_scores).sum() + 0.5 * (hero_score == villain_scores).sum()) / len(villains)
+        self.almosteq(expected, equity, 1e-9)
+
+    def test_estimate_equity_sampled(self):
+        equity, exact = RE.estimate_equity(["HA", "SA"], [], samples=4000, seed=0)
+        self.false(exact)
+        self.almosteq(0.85, equity, 0.03)
+        equity, exact = RE.estimate_equity(["HA", "SA"], [], nb_player=4, samples=4000, seed=0)
+        self.false(exact)
+        self.almosteq(0.64, equity, 0.03)
+        self.false(RE.estimate_equity(["HA", "HK"], ["S2", "D7", "CT", "H9"], budget=1000, seed=0)[1])
+
+    def test_estimate_equity_splits_ties(self):
+        board = ["ST", "SJ", "SQ", "SK", "SA"]
+        self.eq((0.5, True), RE.estimate_equity(["H2", "D3"], board))
+        self.almosteq(1 / 3.0, RE.estimate_equity(["H2", "D3"], board, nb_player=3, samples=100)[0], 1e-9)
+
+def brute_force_equity(hero, villain, board):
+    won, total = 0.0, 0.0
+    deck = [card for card in range(52) if card not in board]
+    for h in np.nonzero(hero)[0]:
+        for v in np.nonzero(villain)[0]:
+            cards = set(RE.COMBOS[h].tolist() + RE.COMBOS[v].tolist())
+            if len(cards) < 4 or cards & set(board): continue
+            for river in [card for card in deck if card not in cards]:
+                hero_score = HE.evaluate_one(RE.COMBOS[h].tolist() + board + [river])
+                villain_score = HE.evaluate_one(RE.COMBOS[v].tolist() + board + [river])
+                weight = hero[h] * villain[v]
+                won += weight * (1.0 if hero_score > villain_score else 0.5 if hero_score == villain_score else 0)
+                total += weight
+    return won / total